@@ -35,19 +35,33 @@ minimize the chance of modifying the code when the strategy is edited.
 
 import cs_messages as msgs  # Import the messages and use an alias
 from cs_game import Game
+from cs_store import StatsStore
 # I like putting a blank line between my own code's imports and system or 3rd-party imports
 
+import argparse
 import sys
 import traceback  # This is kind of advanced - but I'll use it so you see how it can be used.
 
 def main():
-    # TODO: Process command-line options to allow setting the randomness of the move generator.
+    # TODO: Add options to set the randomness of the move generator (favor_split_pcnt and favor_random_pcnt).
+    parser = argparse.ArgumentParser(description="Play ChopStix against the computer.")
+    parser.add_argument('--search', type=float, metavar='SECONDS',
+                        help="Search ahead this many seconds per move")
+    parser.add_argument('--store', metavar='FILE', help="Keep the results in a statistics database (see cs_store)")
+    parser.add_argument('--name', default='Player', help="Your name (for the statistics)")
+    args = parser.parse_args()
     print("\nWelcome to the game of ChopStix.")  # The '\n' prints a new line
     print("It is an interesting math challenge between you and me.")
     print("")
     msgs.intro()
-    game:'Game' = Game()  # `:'Game'` is a 'type annotation'. These are more advanced, and not required.
+    store = StatsStore(args.store) if args.store else None
+    game:'Game' = Game(args.search, store=store, names=('ChopStix', args.name))  # `:'Game'` is a 'type annotation'. These are more advanced, and not required.
     game.play()
+    if store is not None:
+        stats = store.player_stats(args.name)
+        if stats is not None:
+            print("{}, you have won {} of {} games.".format(args.name, stats.wins, stats.games))
+        store.close()
     return  # Technically, not needed. But I like to include it to make the end clear.
 
 if __name__ == "__main__":  # This tests to see if we are being called as the 'main' program
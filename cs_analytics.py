@@ -0,0 +1,335 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_analytics.py
+
+This file contains the code to find out what happens in a large number of
+recorded games (see cs_records). It reads the games once, one at a time
+(so it can read any number of them), and counts:
+ - How often each position comes up (from the point of view of the player moving).
+   Mirrored hands are the same position, so the counts are kept for the
+   canonical states (see cs_canonical), with the moves as they would be made
+   from the canonical state.
+ - For each position and move: how many games had the move and how many the
+   player making it went on to win.
+ - The number of games, wins, draws and moves (for the average game length).
+ - How often each MoveMaster DecisionPath (see cs_instrument) was used.
+
+The counts are kept in arrays (a `Summary`), so they take the same (small)
+amount of memory for any number of games. A Summary can be saved to a file,
+and Summaries from different files (or different parts of a file, read by
+different processes) can be added together with `merge`.
+
+`move_report` uses a Summary to check the moves in the MOVES data (see
+cs_moves): it compares how often the player wins with the MOVES move to how
+often they win with the other moves.
+
+Run it from the command line:
+    python3 cs_analytics.py games.csgr --workers 4 --save summary.csan --report 20
+"""
+from cs_canonical import CLASS_COUNT, CLASS_INDEX, CLASS_OF, MOVE_TRANSFORM, TRANSFORM
+from cs_instrument import DecisionPath
+from cs_moves import MOVES
+from cs_position import MOVE_CODES, MOVE_NAMES, NEXT, STATE_COUNT, canonical, pack, state_index
+from cs_records import block_offsets, read_blocks, GAME_HEADER, END, NO_WINNER
+import cs_exceptions as cse
+
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import os
+import struct
+from typing import Iterable, NamedTuple
+
+FORMAT_VERSION = 2   # Version 1 kept the counts for every state index
+MAGIC = b'CSAN'
+HEADER = struct.Struct('<4sHHQQQQQ')    # magic, version, reserved, games, draws, a wins, b wins, moves
+PATH_SLOTS = len(DecisionPath) + 1      # Slot 0 is 'not known', then each DecisionPath + 1
+START = pack(1, 1, 1, 1)
+# The count slot (class number * 5 + the move from the canonical state) for each state index * 5 + Move code
+SLOTS:tuple[int,...] = tuple(CLASS_OF[index] * 5 + MOVE_TRANSFORM[TRANSFORM[index] * 5 + move]
+                             for index in range(STATE_COUNT) for move in range(5))
+
+class Summary:
+    """
+    The counts for a number of games.
+    """
+
+    def __init__(self) -> None:
+        self.games:int = 0
+        self.draws:int = 0
+        self.wins:list[int] = [0, 0]                            # Wins for player 'a' and 'b'
+        self.moves:int = 0
+        self.visits = array('Q', bytes(8 * CLASS_COUNT))        # Indexed by class number (see cs_canonical)
+        self.move_games = array('Q', bytes(8 * CLASS_COUNT * 5))  # Indexed by SLOTS
+        self.move_wins = array('Q', bytes(8 * CLASS_COUNT * 5))
+        self.paths = array('Q', bytes(8 * PATH_SLOTS))
+        return
+
+    @property
+    def average_length(self) -> float:
+        """
+        The average number of moves in a game.
+        """
+        return self.moves / self.games if self.games else 0.0
+
+    def path_count(self, path:'DecisionPath|None') -> int:
+        """
+        The number of moves that were picked by a DecisionPath (None for moves where it isn't known).
+        """
+        return self.paths[0 if path is None else path + 1]
+
+    def win_rate(self, index:int, move:int) -> float|None:
+        """
+        How often the player making a move (Move code) from a state went on to win
+        (None if the move wasn't made). The mirrored moves are counted together.
+        """
+        slot = SLOTS[index * 5 + move]
+        games = self.move_games[slot]
+        return self.move_wins[slot] / games if games else None
+
+    def state_visits(self, index:int) -> int:
+        """
+        How often a state came up (with the mirrored states).
+        """
+        return self.visits[CLASS_OF[index]]
+
+    def add_payload(self, payload:bytes) -> None:
+        """
+        Add the games in a block (see cs_records.read_blocks). This is the
+        'hot' loop, so everything used is in a local variable.
+        """
+        visits = self.visits
+        move_games = self.move_games
+        move_wins = self.move_wins
+        paths = self.paths
+        nxt = NEXT
+        slot_of = SLOTS
+        class_of = CLASS_OF
+        header_size = GAME_HEADER.size
+        unpack_from = GAME_HEADER.unpack_from
+        pos = 0
+        end = len(payload)
+        slots:list[int] = []
+        while pos < end:
+            _, _, _, _, _, first, winner, count = unpack_from(payload, pos)
+            pos += header_size
+            position = START
+            slots.clear()
+            for value in payload[pos:pos + count]:
+                move = value & 7
+                paths[value >> 3] += 1
+                visits[class_of[position >> 1]] += 1
+                slot = slot_of[(position >> 1) * 5 + move]
+                move_games[slot] += 1
+                slots.append(slot if (position & 1) ^ first == winner else -1)  # -1: the player didn't win
+                position = nxt[position * 5 + move]
+            pos += count
+            if payload[pos] != END:
+                raise cse.RecordError("A game in a block doesn't have the right number of moves.")
+            pos += 1
+            for slot in slots:
+                if slot >= 0:
+                    move_wins[slot] += 1
+            self.games += 1
+            self.moves += count
+            if winner == NO_WINNER:
+                self.draws += 1
+            else:
+                self.wins[winner] += 1
+        return
+
+    def merge(self, other:'Summary') -> 'Summary':
+        """
+        Add the counts from another Summary to this one.
+        """
+        self.games += other.games
+        self.draws += other.draws
+        self.moves += other.moves
+        for i in (0, 1):
+            self.wins[i] += other.wins[i]
+        for mine, theirs in ((self.visits, other.visits), (self.move_games, other.move_games),
+                             (self.move_wins, other.move_wins), (self.paths, other.paths)):
+            for i, value in enumerate(theirs):
+                if value:
+                    mine[i] += value
+        return self
+
+    def save(self, path:str) -> None:
+        """
+        Save the Summary to a file.
+        """
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, self.games, self.draws, self.wins[0], self.wins[1], self.moves))
+            for values in (self.visits, self.move_games, self.move_wins, self.paths):
+                values.tofile(f)
+        return
+
+    @staticmethod
+    def load(path:str) -> 'Summary':
+        """
+        Load a Summary saved with `save`.
+        """
+        summary = Summary()
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise cse.RecordError("The file is too short to be a summary.")
+            magic, version, _, games, draws, a_wins, b_wins, moves = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise cse.RecordError("The file isn't a version {} summary.".format(FORMAT_VERSION))
+            summary.games, summary.draws, summary.wins, summary.moves = games, draws, [a_wins, b_wins], moves
+            try:
+                for values in (summary.visits, summary.move_games, summary.move_wins, summary.paths):
+                    length = len(values)
+                    del values[:]
+                    values.fromfile(f, length)
+            except EOFError:
+                raise cse.RecordError("The summary file is too short.")
+        return summary
+
+def summarize(path:str, start:int|None=None, blocks:int|None=None) -> 'Summary':
+    """
+    Count the games in a record file (or some of its blocks, see cs_records.read_blocks).
+    """
+    summary = Summary()
+    for payload in read_blocks(path, start, blocks):
+        summary.add_payload(payload)
+    return summary
+
+def _summarize_shard(shard:tuple[str,int,int]) -> 'Summary':
+    return summarize(*shard)
+
+def shards(paths:Iterable[str], blocks_per_shard:int=64) -> list[tuple[str,int,int]]:
+    """
+    Split record files into (path, offset, blocks) shards that can be read in parallel.
+    """
+    result:list[tuple[str,int,int]] = []
+    for path in paths:
+        offsets = [offset for offset, _ in block_offsets(path)]
+        for i in range(0, len(offsets), blocks_per_shard):
+            result.append((path, offsets[i], min(blocks_per_shard, len(offsets) - i)))
+    return result
+
+def summarize_files(paths:Iterable[str], workers:int=1, blocks_per_shard:int=64) -> 'Summary':
+    """
+    Count the games in a number of record files, with the work split between worker processes.
+    """
+    work = shards(paths, blocks_per_shard)
+    summary = Summary()
+    if workers <= 1:
+        for shard in work:
+            summary.merge(_summarize_shard(shard))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for part in executor.map(_summarize_shard, work):
+                summary.merge(part)
+    return summary
+
+class MoveCheck(NamedTuple):
+    """
+    How a move from the MOVES data did, compared with the best other move.
+
+    from_fingers, to_fingers: The hands (as in the MOVES data).
+    move: The MOVES move.
+    games, win_rate: The games with the move, and how often the player making it won.
+    best_other: The other move with the best win rate (None if no other move was made enough).
+    other_games, other_win_rate: The games and win rate of the best other move.
+    """
+    from_fingers: tuple[int,int]
+    to_fingers: tuple[int,int]
+    move: str
+    games: int
+    win_rate: float|None
+    best_other: str|None
+    other_games: int
+    other_win_rate: float|None
+
+def move_report(summary:'Summary', min_games:int=100, margin:float=0.02) -> list['MoveCheck']:
+    """
+    Check each move in the MOVES data against the other moves from the same hands.
+
+    The counts are for the canonical states, so the mirrored hands (left and right
+    swapped) are already together. Two moves from a canonical state are also 'the
+    same' if they lead to the same canonical position (see cs_position.canonical).
+
+    Parameters:
+        min_games: The games a move needs to be compared.
+        margin: How much better another move's win rate must be for the MOVES move to be reported.
+
+    Return: The MOVES moves that did worse than another move, worst first.
+    """
+    # Add up the counts by (canonical state, canonical next state)
+    games:dict[tuple[int,int],int] = {}
+    wins:dict[tuple[int,int],int] = {}
+    for number, index in enumerate(CLASS_INDEX):
+        position = index << 1
+        for move in range(5):
+            count = summary.move_games[number * 5 + move]
+            if count:
+                key = (index, canonical(NEXT[position * 5 + move]) >> 1)
+                games[key] = games.get(key, 0) + count
+                wins[key] = wins.get(key, 0) + summary.move_wins[number * 5 + move]
+    checks:list[MoveCheck] = []
+    for to_fingers, entries in MOVES:
+        for from_fingers, move_name in entries:
+            index = state_index(from_fingers[0], from_fingers[1], to_fingers[0], to_fingers[1])
+            position = index << 1
+            key_state = canonical(position) >> 1
+            key = (key_state, canonical(NEXT[position * 5 + MOVE_CODES[move_name]]) >> 1)
+            table_games = games.get(key, 0)
+            if table_games < min_games:
+                continue
+            table_rate = wins[key] / table_games
+            best:tuple[str,int,float]|None = None
+            seen = {key}
+            for move in range(5):
+                nxt = NEXT[position * 5 + move]
+                if nxt < 0:
+                    continue
+                other = (key_state, canonical(nxt) >> 1)
+                if other in seen or games.get(other, 0) < min_games:
+                    continue
+                seen.add(other)
+                rate = wins[other] / games[other]
+                if best is None or rate > best[2]:
+                    best = (MOVE_NAMES[move], games[other], rate)
+            if best is not None and best[2] > table_rate + margin:
+                checks.append(MoveCheck(from_fingers, to_fingers, move_name, table_games, table_rate,
+                                        best[0], best[1], best[2]))
+    checks.sort(key=lambda c: (c.other_win_rate or 0) - (c.win_rate or 0), reverse=True)
+    return checks
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Count what happens in recorded ChopStix games.")
+    parser.add_argument('files', nargs='*', help="Game record files (see cs_records)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--load', action='append', default=[], metavar='FILE', help="Add a saved summary")
+    parser.add_argument('--save', metavar='FILE', help="Save the summary")
+    parser.add_argument('--report', type=int, default=10, metavar='N', help="Show the N worst MOVES moves")
+    parser.add_argument('--min-games', type=int, default=100)
+    args = parser.parse_args()
+    summary = summarize_files(args.files, args.workers) if args.files else Summary()
+    for path in args.load:
+        summary.merge(Summary.load(path))
+    if args.save:
+        summary.save(args.save)
+    print("Games: {:,}  Wins: a {:,} b {:,}  Draws: {:,}  Average length: {:.1f}".format(
+        summary.games, summary.wins[0], summary.wins[1], summary.draws, summary.average_length))
+    total = sum(summary.paths) or 1
+    for path in [None] + list(DecisionPath):
+        count = summary.path_count(path)
+        print("  {:<13} {:>14,} {:>6.1%}".format("(not known)" if path is None else path.name, count, count / total))
+    checks = move_report(summary, args.min_games)
+    if checks:
+        print("\nMOVES moves that did worse than another move:")
+        for c in checks[:args.report]:
+            print("  from {} to {}: {} won {:.1%} of {:,}, {} won {:.1%} of {:,}".format(
+                c.from_fingers, c.to_fingers, c.move, c.win_rate, c.games, c.best_other, c.other_win_rate, c.other_games))
+    return
+
+if __name__ == "__main__":
+    main()
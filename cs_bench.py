@@ -0,0 +1,209 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_bench.py
+
+This file contains benchmarks for the parts of the app that the computer
+uses the most when it plays (the 'hot path'). Each benchmark uses a fixed
+seed, is run a few times to 'warm up', and is then timed several times.
+
+Run it from the command line:
+    python3 cs_bench.py                          Print the results
+    python3 cs_bench.py --json baseline.json     Also save the results (JSON)
+    python3 cs_bench.py --compare baseline.json  Compare with saved results
+
+When comparing, a benchmark that is slower than the baseline by more than the
+threshold (default 10%) is flagged as a regression, and the exit status is 1.
+"""
+from cs_game import Game
+from cs_hands import Hands
+from cs_move_gen import WINNING_MOVES, MoveMaster
+from cs_position import state_index
+from cs_selfplay import SelfPlay, master_pair
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+FORMAT_VERSION = 1
+SEED = 20250101
+SAMPLE_SIZE = 64   # Number of different positions each benchmark cycles through
+
+def _hands(left:int, right:int) -> 'Hands':
+    hands = Hands()
+    hands.left._fingers = left    # Benchmarks need positions that don't come up at the start of a game
+    hands.right._fingers = right
+    return hands
+
+def _sample_hands(rng:'random.Random') -> list[tuple['Hands','Hands']]:
+    """
+    A fixed set of (from, to) hands where neither side has been tapped out.
+    """
+    sample:list[tuple[Hands,Hands]] = []
+    while len(sample) < SAMPLE_SIZE:
+        f = (rng.randint(0, 4), rng.randint(0, 4))
+        t = (rng.randint(0, 4), rng.randint(0, 4))
+        if f != (0, 0) and t != (0, 0):
+            sample.append((_hands(*f), _hands(*t)))
+    return sample
+
+#
+# Each benchmark 'setup' function returns a function that does 'n' operations.
+#
+
+def bench_get_move() -> Callable[[int], None]:
+    rng = random.Random(SEED)
+    sample = _sample_hands(rng)
+    master = MoveMaster(rng=random.Random(SEED))
+    def run(n:int) -> None:
+        get_move = master.get_move
+        for i in range(n):
+            f, t = sample[i % SAMPLE_SIZE]
+            get_move(f, t)
+        return
+    return run
+
+def bench_game_move() -> Callable[[int], None]:
+    game = Game()
+    us = _hands(1, 1)
+    them = _hands(1, 1)
+    def run(n:int) -> None:
+        move = game.move
+        for _ in range(n):
+            move(us, them, "LL")   # Always allowed (our left hand keeps its one finger)
+        return
+    return run
+
+def bench_can_split() -> Callable[[int], None]:
+    sample = [f for f, _ in _sample_hands(random.Random(SEED))]
+    def run(n:int) -> None:
+        for i in range(n):
+            sample[i % SAMPLE_SIZE].can_split()
+        return
+    return run
+
+def bench_winning_move() -> Callable[[int], None]:
+    # The winning move is worked out for every state when cs_move_gen is loaded. What
+    # runs for each move is the lookup (the same as in MoveMaster.get_move).
+    sample = _sample_hands(random.Random(SEED))
+    def run(n:int) -> None:
+        winning = WINNING_MOVES
+        for i in range(n):
+            f, t = sample[i % SAMPLE_SIZE]
+            winning[state_index(f.left.fingers, f.right.fingers, t.left.fingers, t.right.fingers)]
+        return
+    return run
+
+def bench_headless_game() -> Callable[[int], None]:
+    a, b = master_pair(SEED)
+    engine = SelfPlay(a, b)
+    def run(n:int) -> None:
+        engine.tally(n)
+        return
+    return run
+
+# name: (setup, operations per sample, description)
+BENCHMARKS:dict[str,tuple[Callable[[], Callable[[int], None]],int,str]] = {
+    'move_master.get_move': (bench_get_move, 20000, "MoveMaster.get_move per call"),
+    'game.move': (bench_game_move, 20000, "Game.move per call"),
+    'hands.can_split': (bench_can_split, 50000, "Hands.can_split per call"),
+    'move_gen.winning_move': (bench_winning_move, 50000, "The WINNING_MOVES lookup (from Hands) per call"),
+    'selfplay.game': (bench_headless_game, 2000, "A full headless MoveMaster game"),
+}
+
+def run_benchmark(name:str, repeat:int=7, warmup:int=2, scale:float=1.0) -> dict[str,Any]:
+    """
+    Time a benchmark.
+
+    Return: A dict with the time per operation (best and median of the samples) in nanoseconds.
+    """
+    setup, number, description = BENCHMARKS[name]
+    number = max(1, int(number * scale))
+    random.seed(SEED)   # For anything that uses the 'random' module directly
+    run = setup()
+    for _ in range(warmup):
+        run(number)
+    samples:list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        run(number)
+        samples.append((time.perf_counter_ns() - start) / number)
+    best = min(samples)
+    return {
+        'description': description,
+        'ns_per_op': best,
+        'median_ns_per_op': statistics.median(samples),
+        'ops_per_sec': 1e9 / best,
+        'samples': samples,
+    }
+
+def run_all(names:list[str]|None=None, repeat:int=7, warmup:int=2, scale:float=1.0) -> dict[str,Any]:
+    """
+    Run the benchmarks and return the results as a JSON-able dict.
+    """
+    results = {name: run_benchmark(name, repeat, warmup, scale) for name in (names or list(BENCHMARKS))}
+    return {
+        'format': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'seed': SEED,
+        'results': results,
+    }
+
+def compare(current:dict[str,Any], baseline:dict[str,Any], threshold:float) -> list[tuple[str,float,bool]]:
+    """
+    Compare results with a baseline.
+
+    Return: (name, ratio, regressed) for each benchmark in both. The ratio is
+        current time / baseline time, so above 1.0 is slower.
+    """
+    rows:list[tuple[str,float,bool]] = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['ns_per_op'] / base['ns_per_op']
+        rows.append((name, ratio, ratio > 1.0 + threshold))
+    return rows
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ChopStix hot path.")
+    parser.add_argument('--json', metavar='FILE', help="Save the results to a JSON file")
+    parser.add_argument('--compare', metavar='FILE', help="Compare with the results in a JSON file")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Slowdown that is a regression (0.10 = 10%%)")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--quick', action='store_true', help="Run fewer operations per sample")
+    parser.add_argument('names', nargs='*', help="Benchmarks to run (default: all)")
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error("Unknown benchmark '{}'. Choose from: {}".format(name, ", ".join(BENCHMARKS)))
+    current = run_all(args.names, args.repeat, args.warmup, 0.1 if args.quick else 1.0)
+    for name, result in current['results'].items():
+        print("{:<24} {:>12.1f} ns/op {:>14,.0f} ops/s".format(name, result['ns_per_op'], result['ops_per_sec']))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(current, f, indent=2)
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("")
+        for name, ratio, regressed in compare(current, baseline, args.threshold):
+            print("{:<24} {:>7.2f}x {}".format(name, ratio, "REGRESSION" if regressed else "ok"))
+            if regressed:
+                status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
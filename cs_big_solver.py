@@ -0,0 +1,333 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_big_solver.py
+
+This file contains a solver for large ChopStix variants (see cs_rules), where
+the number of positions is in the millions or hundreds of millions. It finds
+the same results as cs_solver.solve, but it doesn't keep any Python objects
+for a position. Everything is in packed NumPy arrays:
+
+    result     2 bytes per position   0 = unknown (a DRAW at the end), otherwise
+                                      1 + (distance * 2) + (1 if WIN else 0)
+    remaining  1 (or 2) bytes         Moves not yet known to go to a WIN for the other player
+    frontier   4 bitsets (1 bit)      The WINs and LOSSes found in the last
+                                      generation, and the ones being found now
+
+The solve runs in 'generations'. Generation 0 labels the finished games.
+Generation 'g' looks at every unknown position, works out its moves with array
+arithmetic, and checks them against the frontier bitsets of generation g-1:
+ - A move to a LOSS in the frontier makes it a WIN at distance g.
+ - Each move to a WIN in the frontier counts down 'remaining'. At zero, every
+   move lets the other player win, so it is a LOSS at distance g.
+This stops when a generation doesn't find anything new. Whatever is still
+unknown is a DRAW.
+
+The positions are processed in chunks. With more than one worker, the arrays
+are put in shared memory and the chunks are spread across worker processes.
+Each chunk's bits are in their own bytes, so workers never write to the same byte.
+
+NumPy is required for this solver. For small variants, cs_solver.solve doesn't need it.
+
+Run it from the command line:
+    python3 cs_big_solver.py --modulus 7 --hands 3 --workers 4
+"""
+from cs_rules import Rules, SplitRule
+from cs_solver import MAX_DISTANCE
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+import os
+import time
+from typing import Any, Callable, Iterator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional for the app, but this solver needs it
+    np = None
+
+try:
+    import resource  # For the peak memory (not on Windows)
+except ImportError:
+    resource = None
+
+CHUNK_SIZE = 1 << 20   # Positions in a chunk (must be a multiple of 8)
+
+ProgressCallback = Callable[[int, int, int, int, float], None]
+
+class BigSolveResult:
+    """
+    The results of a solve.
+
+    result: The encoded result of each position (a NumPy uint16 array, see the file notes).
+    wins, losses, draws: The number of each.
+    generations: The number of generations (the longest distance to the end + 1).
+    seconds: The time taken.
+    peak_memory: The peak memory used (bytes) by this process and the workers,
+        or 0 if it isn't known.
+    """
+
+    def __init__(self, rules:'Rules', result:Any, generations:int, seconds:float, peak_memory:int) -> None:
+        self.rules = rules
+        self.result = result
+        self.generations = generations
+        self.seconds = seconds
+        self.peak_memory = peak_memory
+        labeled = result != 0
+        self.wins = int(np.count_nonzero(labeled & (((result - 1) & 1) == 1)))  # type: ignore
+        self.losses = int(np.count_nonzero(labeled)) - self.wins  # type: ignore
+        self.draws = len(result) - self.wins - self.losses
+        return
+
+    def to_bytes(self) -> bytes:
+        """
+        The results as one byte per position (the cs_solver/cs_tablebase format).
+
+        Raises ValueError if a distance is too large to fit in a byte.
+        """
+        if self.generations - 1 > MAX_DISTANCE:
+            raise ValueError("The longest distance ({}) is too large for one byte.".format(self.generations - 1))
+        return self.result.astype(np.uint8).tobytes()
+
+    def __repr__(self) -> str:
+        return "BigSolveResult({}, wins={}, losses={}, draws={}, generations={}, seconds={:.2f})".format(
+            self.rules, self.wins, self.losses, self.draws, self.generations, self.seconds)
+
+def successor_columns(rules:'Rules', index:Any) -> Iterator[tuple[Any,Any]]:
+    """
+    Work out the moves of an array of positions, one move at a time.
+
+    Produces: (valid, successor) array pairs. 'valid' is True where the move is
+        allowed. The successor is from the other player's point of view.
+    """
+    h = rules.hands
+    m = rules.modulus
+    places = rules.places
+    digits = [(index // p) % m for p in places]
+    mover = digits[:h]
+    other = digits[h:]
+    # The successor index is the other player's hands (now the mover) then our hands
+    other_as_mover = sum(other[j] * places[j] for j in range(h))
+    mover_as_other = sum(mover[j] * places[h + j] for j in range(h))
+    total = sum(mover)
+    if rules.split == SplitRule.EVEN:
+        nonempty = sum((mover[j] != 0).astype(np.int8) for j in range(h))
+        valid = (nonempty == 1) & (total % h == 0) & (h > 1)
+        yield (valid, other_as_mover + (total // h) * sum(places[h:]))
+    else:
+        # Each possible arrangement is a move, if it has the same total and
+        # isn't just a swap of the hands. Compare the sorted hands as a number.
+        stacked = np.sort(np.stack(mover, axis=1), axis=1)
+        signature = sum(stacked[:, j].astype(np.int64) * (m ** j) for j in range(h))
+        for arrangement in product(range(m), repeat=h):
+            arr_signature = sum(f * (m ** j) for j, f in enumerate(sorted(arrangement)))
+            valid = (total == sum(arrangement)) & (signature != arr_signature)
+            yield (valid, other_as_mover + sum(f * places[h + j] for j, f in enumerate(arrangement)))
+    tap = np.array(rules.tap_table, dtype=np.int64)
+    for f in range(h):
+        for t in range(h):
+            valid = mover[f] != 0
+            if not rules.tap_empty:
+                valid = valid & (other[t] != 0)
+            tapped = tap[other[t], mover[f]]
+            yield (valid, other_as_mover + (tapped - other[t]) * places[t] + mover_as_other)
+    return
+
+def _bits(bitset:Any, index:Any) -> Any:
+    """
+    The bits for an array of indexes (True where the bit is set).
+    """
+    return ((bitset[index >> 3] >> (index & 7).astype(np.uint8)) & 1).astype(bool)
+
+def _set_bits(bitset:Any, index:Any) -> None:
+    """
+    Set the bits for an array of indexes.
+    """
+    np.bitwise_or.at(bitset, index >> 3, (1 << (index & 7)).astype(np.uint8))
+    return
+
+def _process_chunk(rules:'Rules', arrays:dict[str,Any], start:int, end:int, generation:int, parity:int) -> tuple[int,int]:
+    """
+    Process one chunk of positions for a generation.
+
+    arrays: 'result', 'remaining', and the bitsets 'loss0', 'win0', 'loss1', 'win1'.
+        The generation reads the frontier of 'parity' and writes to the other one.
+
+    Return: (new wins, new losses)
+    """
+    result = arrays['result']
+    remaining = arrays['remaining']
+    if generation == 0:
+        index = np.arange(start, end, dtype=np.int64)
+        lost_limit = rules.places[rules.hands - 1]  # All of the mover's hands are empty below this
+        lost = index < lost_limit
+        won = ~lost & (index % lost_limit == 0)
+        result[start:end][lost] = 1                 # LOSS at distance 0
+        result[start:end][won] = 2                  # WIN at distance 0
+        out_loss, out_win = arrays['loss0'], arrays['win0']
+        _set_bits(out_loss, index[lost])
+        _set_bits(out_win, index[won])
+        count = np.zeros(end - start, dtype=np.int64)
+        for valid, _ in successor_columns(rules, index):
+            count += valid
+        remaining[start:end] = np.where(lost | won, 0, count)
+        return (int(np.count_nonzero(won)), int(np.count_nonzero(lost)))
+    chunk = result[start:end]
+    unknown = np.nonzero(chunk == 0)[0]
+    if unknown.size == 0:
+        return (0, 0)
+    index = unknown.astype(np.int64) + start
+    in_loss, in_win = arrays['loss{}'.format(parity)], arrays['win{}'.format(parity)]
+    out_loss, out_win = arrays['loss{}'.format(parity ^ 1)], arrays['win{}'.format(parity ^ 1)]
+    loss_hit = np.zeros(index.size, dtype=bool)
+    win_count = np.zeros(index.size, dtype=np.int64)
+    for valid, succ in successor_columns(rules, index):
+        succ = np.where(valid, succ, 0)
+        loss_hit |= valid & _bits(in_loss, succ)
+        win_count += valid & _bits(in_win, succ)
+    left = remaining[index].astype(np.int64) - win_count
+    remaining[index] = np.maximum(left, 0)
+    new_win = loss_hit
+    new_loss = ~loss_hit & (left <= 0)
+    result[index[new_win]] = 1 + (generation << 1) + 1
+    result[index[new_loss]] = 1 + (generation << 1)
+    _set_bits(out_win, index[new_win])
+    _set_bits(out_loss, index[new_loss])
+    return (int(np.count_nonzero(new_win)), int(np.count_nonzero(new_loss)))
+
+#
+# Worker process support. The arrays are in shared memory, and each worker
+# attaches to them once (in the 'initializer').
+#
+
+_worker:dict[str,Any] = {}
+
+def _array_specs(rules:'Rules') -> dict[str,tuple[Any,int]]:
+    """
+    The (dtype, length) of each array.
+    """
+    count = rules.state_count
+    max_moves = rules.hands * rules.hands + (1 if rules.split == SplitRule.EVEN else rules.modulus ** rules.hands)
+    bitset_bytes = (count + 7) // 8
+    return {
+        'result': (np.uint16, count),
+        'remaining': (np.uint8 if max_moves < 256 else np.uint16, count),
+        'loss0': (np.uint8, bitset_bytes),
+        'win0': (np.uint8, bitset_bytes),
+        'loss1': (np.uint8, bitset_bytes),
+        'win1': (np.uint8, bitset_bytes),
+    }
+
+def _attach(rules:'Rules', names:dict[str,str]) -> None:
+    _worker['rules'] = rules
+    _worker['shm'] = [shared_memory.SharedMemory(name=n) for n in names.values()]
+    _worker['arrays'] = {key: np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+                         for (key, (dtype, length)), shm in zip(_array_specs(rules).items(), _worker['shm'])}
+    return
+
+def _worker_chunk(task:tuple[int,int,int,int]) -> tuple[int,int]:
+    start, end, generation, parity = task
+    return _process_chunk(_worker['rules'], _worker['arrays'], start, end, generation, parity)
+
+def _peak_memory() -> int:
+    """
+    Peak memory (bytes) of this process plus its largest worker, or 0 if it isn't known.
+    """
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return usage * 1024  # Linux reports kilobytes
+
+def solve(rules:'Rules', workers:int=1, chunk_size:int=CHUNK_SIZE,
+          progress:'ProgressCallback|None'=None) -> 'BigSolveResult':
+    """
+    Solve every position of a variant.
+
+    Parameters:
+        rules: The variant.
+        workers: The number of worker processes. With 1, everything is done in this process.
+        chunk_size: Positions in a chunk (rounded up to a multiple of 8).
+        progress: Called after each generation with
+            (generation, new wins, new losses, positions solved so far, seconds so far).
+    """
+    if np is None:
+        raise ImportError("cs_big_solver needs NumPy. For small variants, use cs_solver.solve.")
+    chunk_size = (chunk_size + 7) // 8 * 8
+    count = rules.state_count
+    chunks = [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    specs = _array_specs(rules)
+    started = time.perf_counter()
+    shms:list[shared_memory.SharedMemory] = []
+    executor:'ProcessPoolExecutor|None' = None
+    try:
+        if workers <= 1:
+            arrays = {key: np.zeros(length, dtype=dtype) for key, (dtype, length) in specs.items()}
+            run = lambda tasks: [_process_chunk(rules, arrays, *task) for task in tasks]
+        else:
+            for _, (dtype, length) in specs.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(1, length * np.dtype(dtype).itemsize))
+                shms.append(shm)
+            arrays = {key: np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+                      for (key, (dtype, length)), shm in zip(specs.items(), shms)}
+            for array in arrays.values():
+                array[:] = 0
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                           initargs=(rules, {key: shm.name for key, shm in zip(specs, shms)}))
+            run = lambda tasks: list(executor.map(_worker_chunk, tasks))  # type: ignore (executor is set)
+        solved = 0
+        generation = 0
+        parity = 0
+        while True:
+            if generation > 0:
+                # Clear the bitsets this generation writes to
+                arrays['loss{}'.format(parity ^ 1)][:] = 0
+                arrays['win{}'.format(parity ^ 1)][:] = 0
+            counts = run([(start, end, generation, parity) for start, end in chunks])
+            new_wins = sum(c[0] for c in counts)
+            new_losses = sum(c[1] for c in counts)
+            solved += new_wins + new_losses
+            if progress is not None:
+                progress(generation, new_wins, new_losses, solved, time.perf_counter() - started)
+            if generation > 0:
+                parity ^= 1
+            generation += 1
+            if new_wins + new_losses == 0:
+                break
+        result = np.array(arrays['result'])  # A copy, so the shared memory can be released
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+    return BigSolveResult(rules, result, generation - 1, time.perf_counter() - started, _peak_memory())
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Solve a (large) ChopStix variant.")
+    parser.add_argument('--modulus', type=int, default=5)
+    parser.add_argument('--hands', type=int, default=2)
+    parser.add_argument('--cutoff', action='store_true', help="A hand that reaches the modulus is out")
+    parser.add_argument('--split', choices=['even', 'flexible'], default='even')
+    parser.add_argument('--no-tap-empty', action='store_true', help="Empty hands can't be tapped")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    rules = Rules(args.modulus, args.hands, args.cutoff, SplitRule[args.split.upper()], not args.no_tap_empty)
+    print("Solving {} ({:,} positions) with {} worker(s)".format(rules, rules.state_count, args.workers))
+    def show(generation:int, wins:int, losses:int, solved:int, seconds:float) -> None:
+        print("  generation {:>4}: {:>12,} wins {:>12,} losses  ({:,} solved, {:.1f}s)".format(
+            generation, wins, losses, solved, seconds))
+        return
+    result = solve(rules, args.workers, args.chunk, show)
+    print(result)
+    if result.peak_memory:
+        print("Peak memory: {:,.1f} MB".format(result.peak_memory / (1 << 20)))
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_canonical.py
+
+This file contains the one place that deals with 'mirrored' hands.
+
+Swapping a player's left and right hands doesn't change the game. So the
+625 states (see cs_position.state_index) are really only 225 different
+states - a 'class' of up to 4 mirrored states. Each class has one
+'canonical' state: the one with each pair of hands in the order (larger,
+smaller), the same order used in the MOVES data.
+
+Any state can be turned into its canonical state with a 'transform' (two bits):
+    SWAP_FROM   The hands of the player moving were swapped.
+    SWAP_TO     The hands of the other player were swapped.
+A move that is picked for the canonical state is turned back into the move
+for the real hands with the same transform (`transform_move`) - swapping the
+hands twice puts them back, so the transform undoes itself.
+
+With this, a table of anything about a state (moves, outcomes, counts...) can
+be kept for the 225 classes rather than the 625 states:
+
+    value = class_table[CLASS_OF[index]]                                # Anything that doesn't change when mirrored
+    move  = transform_move(class_moves[CLASS_OF[index]], TRANSFORM[index])  # A move
+
+`shrink` and `expand` turn a full table into a class table and back.
+"""
+from cs_position import FINGERS, MOVE_CODES, MOVE_NAMES, STATE_COUNT, state_index
+
+from typing import Sequence, TypeVar
+
+T = TypeVar('T')
+
+NO_SWAP = 0
+SWAP_FROM = 1
+SWAP_TO = 2
+
+def canonical_hands(from_fingers:tuple[int,int], to_fingers:tuple[int,int]) -> tuple[tuple[int,int],tuple[int,int],int]:
+    """
+    The canonical form of a (from, to) pair of hands.
+
+    Return: (canonical from fingers, canonical to fingers, transform)
+    """
+    transform = NO_SWAP
+    if from_fingers[0] < from_fingers[1]:
+        from_fingers = (from_fingers[1], from_fingers[0])
+        transform |= SWAP_FROM
+    if to_fingers[0] < to_fingers[1]:
+        to_fingers = (to_fingers[1], to_fingers[0])
+        transform |= SWAP_TO
+    return (from_fingers, to_fingers, transform)
+
+def _transform_name(name:str, transform:int) -> str:
+    if name == 'S':
+        return name     # A split is the same for either hand
+    from_hand, to_hand = name[0], name[1]
+    if transform & SWAP_FROM:
+        from_hand = 'R' if from_hand == 'L' else 'L'
+    if transform & SWAP_TO:
+        to_hand = 'R' if to_hand == 'L' else 'L'
+    return from_hand + to_hand
+
+# The move (Move code) after a transform. Index with: transform * 5 + move
+MOVE_TRANSFORM:tuple[int,...] = tuple(
+    MOVE_CODES[_transform_name(MOVE_NAMES[move], transform)] for transform in range(4) for move in range(5))
+
+def transform_move(move:int, transform:int) -> int:
+    """
+    Turn a move (Move code) for the canonical state into the move for the real
+    hands (or the other way - the transform undoes itself).
+    """
+    return MOVE_TRANSFORM[transform * 5 + move]
+
+def transform_name(name:str, transform:int) -> str:
+    """
+    `transform_move` for a move command string (S, LL, LR, RL, RR).
+    """
+    return _transform_name(name, transform)
+
+def _build() -> tuple[tuple[int,...],tuple[int,...],tuple[int,...],tuple[int,...]]:
+    canonical:list[int] = []
+    transforms:list[int] = []
+    for fl, fr, tl, tr in FINGERS:
+        (cfl, cfr), (ctl, ctr), transform = canonical_hands((fl, fr), (tl, tr))
+        canonical.append(state_index(cfl, cfr, ctl, ctr))
+        transforms.append(transform)
+    class_index = tuple(sorted(set(canonical)))
+    number = {index: n for n, index in enumerate(class_index)}
+    return (tuple(canonical), tuple(transforms), tuple(number[index] for index in canonical), class_index)
+
+# For each state index: its canonical state index, the transform to get there, and its class number.
+# For each class number: the canonical state index.
+CANONICAL_INDEX, TRANSFORM, CLASS_OF, CLASS_INDEX = _build()
+CLASS_COUNT = len(CLASS_INDEX)      # 225 for the standard rules
+
+def canonical_index(index:int) -> tuple[int,int]:
+    """
+    The canonical state index of a state index, and the transform to get there.
+    """
+    return (CANONICAL_INDEX[index], TRANSFORM[index])
+
+def shrink(table:Sequence[T]) -> tuple[T,...]:
+    """
+    A class table from a full table (indexed by state index). The values of the canonical states are kept.
+    """
+    if len(table) != STATE_COUNT:
+        raise ValueError("A full table has {} entries, not {}.".format(STATE_COUNT, len(table)))
+    return tuple(table[index] for index in CLASS_INDEX)
+
+def expand(class_table:Sequence[T], moves:bool=False) -> tuple[T,...]:
+    """
+    A full table (indexed by state index) from a class table.
+
+    Parameters:
+        moves: The values are moves (Move codes, or None), so they are transformed for each state.
+    """
+    if len(class_table) != CLASS_COUNT:
+        raise ValueError("A class table has {} entries, not {}.".format(CLASS_COUNT, len(class_table)))
+    if not moves:
+        return tuple(class_table[n] for n in CLASS_OF)
+    return tuple(None if class_table[n] is None else MOVE_TRANSFORM[t * 5 + class_table[n]]  # type: ignore (moves are ints)
+                 for n, t in zip(CLASS_OF, TRANSFORM))
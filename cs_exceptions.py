@@ -54,3 +54,8 @@ class SplitNotEmptyError(SplitError):
     """
     pass
 
+class RecordError(Exception):
+    """
+    Indicates that a game record file (see cs_records) is damaged or isn't the right kind of file.
+    """
+    pass
@@ -13,9 +13,16 @@ import cs_exceptions as cse  # This imports everything with an alias of 'cse'
 from cs_hands import Hands  # This specifically imports classes that we will use
 from cs_score import Score  # Specific class
 from cs_move_gen import MoveMaster  # The game play strategy
+from cs_search import SearchMaster  # The look-ahead strategy (optional)
+from cs_position import MOVE_CODES, Position  # Compact positions for fast play
+from cs_instrument import PATH_DESCRIPTIONS, DecisionPath  # To explain how our moves were picked
+from cs_records import GameRecorder  # To keep the games that are played
+from cs_hints import HintService, Suggestion, get_hint_service  # To suggest moves to them
+from cs_store import StatsStore  # To keep the results after the program stops
+from cs_io import ConsoleSource, MoveSource, OutputSink, Pacing, RealTimePacing, Strategy  # Where input comes from, output goes, and pauses
 
+from enum import IntEnum, unique
 import math  # Used for calculating the number of digits that will be displayed for stats
-import time  # Used for sleeping. No alias is specified, so use will be 'time.xxx'
 
 __version__ = '1.0.1'  # Version information for this module (this is a 'special' value in Python)
 
@@ -51,6 +58,17 @@ def display_hands(us: 'Hands', them: 'Hands'):
     print("  |  |>    <|  |  [Your Hands]")
     return
 
+def stats_lines(moves:int, rnd_moves:int, rnd_splits:int) -> list[str]:
+    """
+    The lines of statistics about the game (see `display_stats`).
+    """
+    width = int(math.log10(max(moves, 1))) + 1  # The number of digits in the moves value
+    return [
+        "        My Moves: {1:>{0}d}".format(width, moves),
+        " My Random Moves: {1:>{0}d}".format(width, rnd_moves),
+        "My Random Splits: {1:>{0}d}".format(width, rnd_splits),
+    ]
+
 def display_stats(moves:int, rnd_moves:int, rnd_splits:int) -> None:
     """
     Display (print) statistics about the game.
@@ -60,29 +78,160 @@ def display_stats(moves:int, rnd_moves:int, rnd_splits:int) -> None:
         rnd_moves: The number of times the move was random
         rnd_splits: The number of times using split was random
     """
-    width = int(math.log10(moves)) + 1  # The number of digits in the moves value
-    print("        My Moves: {1:>{0}d}".format(width, moves))
-    print(" My Random Moves: {1:>{0}d}".format(width, rnd_moves))
-    print("My Random Splits: {1:>{0}d}".format(width, rnd_splits))
+    for line in stats_lines(moves, rnd_moves, rnd_splits):
+        print(line)
     return
 
+@unique
+class GameState(IntEnum):
+    """
+    Where a Game is (see `Game.step`).
+    """
+    THEIR_TURN = 0  # Waiting for their command
+    OUR_TURN   = 1  # We are moving next
+    OVER       = 2  # Someone won
+    QUIT       = 3  # They quit (or the commands ran out)
+
+class ConsoleSink:
+    """
+    Shows the game's output on the console (see cs_io.OutputSink).
+    """
+
+    def hands(self, us:'Hands', them:'Hands') -> None:
+        print("")
+        display_hands(us, them)
+        return
+
+    def our_move(self, move:str) -> None:
+        print("\n\n>>> My move is: {}".format(move))
+        return
+
+    def invalid_command(self, command:str) -> None:
+        print("The move you entered, '{}' is not valid.".format(command))
+        print("Only use the letters 'S' or 'L' and 'R' to specify your move. Enter '?' for help.")
+        return
+
+    def not_allowed(self, reason:str) -> None:
+        print("That move isn't allowed. {}".format(reason))
+        return
+
+    def why(self, text:str) -> None:
+        print(text)
+        return
+
+    def hint(self, suggestions:list['Suggestion']) -> None:
+        print("Your moves, best first:")
+        for s in suggestions:
+            print("  {}. {:<2}  {}".format(s.rank, s.move, s.explanation))
+        return
+
+    def game_over(self, they_won:bool, moves:int) -> None:
+        # TODO: Pick from a variety of messages to say who won.
+        if they_won:
+            print("Congratulations, you won! It took {} moves".format(moves))
+        else:
+            print("I win, I win!!! Oh, sorry that you lost. It took {} moves".format(moves))
+        return
+
+    def stats(self, lines:list[str]) -> None:
+        print("")
+        for line in lines:
+            print(line)
+        return
+
 class Game:
     """
     Implements the start/play/finish flow.
+
+    The game is a 'state machine': `start_game` sets it up, and each call to
+    `step` does one thing (gets and handles one of their commands, or makes
+    our move) and returns the new GameState. `play` just steps until the game
+    is over. Where the commands come from, where the output goes, and how the
+    game pauses are all 'plugged in' (see cs_io), so the same game can be
+    played at the keyboard, by a test, or by a server.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, search_time:float|None=None, source:'MoveSource|None'=None,
+                 sink:'OutputSink|None'=None, pacing:'Pacing|None'=None, strategy:'Strategy|None'=None,
+                 recorder:'GameRecorder|None'=None, hints:'HintService|None'=None,
+                 store:'StatsStore|None'=None, names:tuple[str,str]=('ChopStix', 'Player')) -> None:
+        """
+        Parameters:
+            search_time: If given, pick our moves by searching ahead for this
+                many seconds a move (see cs_search), rather than with the MOVES data.
+            source: Where their commands come from (default: the keyboard).
+            sink: Where the output goes (default: the console).
+            pacing: How to pause (default: really pause).
+            strategy: The strategy to use for every game (for example, one that
+                is shared by many games). If not given, a new one is created for each game.
+            recorder: Keeps the moves of each game (see cs_records). We are player 'a'
+                and they are player 'b'.
+            hints: Suggests moves when they ask for a hint (default: the shared
+                service, see cs_hints.get_hint_service).
+            store: Keeps the result of each game (see cs_store).
+            names: Our name and their name (for the store).
+        """
+        self._search_time:float|None = search_time
+        self._source:'MoveSource' = source if source is not None else ConsoleSource()
+        self._sink:'OutputSink' = sink if sink is not None else ConsoleSink()
+        self._pacing:'Pacing' = pacing if pacing is not None else RealTimePacing()
+        self._shared_strategy:'Strategy|None' = strategy
+        self._strategy:'Strategy|None' = strategy
+        self._recorder:'GameRecorder|None' = recorder
+        self._hints:'HintService|None' = hints
+        self._store:'StatsStore|None' = store
+        self._names:tuple[str,str] = names
+        self._our_counts:list[int] = [0, 0, 0]  # Our (moves, random moves, random splits) this game
+        # How our last move was picked (kept here, as the strategy can be shared by other games)
+        self._last_path:'DecisionPath|None' = None
+        self._last_search:str = ''      # The search report for our last move (if searching)
         self._us:'Hands' = Hands()      # Create an instance of a hands for us
         self._them:'Hands' = Hands()    # and them
         self._score:'Score' = Score()
         self._moves_this_game:int = 0
+        self._state:'GameState' = GameState.OVER    # Until a game is started
+        self._new_turn:bool = False     # True when the hands need to be shown (a turn is starting)
         return
 
-    def move(self, from_hands:'Hands', to_hands:'Hands', move_cmd:str) -> None:
+    @property
+    def state(self) -> 'GameState':
+        return self._state
+
+    @property
+    def score(self) -> 'Score':
+        return self._score
+
+    @property
+    def moves_this_game(self) -> int:
+        return self._moves_this_game
+
+    @property
+    def names(self) -> tuple[str,str]:
+        """
+        Our name and their name (for the store).
+        """
+        return self._names
+
+    def set_their_name(self, name:str) -> None:
+        """
+        Set their name (for the store). The results of the games from now on are kept for this name.
+        """
+        self._names = (self._names[0], name)
+        return
+
+    @property
+    def strategy(self) -> 'Strategy|None':
+        """
+        The strategy picking our moves (None before the first game).
+        """
+        return self._strategy
+
+    def move(self, from_hands:'Hands', to_hands:'Hands', move_cmd:str, path:'DecisionPath|None'=None) -> None:
         """
         Process the move command and move from the 'from hands' to the 'to hands'.
 
         move_cmd: Expected to be uppercase.
+        path: How the move was picked (for the game record, if there is a recorder).
 
         Raises:
             InvalidMoveCmd error if the command isn't valid (not an S or a
@@ -91,87 +240,208 @@ class Game:
             MoveNotAllowed error if the move specified isn't appropriate for
             the hands.
         """
-        if move_cmd == 'S':
-            # See if a split is valid (only uses the 'from_hands')
-            if from_hands.can_split():
-                from_hands.split()
-            else:
-                raise cse.MoveNotAllowed("The fingers, [{},{}] don't allow for a split.".format(from_hands.left.fingers, from_hands.right.fingers))
-        elif move_cmd == "LL" or move_cmd == "LR":
-            if not from_hands.left.fingers == 0:
-                if move_cmd == "LL":
-                    to_hands.left.add_hand(from_hands.left)
-                else:
-                    to_hands.right.add_hand(from_hands.left)
-            else:
-                raise cse.MoveNotAllowed("There are no fingers on the left hand.")
-        elif move_cmd == "RL" or move_cmd == "RR":
-            if not from_hands.right.fingers == 0:
-                if move_cmd == "RL":
-                    to_hands.left.add_hand(from_hands.right)
-                else:
-                    to_hands.right.add_hand(from_hands.right)
-            else:
-                raise cse.MoveNotAllowed("There are no fingers on the right hand.")
-        else:
+        # The move is made on the compact Position (the same rules, and the same errors),
+        # then the hands are set from the Position after the move.
+        after = self.move_position(Position.from_hands(from_hands, to_hands), move_cmd)
+        to_left, to_right, from_left, from_right = after.fingers   # Now from the other player's point of view
+        from_hands.set_fingers(from_left, from_right)
+        to_hands.set_fingers(to_left, to_right)
+        if self._recorder is not None:
+            self._recorder.move(MOVE_CODES[move_cmd], path)
+        return
+
+    @staticmethod
+    def move_position(position:'Position', move_cmd:str) -> 'Position':
+        """
+        Process the move command for a compact Position, rather than Hands.
+
+        This doesn't change anything - it returns the Position after the move
+        (which is from the point of view of the other player).
+
+        move_cmd: Expected to be uppercase.
+
+        Raises:
+            The same errors as `move`.
+        """
+        move = MOVE_CODES.get(move_cmd)
+        if move is None:
             raise cse.InvalidMoveCmd(move_cmd)
+        return position.apply(move)
+
+    def valid_moves(self) -> tuple[str,...]:
+        """
+        The moves they are allowed to make now.
+        """
+        return Position.from_hands(self._them, self._us).move_names()
+
+    def _record_unfinished(self) -> None:
+        """
+        Keep a game that was stopped before anyone won (they quit, or started a new one).
+        """
+        if self._recorder is not None and self._recorder.moves > 0 and self._state in (GameState.THEIR_TURN, GameState.OUR_TURN):
+            self._recorder.finish(None)
         return
 
-    def play(self) -> None:
+    def start_game(self) -> None:
         """
-        Play the game.
+        Set up a new game.
         """
-        game_strategy:'MoveMaster' = MoveMaster()
-        playing = True
+        self._record_unfinished()
+        if self._recorder is not None:
+            self._recorder.start(1)     # They move first
+        if self._shared_strategy is None:
+            self._strategy = MoveMaster() if self._search_time is None else SearchMaster(self._search_time)
+        self._us = Hands()
+        self._them = Hands()
         self._score.start_game()
         self._moves_this_game = 0
+        self._our_counts = [0, 0, 0]
+        self._last_path = None
+        self._last_search = ''
         # TODO: Add option to let them go first or have us go first.
-        their_move = True
-        while playing:
-            print("")
-            display_hands(self._us, self._them)
+        self._state = GameState.THEIR_TURN
+        self._new_turn = True
+        return
+
+    def begin_turn(self) -> None:
+        """
+        Show the hands at the start of a turn (but not again after a command
+        that wasn't a move). `step` does this, but code that calls `submit`
+        should call it before asking for their command.
+        """
+        if self._new_turn:
+            self._sink.hands(self._us, self._them)
             self._moves_this_game += 1
-            if their_move:
-                while their_move:
-                    # Their turn...
-                    s = input("\nYour move: ")  # TODO: Include in the prompt the moves that are valid.
-                    su = s.replace(" ", "").upper()  # Remove spaces and make it uppercase so it is more regular to work with
-                    if su == 'Q':
-                        their_move = False
-                        playing = False
-                        continue  # This causes the loop to start again.
-                    # TODO: Implement 'new game'
-                    # zzz: Implement giving them 'help'
-                    # TODO: Implement a way for them to ask for a suggestion.
-                    # TODO: Implement a way to ask how the computer's move was determined (S,Table,Random)
-                    else:  # Treat it as a move
-                        try:
-                            self.move(self._them, self._us, su)
-                            their_move = False
-                            if self.they_won_check():
-                                time.sleep(LONG_PAUSE)
-                                playing = False
-                                # TODO: Implement an option to play another game
-                        except cse.InvalidMoveCmd as ex1:
-                            print("The move you entered, '{}' is not valid.".format(s))
-                            print("Only use the letters 'S' or 'L' and 'R' to specify your move. Enter '?' for help.")
-                            time.sleep(0.8)
-                        except cse.MoveNotAllowed as ex2:
-                            print("That move isn't allowed. {}".format(ex2.reason))
-                            time.sleep(0.8)
+            self._new_turn = False
+        return
+
+    def submit(self, command:str) -> 'GameState':
+        """
+        Handle one of their commands (when it is their turn). A server can
+        call this with each line it gets, rather than using a MoveSource.
+
+        Return: The new state.
+        """
+        if self._state != GameState.THEIR_TURN:
+            return self._state
+        self.begin_turn()
+        su = command.replace(" ", "").upper()  # Remove spaces and make it uppercase so it is more regular to work with
+        if su == 'Q':
+            self._record_unfinished()
+            self._state = GameState.QUIT
+        elif su == 'W':
+            # They want to know 'why' - how our last move was determined
+            if self._last_path is None:
+                self._sink.why("I haven't made a move yet.")
             else:
-                # Our turn...
-                move = game_strategy.get_move(self._us, self._them)
-                time.sleep(LONG_PAUSE)
-                print("\n\n>>> My move is: {}".format(move))
-                self.move(self._us, self._them, move)
-                their_move = True
-                if self.we_won_check():
-                    time.sleep(LONG_PAUSE)
-                    playing = False
-                    # TODO: Implement an option to play another game
-        print("")
-        display_stats(game_strategy.moves, game_strategy.random_moves, game_strategy.random_splits)
+                self._sink.why(PATH_DESCRIPTIONS[self._last_path])
+                if self._last_search:
+                    self._sink.why("(I searched {})".format(self._last_search))
+        elif su == 'N':
+            # They want a new game
+            self.start_game()
+        elif su == 'H':
+            # They want a hint - the moves they can make, best first
+            if self._hints is None:
+                self._hints = get_hint_service()
+            self._sink.hint(self._hints.suggest(self._them, self._us))
+        # zzz: Implement giving them 'help'
+        else:  # Treat it as a move
+            try:
+                self.move(self._them, self._us, su)
+                self._new_turn = True
+                if self.they_won_check():
+                    self._pacing.pause(LONG_PAUSE)
+                    self._state = GameState.OVER
+                else:
+                    self._state = GameState.OUR_TURN
+            except cse.InvalidMoveCmd as ex1:
+                self._sink.invalid_command(command)
+                self._pacing.pause(SHORT_PAUSE)
+            except cse.MoveNotAllowed as ex2:
+                self._sink.not_allowed(ex2.reason)
+                self._pacing.pause(SHORT_PAUSE)
+        return self._state
+
+    def our_move(self) -> 'GameState':
+        """
+        Make our move (when it is our turn).
+
+        Return: The new state.
+        """
+        if self._state != GameState.OUR_TURN:
+            return self._state
+        self.begin_turn()
+        strategy:'Strategy' = self._strategy  # type: ignore (set by start_game)
+        # The strategy can be shared by many games, so its counters are read around this move
+        random_moves, random_splits = strategy.random_moves, strategy.random_splits
+        move = strategy.get_move(self._us, self._them)
+        self._last_path = strategy.last_path
+        self._last_search = strategy.report() if isinstance(strategy, SearchMaster) else ''
+        counts = self._our_counts
+        counts[0] += 1
+        counts[1] += strategy.random_moves - random_moves
+        counts[2] += strategy.random_splits - random_splits
+        self._pacing.pause(LONG_PAUSE)
+        self._sink.our_move(move)
+        self.move(self._us, self._them, move, self._last_path)
+        self._new_turn = True
+        if self.we_won_check():
+            self._pacing.pause(LONG_PAUSE)
+            self._state = GameState.OVER
+        else:
+            self._state = GameState.THEIR_TURN
+        return self._state
+
+    def step(self) -> 'GameState':
+        """
+        Do the next thing: get and handle one of their commands (from the
+        MoveSource), or make our move.
+
+        Return: The new state.
+        """
+        if self._state == GameState.THEIR_TURN:
+            self.begin_turn()
+            command = self._source.command(self.valid_moves())
+            if command is None:
+                command = 'Q'   # No more commands, so that's the same as quitting
+            return self.submit(command)
+        if self._state == GameState.OUR_TURN:
+            return self.our_move()
+        return self._state
+
+    def show_stats(self) -> None:
+        """
+        Show the statistics for our moves.
+        """
+        strategy = self._strategy
+        if strategy is None:
+            return
+        lines = stats_lines(strategy.moves, strategy.random_moves, strategy.random_splits)
+        if isinstance(strategy, SearchMaster) and strategy.moves > 0:
+            lines.append("  My Search Speed: {:,.0f} positions a second".format(strategy.nodes_per_second))
+        self._sink.stats(lines)
+        return
+
+    def play(self) -> None:
+        """
+        Play the game.
+        """
+        self.start_game()
+        while self.step() in (GameState.THEIR_TURN, GameState.OUR_TURN):
+            pass
+        # TODO: Implement an option to play another game
+        self.show_stats()
+        return
+
+    def _store_result(self, winner:int) -> None:
+        """
+        Add the game to the store (if there is one). We are player 'a' and they are player 'b'.
+        """
+        if self._store is not None:
+            our_moves, random_moves, random_splits = self._our_counts
+            self._store.record_game(self._names[0], self._names[1], winner, our_moves,
+                                    self._moves_this_game - our_moves, (random_moves, random_splits))
         return
 
     def they_won_check(self) -> bool:
@@ -186,8 +456,10 @@ class Game:
         """
         if self._us.left.is_fist() and self._us.right.is_fist():
             self._score.team_b_won()
-            # TODO: Pick from a variety of messages to say they win.
-            print("Congratulations, you won! It took {} moves".format(self._moves_this_game))
+            if self._recorder is not None:
+                self._recorder.finish(1)
+            self._store_result(1)
+            self._sink.game_over(True, self._moves_this_game)
             return True  # I like to only have a single return point (at the end)
                             # but some programmers use multiple - like this.
         return False
@@ -203,7 +475,9 @@ class Game:
         rv = False  # This will be the return value (for a single return statement)
         if self._them.left.is_fist() and self._them.right.is_fist():
             self._score.team_a_won()
-            # TODO: Pick from a variety of messages to say we win.
-            print("I win, I win!!! Oh, sorry that you lost. It took {} moves".format(self._moves_this_game))
+            if self._recorder is not None:
+                self._recorder.finish(0)
+            self._store_result(0)
+            self._sink.game_over(False, self._moves_this_game)
             rv = True
         return rv
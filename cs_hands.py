@@ -9,6 +9,7 @@ cs_hands.py
 This file contains the classes to track a Hand and a pair of Hands.
 """
 import cs_exceptions as cse
+from cs_rules import STANDARD, Rules, SplitRule  # The rules (for example: adding is modulo 5)
 
 class Hand:
     """
@@ -19,9 +20,11 @@ class Hand:
     # '__init__' (notice that is has two leading and two trailing underscores)
     # is a special method for classes (there are a few). It is called automatically
     # when an instance of the class is created.
-    def __init__(self) -> None:
+    def __init__(self, rules:'Rules'=STANDARD) -> None:
         self._fingers:int = 1   # I use a leading underscore for class variables to indicate
                                 # they shouldn't be changed outside of the class.
+        self._rules:'Rules' = rules
+        self._tap_table:tuple[tuple[int,...],...] = rules.tap_table   # Keep the table, as looking it up is faster than a method call
         return
 
     @property
@@ -34,8 +37,9 @@ class Hand:
     def add_hand(self, other: 'Hand') -> int:
         """
         Adds the fingers of the passed in hand to this hand.
+        (modulo 5 for the standard rules - see cs_rules)
         """
-        self._fingers = (self.fingers + other.fingers) % 5
+        self._fingers = self._tap_table[self._fingers][other._fingers]
         return self.fingers
 
     def is_fist(self) -> bool:
@@ -49,9 +53,10 @@ class Hand:
         Splits the fingers of this hand to the other.
 
         Raises a SplitError if this hand doesn't have 2 or 4 fingers
+        (a number that can be shared equally, for other rules)
         or the other hand isn't empty.
         """
-        if not (self.fingers == 2 or self.fingers == 4):
+        if not self._rules.can_share(self.fingers):
             # below, I split a source line up using a trailing backslash
             errmsg = "no fingers" if self.fingers == 0 \
                 else "1 finger" if self.fingers == 1 \
@@ -68,9 +73,14 @@ class Hands:
     Holds two hands, left and right. Provides some operations on the pair.
     """
 
-    def __init__(self) -> None:
-        self._left:'Hand' = Hand()
-        self._right: 'Hand' = Hand()
+    def __init__(self, rules:'Rules'=STANDARD) -> None:
+        if rules.hands != 2:
+            raise ValueError("Hands holds two hands. The rules are for {}.".format(rules.hands))
+        self._rules:'Rules' = rules
+        self._even_split:bool = rules.split == SplitRule.EVEN
+        self._shareable:tuple[bool,...] = rules.share_table
+        self._left:'Hand' = Hand(rules)
+        self._right: 'Hand' = Hand(rules)
         return
 
     @property
@@ -88,10 +98,13 @@ class Hands:
         False: They cannot
         """
         can = False  # Assume we can't split
-        if self._left.is_fist() or self._right.is_fist():
+        if not self._even_split:
+            # Other split rules allow different re-arrangements, so ask the rules.
+            can = self._rules.can_split((self._left.fingers, self._right.fingers))
+        elif self._left.is_fist() or self._right.is_fist():
             # First criteria met, check that the other hand has an even number of fingers.
-            if (not self._left.is_fist() and self._left.fingers % 2 == 0) \
-                or (not self._right.is_fist() and self._right.fingers % 2 == 0):
+            if (not self._left.is_fist() and self._shareable[self._left.fingers]) \
+                or (not self._right.is_fist() and self._shareable[self._right.fingers]):
                 # I use 'ZZZ' to mark things that really MUST BE DONE for the app to work. These block a release.
                 # I use 'zzz' to mark things that SHOULD be done for it to work well. These could block a release.
                 # I use 'TODO:' to mark things that would improve it or be nice to have. These don't affect a release.
@@ -99,8 +112,29 @@ class Hands:
                 can = True
         return can
 
-    def split(self) -> None:
-        if self._left.fingers == 0:
+    def set_fingers(self, left:int, right:int) -> None:
+        """
+        Set the fingers of both hands (for example, from a `Position`).
+        """
+        self._left._fingers = left
+        self._right._fingers = right
+        return
+
+    def split(self, result:'tuple[int,int]|None'=None) -> None:
+        """
+        Split the fingers between the hands.
+
+        Parameters:
+            result: The (left,right) fingers wanted after the split. Only needed
+                for rules that allow more than one way to split.
+
+        Raises a SplitError if the split isn't allowed.
+        """
+        if result is not None:
+            if not result in self._rules.split_results((self._left.fingers, self._right.fingers)):
+                raise cse.SplitError("The fingers can't be split to {}.".format(result))
+            self._left._fingers, self._right._fingers = result
+        elif self._left.fingers == 0:
             self._right.split_to_other_hand(self._left)
         else:
             self._left.split_to_other_hand(self._right)
@@ -0,0 +1,246 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_hints.py
+
+This file contains the 'hint' service: it ranks every move a player can make,
+best first, and explains each one in a few words.
+
+The moves are ranked with the perfect-play results (see cs_solver and
+cs_tablebase):
+ - A move that lets you win, the fastest first.
+ - A move that keeps the game a draw.
+ - A move that lets the other player win, the slowest first (so they have
+   the most chances to go wrong).
+
+Working out the ranking for a position is 'evaluating' it. The evaluations
+are kept in a cache, so when many players ask for a hint for the same
+position (or one that is the same with the hands swapped) it is only worked
+out once. The cache is 'LRU' (Least Recently Used): it keeps up to
+'capacity' positions, and when it is full the one that hasn't been used for
+the longest is dropped.
+
+The cache is keyed on the canonical position (see cs_position.canonical), so
+the evaluation is kept as the canonical positions the moves lead to. The
+moves for the player's own hands are found from those (a move for one hand
+of mirrored hands is the same move for the other hand).
+
+The service counts the cache hits and misses and times the lookups (see
+`stats` and `report`).
+"""
+from cs_position import MOVE_NAMES, NEXT, Position, canonical
+from cs_solver import Outcome, Tablebase
+from cs_tablebase import get_tablebase
+
+from collections import OrderedDict
+import time
+from typing import TYPE_CHECKING, NamedTuple
+if TYPE_CHECKING:
+    from cs_hands import Hands
+
+CACHE_SIZE = 1024   # Positions kept in the cache (there are only 625 states, so this keeps them all)
+
+class Suggestion(NamedTuple):
+    """
+    One move, as ranked by `suggest`.
+
+    move: The move command (S, LL, LR, RL, RR).
+    rank: 1 for the best move. Moves that are just as good have the same rank.
+    outcome: The result for the player making the move, with perfect play.
+    distance: The moves (by both players) until the game is over, with perfect play (0 for a draw).
+    explanation: Why it is ranked where it is.
+    """
+    move: str
+    rank: int
+    outcome: 'Outcome'
+    distance: int
+    explanation: str
+
+class HintStats(NamedTuple):
+    """
+    How the hint cache is doing.
+
+    lookups: The hints asked for.
+    hits: The lookups that found the position in the cache.
+    misses: The lookups that had to evaluate the position.
+    size: The positions in the cache.
+    mean_us: The average time for a lookup (microseconds).
+    max_us: The longest time for a lookup (microseconds).
+    """
+    lookups: int
+    hits: int
+    misses: int
+    size: int
+    mean_us: float
+    max_us: float
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+def _explain(outcome:'Outcome', distance:int, split:bool) -> str:
+    """
+    A few words about a move, for the player making it.
+    """
+    if outcome == Outcome.WIN:
+        if distance == 1:
+            return "This taps out my last hand - you win!"
+        return "You can force a win in {} moves.".format(distance)
+    if outcome == Outcome.DRAW:
+        if split:
+            return "Splitting keeps the game even (neither of us can force a win)."
+        return "This keeps the game even (neither of us can force a win)."
+    if distance == 1:
+        return "This leaves me a move that wins right away."
+    return "I can force a win in {} moves, if I play perfectly.".format(distance)
+
+class HintService:
+    """
+    Ranks the moves for a position (see the top of the file).
+    """
+
+    def __init__(self, capacity:int=CACHE_SIZE, tablebase:'Tablebase|None'=None) -> None:
+        """
+        Parameters:
+            capacity: The most positions to keep in the cache.
+            tablebase: The perfect-play results (default: cs_tablebase.get_tablebase(), loaded when first needed).
+        """
+        self._capacity = capacity
+        self._tablebase = tablebase
+        # Canonical position value -> (canonical next position value, outcome, distance, rank) for each move
+        self._cache:'OrderedDict[int,tuple[tuple[int,Outcome,int,int],...]]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._seconds = 0.0
+        self._max_seconds = 0.0
+        return
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def suggest(self, hands_them:'Hands', hands_us:'Hands') -> list['Suggestion']:
+        """
+        Rank the moves for a player.
+
+        Parameters:
+            hands_them: The hands of the player asking for the hint (the player moving).
+            hands_us: The other player's hands.
+
+        Return: Every legal move, best first (an empty list if the game is over).
+        """
+        started = time.perf_counter()
+        position = Position.from_hands(hands_them, hands_us).value
+        ranked = self._evaluation(canonical(position))
+        by_next = {nxt: (outcome, distance, rank) for nxt, outcome, distance, rank in ranked}
+        suggestions:list[Suggestion] = []
+        for move in range(5):
+            nxt = NEXT[position * 5 + move]
+            if nxt < 0:
+                continue
+            outcome, distance, rank = by_next[canonical(nxt)]
+            suggestions.append(Suggestion(MOVE_NAMES[move], rank, outcome, distance,
+                                          _explain(outcome, distance, MOVE_NAMES[move] == 'S')))
+        suggestions.sort(key=lambda s: s.rank)
+        elapsed = time.perf_counter() - started
+        self._seconds += elapsed
+        self._max_seconds = max(self._max_seconds, elapsed)
+        return suggestions
+
+    def best(self, hands_them:'Hands', hands_us:'Hands') -> 'Suggestion|None':
+        """
+        The best move for a player (None if the game is over).
+        """
+        suggestions = self.suggest(hands_them, hands_us)
+        return suggestions[0] if suggestions else None
+
+    def _evaluation(self, position:int) -> tuple[tuple[int,'Outcome',int,int],...]:
+        """
+        Get the evaluation of a canonical position from the cache, working it out if it isn't there.
+        """
+        cached = self._cache.get(position)
+        if cached is not None:
+            self._hits += 1
+            self._cache.move_to_end(position)   # It is now the most recently used
+            return cached
+        self._misses += 1
+        cached = self._evaluate(position)
+        self._cache[position] = cached
+        if len(self._cache) > self._capacity:
+            self._cache.popitem(last=False)     # Drop the least recently used
+        return cached
+
+    def _evaluate(self, position:int) -> tuple[tuple[int,'Outcome',int,int],...]:
+        """
+        Rank the moves from a (canonical) position. Moves that lead to the same
+        canonical position are the same move, so they are only kept once.
+        """
+        if self._tablebase is None:
+            self._tablebase = get_tablebase()
+        scored:dict[int,tuple[int,Outcome,int]] = {}
+        for move in range(5):
+            nxt = NEXT[position * 5 + move]
+            if nxt < 0:
+                continue
+            nxt = canonical(nxt)
+            if nxt in scored:
+                continue
+            index = nxt >> 1
+            after = self._tablebase.outcome(index)    # This is for the other player
+            distance = self._tablebase.distance(index) + 1
+            if after == Outcome.LOSS:
+                scored[nxt] = (1000 - distance, Outcome.WIN, distance)
+            elif after == Outcome.DRAW:
+                scored[nxt] = (500, Outcome.DRAW, 0)
+            else:
+                scored[nxt] = (distance, Outcome.LOSS, distance)
+        # Rank them: moves with the same score have the same rank
+        ranked:list[tuple[int,Outcome,int,int]] = []
+        scores = sorted({score for score, _, _ in scored.values()}, reverse=True)
+        for nxt, (score, outcome, distance) in scored.items():
+            ranked.append((nxt, outcome, distance, scores.index(score) + 1))
+        return tuple(ranked)
+
+    def stats(self) -> 'HintStats':
+        lookups = self._hits + self._misses
+        return HintStats(lookups, self._hits, self._misses, len(self._cache),
+                         self._seconds / lookups * 1e6 if lookups else 0.0, self._max_seconds * 1e6)
+
+    def report(self) -> str:
+        """
+        The cache stats as text.
+        """
+        s = self.stats()
+        return "Hints: {:,}  Cache hits: {:.1%} ({:,} positions cached)  Lookup: mean {:.1f}us max {:.1f}us".format(
+            s.lookups, s.hit_rate, s.size, s.mean_us, s.max_us)
+
+    def clear(self) -> None:
+        """
+        Empty the cache and zero the stats.
+        """
+        self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+        self._seconds = 0.0
+        self._max_seconds = 0.0
+        return
+
+_service:'HintService|None' = None
+
+def get_hint_service() -> 'HintService':
+    """
+    Get the HintService that is shared by every game (so they share the cache).
+    """
+    global _service
+    if _service is None:
+        _service = HintService()
+    return _service
+
+def suggest(hands_them:'Hands', hands_us:'Hands') -> list['Suggestion']:
+    """
+    Rank the moves for a player, with the shared HintService (see HintService.suggest).
+    """
+    return get_hint_service().suggest(hands_them, hands_us)
@@ -0,0 +1,148 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_instrument.py
+
+This file contains the 'instrumentation' for MoveMaster. It counts how
+often each 'decision path' (the way a move was picked) is used and keeps a
+histogram of how long each path takes.
+
+A MoveMaster only does this when it is given an `Instrumentation`, so when
+it isn't wanted it costs next to nothing. The counts from different
+processes can be added together with `merge`, and `snapshot` gives a plain
+dict that can be saved as JSON (or sent between processes).
+"""
+from enum import IntEnum, unique
+from typing import Any
+
+@unique
+class DecisionPath(IntEnum):
+    """
+    The ways MoveMaster can pick a move.
+    """
+    FORCED_SPLIT = 0    # Had to split (they could win if we didn't)
+    RANDOM_SPLIT = 1    # Could split, and randomly chose to
+    WINNING_MOVE = 2    # A move that wins right now
+    TABLE_HIT    = 3    # The move from the MOVES data
+    TABLE_MISS   = 4    # No move in the MOVES data, so a random move
+    RANDOM_MOVE  = 5    # Randomly chose a random move (rather than the MOVES data)
+    TABLEBASE    = 6    # The tablebase replaced the move (see MoveMaster use_tablebase)
+    SEARCH       = 7    # Picked by searching ahead (see cs_search)
+    MCTS         = 8    # Picked by Monte Carlo Tree Search (see cs_mcts)
+
+# A short description of each path (for the player to read)
+PATH_DESCRIPTIONS:dict['DecisionPath',str] = {
+    DecisionPath.FORCED_SPLIT: "I had to split, or you could have won on your next move.",
+    DecisionPath.RANDOM_SPLIT: "I could split, and decided (randomly) to do it.",
+    DecisionPath.WINNING_MOVE: "It was a winning move!",
+    DecisionPath.TABLE_HIT: "It is the move from my strategy table.",
+    DecisionPath.TABLE_MISS: "My strategy table didn't have a move, so I picked one randomly.",
+    DecisionPath.RANDOM_MOVE: "I decided to pick a random move, to give you a chance.",
+    DecisionPath.TABLEBASE: "My perfect-play tablebase said it was the best move.",
+    DecisionPath.SEARCH: "I looked ahead at the moves we could both make, and it was the best one I found.",
+    DecisionPath.MCTS: "I played lots of quick random games from here, and it was the move that did best.",
+}
+
+HISTOGRAM_BUCKETS = 40  # Bucket 'b' holds times from 2**(b-1) up to 2**b nanoseconds
+
+class Instrumentation:
+    """
+    Counters and latency histograms for each DecisionPath.
+    """
+
+    def __init__(self) -> None:
+        self._counts:list[int] = [0] * len(DecisionPath)
+        self._total_ns:list[int] = [0] * len(DecisionPath)
+        self._histograms:list[list[int]] = [[0] * HISTOGRAM_BUCKETS for _ in DecisionPath]
+        return
+
+    def record(self, path:int, ns:int) -> None:
+        """
+        Record that a path was used and how long it took (in nanoseconds).
+        """
+        self._counts[path] += 1
+        self._total_ns[path] += ns
+        self._histograms[path][min(ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        return
+
+    def count(self, path:'DecisionPath') -> int:
+        """
+        The number of times a path was used.
+        """
+        return self._counts[path]
+
+    def mean_ns(self, path:'DecisionPath') -> float:
+        """
+        The average time for a path (in nanoseconds).
+        """
+        count = self._counts[path]
+        return self._total_ns[path] / count if count else 0.0
+
+    def percentile_ns(self, path:'DecisionPath', pct:float) -> int:
+        """
+        An estimate of a percentile of the time for a path (the top of the
+        histogram bucket it falls in), in nanoseconds.
+        """
+        count = self._counts[path]
+        if count == 0:
+            return 0
+        target = count * pct / 100
+        seen = 0
+        for bucket, n in enumerate(self._histograms[path]):
+            seen += n
+            if seen >= target:
+                return 1 << bucket
+        return 1 << (HISTOGRAM_BUCKETS - 1)
+
+    def merge(self, other:'Instrumentation') -> 'Instrumentation':
+        """
+        Add the counts from another Instrumentation (for example, from another process) to this one.
+        """
+        for path in DecisionPath:
+            self._counts[path] += other._counts[path]
+            self._total_ns[path] += other._total_ns[path]
+            hist = self._histograms[path]
+            for bucket, n in enumerate(other._histograms[path]):
+                hist[bucket] += n
+        return self
+
+    def snapshot(self) -> dict[str,Any]:
+        """
+        The counts and histograms as a plain dict (by path name).
+        """
+        return {
+            path.name: {
+                'count': self._counts[path],
+                'total_ns': self._total_ns[path],
+                'histogram': list(self._histograms[path]),
+            }
+            for path in DecisionPath
+        }
+
+    @staticmethod
+    def from_snapshot(snapshot:dict[str,Any]) -> 'Instrumentation':
+        """
+        Create an Instrumentation from a `snapshot`.
+        """
+        inst = Instrumentation()
+        for path in DecisionPath:
+            data = snapshot.get(path.name)
+            if data is not None:
+                inst._counts[path] = data['count']
+                inst._total_ns[path] = data['total_ns']
+                inst._histograms[path] = list(data['histogram'])
+        return inst
+
+    def report(self) -> str:
+        """
+        A readable summary, one line for each path.
+        """
+        lines = ["{:<13} {:>12} {:>10} {:>10} {:>10}".format("path", "count", "mean ns", "p50 ns", "p99 ns")]
+        for path in DecisionPath:
+            lines.append("{:<13} {:>12,} {:>10.0f} {:>10} {:>10}".format(
+                path.name, self._counts[path], self.mean_ns(path),
+                self.percentile_ns(path, 50), self.percentile_ns(path, 99)))
+        return "\n".join(lines)
@@ -0,0 +1,226 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_io.py
+
+This file contains the 'plug-in' parts that a Game uses to talk to the world:
+
+    MoveSource      Where the player's commands come from (the keyboard, a
+                    script, a network connection...)
+    Strategy        What picks our moves (MoveMaster, SearchMaster...)
+    OutputSink      Where the game's output goes. The game tells the sink
+                    what happened (for example: 'our move was LL'), and the
+                    sink decides how to show it (see cs_game.ConsoleSink).
+    Pacing          How the game pauses, so a person can follow along.
+                    A program playing the game doesn't need to wait.
+
+With these, the same Game code plays at the keyboard, in tests, in batch
+runs and behind a server.
+"""
+from typing import TYPE_CHECKING, Iterable, Protocol
+if TYPE_CHECKING:
+    from cs_hands import Hands
+    from cs_hints import Suggestion
+    from cs_instrument import DecisionPath
+
+import random
+import time
+
+class MoveSource(Protocol):
+    """
+    Where the player's commands come from.
+    """
+    def command(self, valid:tuple[str,...]) -> str|None:
+        """
+        Get the next command. 'valid' are the moves that are allowed. Return None if there are no more.
+        """
+        ...
+
+class OutputSink(Protocol):
+    """
+    Where the game's output goes. Each method is something that happened.
+    """
+    def hands(self, us:'Hands', them:'Hands') -> None: ...
+    def our_move(self, move:str) -> None: ...
+    def invalid_command(self, command:str) -> None: ...
+    def not_allowed(self, reason:str) -> None: ...
+    def why(self, text:str) -> None: ...
+    def hint(self, suggestions:list['Suggestion']) -> None: ...
+    def game_over(self, they_won:bool, moves:int) -> None: ...
+    def stats(self, lines:list[str]) -> None: ...
+
+class Strategy(Protocol):
+    """
+    What a Game needs from the strategy that picks our moves (MoveMaster, SearchMaster, MCTSMaster).
+    """
+    @property
+    def moves(self) -> int: ...
+    @property
+    def random_moves(self) -> int: ...
+    @property
+    def random_splits(self) -> int: ...
+    @property
+    def last_path(self) -> 'DecisionPath|None': ...
+    def get_move(self, from_hands:'Hands', to_hands:'Hands') -> str: ...
+
+class Pacing(Protocol):
+    """
+    How the game pauses.
+    """
+    def pause(self, seconds:float) -> None: ...
+
+#
+# Move sources
+#
+
+class ConsoleSource:
+    """
+    Reads commands from the keyboard.
+    """
+
+    def command(self, valid:tuple[str,...]) -> str|None:
+        try:
+            return input("\nYour move ({}): ".format(", ".join(valid)))
+        except EOFError:
+            return None     # The input was closed (like Ctrl-D)
+
+class ScriptedSource:
+    """
+    Gives commands from a list (or any iterable), then None.
+    """
+
+    def __init__(self, commands:Iterable[str]) -> None:
+        self._commands = iter(commands)
+        return
+
+    def command(self, valid:tuple[str,...]) -> str|None:
+        return next(self._commands, None)
+
+class RandomSource:
+    """
+    Picks one of the valid moves at random (for batch runs).
+    """
+
+    def __init__(self, rng:'random.Random|None'=None) -> None:
+        self._rng = rng if rng is not None else random.Random()
+        return
+
+    def command(self, valid:tuple[str,...]) -> str|None:
+        return valid[int(self._rng.random() * len(valid))]
+
+#
+# Output sinks
+#
+
+class NullSink:
+    """
+    Ignores the output (for batch runs).
+    """
+
+    def hands(self, us:'Hands', them:'Hands') -> None:
+        return
+
+    def our_move(self, move:str) -> None:
+        return
+
+    def invalid_command(self, command:str) -> None:
+        return
+
+    def not_allowed(self, reason:str) -> None:
+        return
+
+    def why(self, text:str) -> None:
+        return
+
+    def hint(self, suggestions:list['Suggestion']) -> None:
+        return
+
+    def game_over(self, they_won:bool, moves:int) -> None:
+        return
+
+    def stats(self, lines:list[str]) -> None:
+        return
+
+class RecordingSink:
+    """
+    Keeps the output as a list of (event, value) tuples (for tests).
+    The hands are kept as (our fingers, their fingers).
+    """
+
+    def __init__(self) -> None:
+        self.events:list[tuple[str,object]] = []
+        return
+
+    def hands(self, us:'Hands', them:'Hands') -> None:
+        self.events.append(('hands', ((us.left.fingers, us.right.fingers), (them.left.fingers, them.right.fingers))))
+        return
+
+    def our_move(self, move:str) -> None:
+        self.events.append(('our_move', move))
+        return
+
+    def invalid_command(self, command:str) -> None:
+        self.events.append(('invalid_command', command))
+        return
+
+    def not_allowed(self, reason:str) -> None:
+        self.events.append(('not_allowed', reason))
+        return
+
+    def why(self, text:str) -> None:
+        self.events.append(('why', text))
+        return
+
+    def hint(self, suggestions:list['Suggestion']) -> None:
+        self.events.append(('hint', [(s.move, s.rank) for s in suggestions]))
+        return
+
+    def game_over(self, they_won:bool, moves:int) -> None:
+        self.events.append(('game_over', (they_won, moves)))
+        return
+
+    def stats(self, lines:list[str]) -> None:
+        self.events.append(('stats', lines))
+        return
+
+#
+# Pacing
+#
+
+class RealTimePacing:
+    """
+    Really pauses (for a person to follow along).
+    """
+
+    def pause(self, seconds:float) -> None:
+        time.sleep(seconds)
+        return
+
+class NoPacing:
+    """
+    Doesn't pause at all.
+    """
+
+    def pause(self, seconds:float) -> None:
+        return
+
+class ScriptedPacing:
+    """
+    Keeps the pauses asked for (in 'requested'), and pauses for the times in
+    a list (in order, repeating) rather than the times asked for. With no
+    list, it doesn't pause.
+    """
+
+    def __init__(self, pauses:'list[float]|None'=None) -> None:
+        self.requested:list[float] = []
+        self._pauses = pauses or []
+        return
+
+    def pause(self, seconds:float) -> None:
+        if self._pauses:
+            time.sleep(self._pauses[len(self.requested) % len(self._pauses)])
+        self.requested.append(seconds)
+        return
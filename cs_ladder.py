@@ -0,0 +1,434 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_ladder.py
+
+This file contains a rating 'ladder' for MoveMaster configurations (different
+favor_split_pcnt and favor_random_pcnt values, and different MOVES tables).
+
+A win count only says how a configuration did against the ones it happened
+to play. A rating puts them all on one scale. The ladder uses the Glicko
+rating system (an improved Elo): each entrant has a rating (1500 to start)
+and a 'rating deviation' (RD) - how sure we are of the rating. A new entrant
+has a large RD, so its rating moves a lot with each result. As it plays, the
+RD gets smaller and the rating settles.
+
+The ratings are updated as the results come in (`record`) - only the two
+entrants that played are changed, and the old results aren't needed again.
+A batch of games between the same two entrants is one 'rating period' for
+them.
+
+The next games are picked where they tell us the most (`next_pairs`): the
+entrants are sorted by rating, and the neighbours whose order is the least
+sure (the smallest gap between their ratings, for the size of their RDs)
+play next. When every pair of neighbours is 'confident' (the gap is at least
+'confidence' times the combined RD), the ranking is done. This needs far
+fewer games than playing every pair the same number of times (see cs_tournament).
+
+The ratings alone aren't enough to be sure of the order of two neighbours.
+Chopsticks strategies aren't always 'transitive' (A can beat B and B beat C
+while C beats A), and an early result against a new entrant (whose rating is
+still a guess) can move a rating a long way. So neighbours must also have
+played each other, and their own games must agree with the order just as
+surely (the same 'confidence', in standard errors of their score).
+
+The ladder's state (the entrants and their ratings) can be saved to a small
+file and loaded to add more entrants or results later:
+    Header:  magic b'CSLD', version, reserved, entrants, pairs, rating periods
+    For each entrant: rating, RD, games, wins, losses, draws, split, random,
+                      then the name and the MOVES table path (UTF-8, with their lengths)
+    For each pair that has played: the two entrant numbers, their games, and the score of the first
+
+Run it from the command line:
+    python3 cs_ladder.py --entrant 20/5 --entrant 0/5 --entrant 50/25 --entrant 20/5:new_moves.py --save ladder.csld
+"""
+from cs_move_gen import MovesData
+from cs_tournament import shard_seed
+from cs_vector_sim import simulate
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import importlib.util
+import math
+import os
+import struct
+from typing import NamedTuple
+
+FORMAT_VERSION = 1
+MAGIC = b'CSLD'
+HEADER = struct.Struct('<4sHHIIQ')          # magic, version, reserved, entrants, pairs, rating periods
+ENTRANT = struct.Struct('<ddQQQQHHHH')      # rating, RD, games, wins, losses, draws, split, random, name length, table length
+PAIR = struct.Struct('<IIQd')               # entrant, entrant, games, score of the first entrant
+START_RATING = 1500.0
+START_RD = 350.0
+MIN_RD = 10.0                               # The RD never gets smaller than this
+RD_GROWTH = 30.0                            # The RD grows by this before each rating period (see _update)
+CONFIDENCE = 2.0                            # Neighbours are in a sure order when their gap is this many combined RDs (see Ladder.confident)
+Q = math.log(10) / 400
+
+class Entrant:
+    """
+    A MoveMaster configuration on the ladder, and its rating.
+    """
+
+    def __init__(self, name:str, split_pcnt:int, random_pcnt:int, table:str='') -> None:
+        """
+        Parameters:
+            name: A name for the entrant (it must be different from the others).
+            split_pcnt, random_pcnt: The MoveMaster settings.
+            table: A module file with a MOVES table (see cs_optimizer.write_moves_module),
+                or '' for cs_moves.MOVES.
+        """
+        self.name = name
+        self.split_pcnt = split_pcnt
+        self.random_pcnt = random_pcnt
+        self.table = table
+        self.rating:float = START_RATING
+        self.rd:float = START_RD
+        self.games:int = 0
+        self.wins:int = 0
+        self.losses:int = 0
+        self.draws:int = 0
+        return
+
+    @staticmethod
+    def parse(spec:str) -> 'Entrant':
+        """
+        Make an Entrant from 'split/random' or 'split/random:table.py'.
+        """
+        settings, _, table = spec.partition(':')
+        split, _, rnd = settings.partition('/')
+        return Entrant(spec, int(split), int(rnd or 5), table)
+
+    def interval(self) -> tuple[float,float]:
+        """
+        The rating is very likely (95%) between these.
+        """
+        return (self.rating - 2 * self.rd, self.rating + 2 * self.rd)
+
+    def __repr__(self) -> str:
+        return "Entrant({!r}, rating={:.0f}, rd={:.0f}, games={})".format(self.name, self.rating, self.rd, self.games)
+
+def _g(rd:float) -> float:
+    """
+    How much a result against an opponent with this RD counts (less, when we aren't sure of their rating).
+    """
+    return 1 / math.sqrt(1 + 3 * (Q * rd) ** 2 / math.pi ** 2)
+
+def expected_score(rating:float, other_rating:float, other_rd:float) -> float:
+    """
+    The part of the games (0 to 1) an entrant is expected to win against another.
+    """
+    return 1 / (1 + 10 ** (-_g(other_rd) * (rating - other_rating) / 400))
+
+def _update(rating:float, rd:float, other_rating:float, other_rd:float, games:int, score:float) -> tuple[float,float]:
+    """
+    The Glicko update for one rating period of 'games' games against one opponent.
+
+    The RD is first made a bit larger (Glicko's 'c'). Without that, a large batch of
+    games makes the RD so small that later results against other entrants hardly move
+    the rating, and the first few matches decide the ranking.
+
+    Return: (new rating, new RD)
+    """
+    rd = min(START_RD, math.sqrt(rd * rd + RD_GROWTH * RD_GROWTH))
+    g = _g(other_rd)
+    e = expected_score(rating, other_rating, other_rd)
+    d2_inverse = Q * Q * g * g * e * (1 - e) * games     # 1 / d squared
+    precision = 1 / (rd * rd) + d2_inverse
+    new_rating = rating + Q / precision * g * (score - games * e)
+    return (new_rating, max(MIN_RD, math.sqrt(1 / precision)))
+
+class Match(NamedTuple):
+    """
+    The work for a worker: play games between two entrants.
+    """
+    a: int
+    b: int
+    a_settings: tuple[int,int]
+    b_settings: tuple[int,int]
+    a_table: str
+    b_table: str
+    games: int
+    seed: int
+
+_tables:dict[str,'MovesData'] = {}
+
+def load_moves(path:str) -> 'MovesData':
+    """
+    Load the MOVES table from a module file (kept, so each file is only loaded once in a process).
+    """
+    moves = _tables.get(path)
+    if moves is None:
+        spec = importlib.util.spec_from_file_location("_ladder_moves", path)
+        if spec is None or spec.loader is None:
+            raise ValueError("Can't load a MOVES table from '{}'.".format(path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        moves = _tables[path] = module.MOVES
+    return moves
+
+def play_match(match:'Match') -> tuple[int,int,int,int,int]:
+    """
+    Play the games of a match (this runs in a worker process).
+
+    Return: (a, b, a wins, b wins, draws)
+    """
+    result = simulate(match.games, match.seed, match.a_settings, match.b_settings,
+                      a_moves=load_moves(match.a_table) if match.a_table else None,
+                      b_moves=load_moves(match.b_table) if match.b_table else None).tally()
+    return (match.a, match.b, result.wins[0], result.wins[1], result.draws)
+
+class Ladder:
+    """
+    Rates entrants from the results of their games (see the top of the file).
+    """
+
+    def __init__(self, seed:int=0) -> None:
+        self._entrants:list[Entrant] = []
+        self._by_name:dict[str,int] = {}
+        self._met:dict[tuple[int,int],list] = {}    # (entrant, entrant) (lower number first) -> [games, score of the first]
+        self._periods = 0
+        self._seed = seed
+        return
+
+    @property
+    def entrants(self) -> list['Entrant']:
+        return self._entrants
+
+    @property
+    def periods(self) -> int:
+        """
+        The rating periods (batches of results) recorded.
+        """
+        return self._periods
+
+    def add(self, entrant:'Entrant') -> 'Entrant':
+        """
+        Add an entrant (or get the one with the same name, if it is already on the ladder).
+        """
+        number = self._by_name.get(entrant.name)
+        if number is not None:
+            return self._entrants[number]
+        self._by_name[entrant.name] = len(self._entrants)
+        self._entrants.append(entrant)
+        return entrant
+
+    def get(self, name:str) -> 'Entrant|None':
+        number = self._by_name.get(name)
+        return None if number is None else self._entrants[number]
+
+    def record(self, a:str, b:str, a_wins:int, b_wins:int, draws:int=0) -> None:
+        """
+        Update the ratings of two entrants with the results of some games between them
+        (one rating period). Both are updated from the ratings they had before.
+        """
+        ea = self._entrants[self._by_name[a]]
+        eb = self._entrants[self._by_name[b]]
+        games = a_wins + b_wins + draws
+        if games == 0:
+            return
+        a_score = a_wins + draws / 2
+        new_a = _update(ea.rating, ea.rd, eb.rating, eb.rd, games, a_score)
+        new_b = _update(eb.rating, eb.rd, ea.rating, ea.rd, games, games - a_score)
+        ea.rating, ea.rd = new_a
+        eb.rating, eb.rd = new_b
+        for entrant, wins, losses in ((ea, a_wins, b_wins), (eb, b_wins, a_wins)):
+            entrant.games += games
+            entrant.wins += wins
+            entrant.losses += losses
+            entrant.draws += draws
+        x, y = self._by_name[a], self._by_name[b]
+        met = self._met.get((min(x, y), max(x, y)))
+        if met is None:
+            met = self._met[(min(x, y), max(x, y))] = [0, 0.0]
+        met[0] += games
+        met[1] += a_score if x < y else games - a_score
+        self._periods += 1
+        return
+
+    def standings(self) -> list['Entrant']:
+        """
+        The entrants, best rating first.
+        """
+        return sorted(self._entrants, key=lambda e: e.rating, reverse=True)
+
+    def head_to_head(self, a:str, b:str) -> tuple[int,float]:
+        """
+        The games two entrants have played against each other, and the score of 'a' (a draw is half a win).
+        """
+        x, y = self._by_name[a], self._by_name[b]
+        games, score = self._met.get((min(x, y), max(x, y)), (0, 0.0))
+        return (games, score if x < y else games - score)
+
+    def _gap(self, upper:int, lower:int) -> float:
+        """
+        How sure it is that 'upper' (the higher rating) is better than 'lower': the smaller
+        of the rating gap (in combined RDs) and the head-to-head score (in standard errors).
+        """
+        a, b = self._entrants[upper], self._entrants[lower]
+        games, score = self.head_to_head(a.name, b.name)
+        if games == 0:
+            return 0.0
+        rating_gap = (a.rating - b.rating) / math.sqrt(a.rd * a.rd + b.rd * b.rd)
+        # A score of half the games is an even match. The standard error of the score is at most sqrt(games) / 2.
+        result_gap = (score - games / 2) / (math.sqrt(games) / 2)
+        return min(rating_gap, result_gap)
+
+    def _gaps(self) -> list[tuple[float,int,int]]:
+        """
+        For each pair of neighbours in the standings: (gap, entrant, entrant). See `_gap`.
+        """
+        order = sorted(range(len(self._entrants)), key=lambda i: self._entrants[i].rating, reverse=True)
+        gaps:list[tuple[float,int,int]] = []
+        for upper, lower in zip(order, order[1:]):
+            gaps.append((self._gap(upper, lower), upper, lower))
+        return gaps
+
+    def confident(self, confidence:float=CONFIDENCE) -> bool:
+        """
+        True when every pair of neighbours in the standings is in a sure order: their ratings
+        are at least 'confidence' combined RDs apart, and their games against each other agree
+        (a score at least 'confidence' standard errors from even).
+        """
+        return all(gap >= confidence for gap, _, _ in self._gaps())
+
+    def next_pairs(self, count:int=1, confidence:float=CONFIDENCE) -> list[tuple[str,str]]:
+        """
+        The pairs that should play next: the neighbours in the standings whose order is
+        the least sure (each entrant is in one pair at most). Empty when the ranking is sure.
+        """
+        pairs:list[tuple[str,str]] = []
+        busy:set[int] = set()
+        for gap, a, b in sorted(self._gaps()):
+            if gap >= confidence or len(pairs) >= count:
+                break
+            if a in busy or b in busy:
+                continue
+            busy.update((a, b))
+            pairs.append((self._entrants[a].name, self._entrants[b].name))
+        return pairs
+
+    def run(self, games_per_match:int=2000, max_rounds:int=100, parallel:int|None=None,
+            workers:int|None=None, confidence:float=CONFIDENCE) -> int:
+        """
+        Play matches (picked by `next_pairs`) until the ranking is sure, or for 'max_rounds' rounds.
+
+        Parameters:
+            games_per_match: The games in each match (a rating period).
+            max_rounds: The most rounds to play.
+            parallel: The matches in each round (default: the number of workers).
+            workers: Worker processes (default: one per core). With 1, the games are played in this process.
+            confidence: See `confident`.
+
+        Return: The rounds played.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        parallel = parallel if parallel is not None else max(1, workers)
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        rounds = 0
+        try:
+            while rounds < max_rounds:
+                pairs = self.next_pairs(parallel, confidence)
+                if not pairs:
+                    break
+                matches = []
+                for a, b in pairs:
+                    ea, eb = self.get(a), self.get(b)
+                    matches.append(Match(self._by_name[a], self._by_name[b],
+                                         (ea.split_pcnt, ea.random_pcnt), (eb.split_pcnt, eb.random_pcnt),  # type: ignore (both are on the ladder)
+                                         ea.table, eb.table, games_per_match,  # type: ignore
+                                         shard_seed(self._seed, self._by_name[a], self._by_name[b], self._periods + len(matches))))
+                results = executor.map(play_match, matches) if executor is not None else map(play_match, matches)
+                for a, b, a_wins, b_wins, draws in results:
+                    self.record(self._entrants[a].name, self._entrants[b].name, a_wins, b_wins, draws)
+                rounds += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return rounds
+
+    def save(self, path:str) -> None:
+        """
+        Save the ladder. It is written to a temporary file that is then renamed,
+        so a reader never sees a partly written file.
+        """
+        parts = [HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(self._entrants), len(self._met), self._periods)]
+        for e in self._entrants:
+            name = e.name.encode('utf-8')
+            table = e.table.encode('utf-8')
+            parts.append(ENTRANT.pack(e.rating, e.rd, e.games, e.wins, e.losses, e.draws,
+                                      e.split_pcnt, e.random_pcnt, len(name), len(table)) + name + table)
+        parts.extend(PAIR.pack(a, b, games, score) for (a, b), (games, score) in self._met.items())
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, path)
+        return
+
+    @staticmethod
+    def load(path:str, seed:int=0) -> 'Ladder':
+        """
+        Load a ladder saved with `save`.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError("The file is too short to be a ladder.")
+        magic, version, _, count, pairs, periods = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("The file isn't a version {} ladder.".format(FORMAT_VERSION))
+        ladder = Ladder(seed)
+        pos = HEADER.size
+        try:
+            for _ in range(count):
+                rating, rd, games, wins, losses, draws, split, rnd, name_len, table_len = ENTRANT.unpack_from(data, pos)
+                pos += ENTRANT.size
+                name = data[pos:pos + name_len].decode('utf-8')
+                pos += name_len
+                table = data[pos:pos + table_len].decode('utf-8')
+                pos += table_len
+                e = ladder.add(Entrant(name, split, rnd, table))
+                e.rating, e.rd, e.games, e.wins, e.losses, e.draws = rating, rd, games, wins, losses, draws
+            for _ in range(pairs):
+                a, b, games, score = PAIR.unpack_from(data, pos)
+                pos += PAIR.size
+                ladder._met[(a, b)] = [games, score]
+        except struct.error:
+            raise ValueError("The ladder file is too short.")
+        ladder._periods = periods
+        return ladder
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rate MoveMaster configurations against each other.")
+    parser.add_argument('--entrant', action='append', default=[], metavar='SPEC',
+                        help="'split/random' or 'split/random:moves_module.py' (can be given more than once)")
+    parser.add_argument('--load', metavar='FILE', help="Start from a saved ladder")
+    parser.add_argument('--save', metavar='FILE', help="Save the ladder")
+    parser.add_argument('--games', type=int, default=2000, help="Games in each match")
+    parser.add_argument('--rounds', type=int, default=100, help="The most rounds to play")
+    parser.add_argument('--confidence', type=float, default=CONFIDENCE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    ladder = Ladder.load(args.load, args.seed) if args.load else Ladder(args.seed)
+    for spec in args.entrant:
+        ladder.add(Entrant.parse(spec))
+    rounds = ladder.run(args.games, args.rounds, workers=args.workers, confidence=args.confidence)
+    games = sum(e.games for e in ladder.entrants) // 2
+    print("{} rounds, {:,} games. The ranking is {}sure.".format(
+        rounds, games, "" if ladder.confident(args.confidence) else "not yet "))
+    for place, e in enumerate(ladder.standings(), 1):
+        low, high = e.interval()
+        print("  {:>2}. {:<28} {:>6.0f}  ({:.0f} to {:.0f})  games {:>8,}  won {:.1%}".format(
+            place, e.name, e.rating, low, high, e.games, e.wins / e.games if e.games else 0.0))
+    if args.save:
+        ladder.save(args.save)
+    return
+
+if __name__ == "__main__":
+    main()
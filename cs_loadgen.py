@@ -0,0 +1,157 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_loadgen.py
+
+This file contains a 'load generator' for cs_server. It opens a number of
+connections at the same time, and each one plays games with random (legal)
+moves. It reports the games played, the errors, and how long the server
+took to answer each move.
+
+Run it from the command line (with the server running):
+    python3 cs_loadgen.py --clients 2000 --games 3
+
+or have it start a server in the same process:
+    python3 cs_loadgen.py --clients 2000 --games 3 --local
+"""
+from cs_server import DEFAULT_PORT, ChopStixServer
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+try:
+    import resource  # To allow more open files (not on Windows)
+except ImportError:
+    resource = None
+
+class LoadStats:
+    """
+    The totals for all of the clients.
+    """
+
+    def __init__(self) -> None:
+        self.connected:int = 0
+        self.failed:int = 0             # Connections that couldn't be made or broke
+        self.games:int = 0
+        self.wins:int = 0               # Games the clients won
+        self.moves:int = 0
+        self.errors:int = 0             # ERROR replies (should be 0, the clients only make legal moves)
+        self.latencies:list[float] = []  # Seconds from sending a move to the next TURN
+        return
+
+    def report(self, seconds:float) -> str:
+        lines = [
+            "Connected: {:,}  Failed: {:,}".format(self.connected, self.failed),
+            "Games: {:,} ({:,} won by the clients)  Moves: {:,}  Errors: {:,}".format(
+                self.games, self.wins, self.moves, self.errors),
+            "Time: {:.2f}s  Games/s: {:,.1f}  Moves/s: {:,.1f}".format(
+                seconds, self.games / seconds if seconds else 0.0, self.moves / seconds if seconds else 0.0),
+        ]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            lines.append("Move latency ms: mean {:.2f}  p50 {:.2f}  p99 {:.2f}  max {:.2f}".format(
+                statistics.fmean(ordered) * 1000, ordered[len(ordered) // 2] * 1000,
+                ordered[int(len(ordered) * 0.99)] * 1000, ordered[-1] * 1000))
+        return "\n".join(lines)
+
+async def _client(host:str, port:int, games:int, rng:'random.Random', stats:'LoadStats', start:'asyncio.Event') -> None:
+    await start.wait()      # Every client connects at (close to) the same time
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    played = 0
+    sent = 0.0
+    try:
+        while played < games:
+            line = await reader.readline()
+            if not line:
+                stats.failed += 1
+                break
+            words = line.decode().split(" ", 1)
+            if words[0] == 'TURN':
+                if sent:
+                    stats.latencies.append(time.perf_counter() - sent)
+                moves = words[1].strip().split(",")
+                writer.write((rng.choice(moves) + "\n").encode())
+                sent = time.perf_counter()
+                stats.moves += 1
+            elif words[0] == 'OVER':
+                played += 1
+                stats.games += 1
+                if words[1].startswith("WON"):
+                    stats.wins += 1
+            elif words[0] == 'ERROR':
+                stats.errors += 1
+        writer.write(b"Q\n")
+        await writer.drain()
+        writer.close()
+    except ConnectionError:
+        stats.failed += 1
+    return
+
+def _raise_file_limit(wanted:int) -> None:
+    """
+    Each connection is an open file (two with a local server), so ask for more than the default.
+    """
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < wanted:
+        new = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (new, hard))
+    return
+
+async def run_load(host:str, port:int, clients:int, games:int, seed:int=0) -> tuple['LoadStats',float]:
+    """
+    Run the clients and wait for them all to finish.
+
+    Return: (stats, seconds)
+    """
+    stats = LoadStats()
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(_client(host, port, games, random.Random(seed + i), stats, start))
+             for i in range(clients)]
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    return (stats, time.perf_counter() - started)
+
+async def _main(args:'argparse.Namespace') -> None:
+    server:'ChopStixServer|None' = None
+    port = args.port
+    if args.local:
+        server = ChopStixServer(args.host, 0, args.think)
+        await server.start()
+        port = server.port
+    stats, seconds = await run_load(args.host, port, args.clients, args.games, args.seed)
+    print(stats.report(seconds))
+    if server is not None:
+        print("Server: peak sessions {:,}, games {:,}".format(server.peak_sessions, server.games))
+        await server.close()
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the ChopStix server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--clients', type=int, default=1000, help="Connections open at the same time")
+    parser.add_argument('--games', type=int, default=1, help="Games each client plays")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--local', action='store_true', help="Start a server in this process")
+    parser.add_argument('--think', type=float, default=0.0, help="The computer's think time (with --local)")
+    args = parser.parse_args()
+    _raise_file_limit(args.clients * 2 + 64)
+    asyncio.run(_main(args))
+    return
+
+if __name__ == "__main__":
+    main()
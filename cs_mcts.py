@@ -0,0 +1,446 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_mcts.py
+
+This file contains a 'Monte Carlo Tree Search' (MCTS) player. It is for
+ChopStix variants (see cs_rules) that are too large to solve, or to search
+all of the way to the end.
+
+MCTS grows a tree of positions, starting from the one we are moving from.
+Over and over, it:
+ 1. Selects: Walks down the tree, picking the child with the best 'UCT'
+    value (how well its moves have done, plus a bonus for moves that haven't
+    been tried much).
+ 2. Expands: Adds the moves from the position it reached to the tree.
+ 3. Plays out: Plays random moves from there to the end of a game (a 'rollout').
+ 4. Backs up: Adds the result to every position on the way down.
+The move that was tried the most is played.
+
+The rollouts are done in batches. A batch picks a number of leaves (a
+'virtual loss' is added to each one picked, so the next pick goes somewhere
+else), then plays all of their rollouts at once:
+    'numpy'     All of the games in the batch move together, with NumPy arrays
+                (see cs_big_solver.successor_columns).
+    'process'   The batch is split between worker processes.
+    'python'    One game at a time, in this process.
+
+The tree nodes are kept in a 'pool' of lists (one list for each field). The
+lists are cleared (not freed) for each move, so after the first few moves no
+new memory is needed.
+
+The moves are the same as `Game.move` (see Rules.moves). `MCTSMaster` has the
+same `get_move(from_hands, to_hands)` as MoveMaster, so it can be used in its place.
+
+With the 'process' backend the worker processes are started the first time
+they are needed, and run until `close`. Use it in a 'with' so they are stopped:
+    with MCTSMaster(backend='process') as master:
+        move = master.get_move(from_hands, to_hands)
+"""
+from cs_big_solver import successor_columns
+from cs_instrument import DecisionPath
+from cs_position import MOVE_CODES
+from cs_rules import STANDARD, Rules
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+import random
+from time import perf_counter
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from cs_hands import Hands
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+EXPLORATION = math.sqrt(2)  # The UCT 'exploration' constant
+ROLLOUT_MOVES = 200         # Moves before a rollout is called a draw
+BATCH_LEAVES = 32           # Leaves picked for a batch
+ROLLOUTS_PER_LEAF = 32      # Rollouts played from each leaf (NumPy needs big batches to be fast)
+
+#
+# The rollouts. Each returns the score for the player moving at the start of
+# each rollout: 1.0 for a win, 0.0 for a loss and 0.5 for a draw.
+#
+
+def _rollouts_python(rules:'Rules', states:list[int], seed:int, max_moves:int) -> list[float]:
+    """
+    Play one random rollout from each state, one at a time.
+    """
+    rng = random.Random(seed)
+    lost_below = rules.places[rules.hands - 1]    # A state below this has been tapped out
+    cache:dict[int,list[int]] = {}
+    scores:list[float] = []
+    for state in states:
+        score = 0.5
+        for move_number in range(max_moves):
+            if state < lost_below:
+                # The player moving has lost. That is the player that started if an even number of moves were made.
+                score = 0.0 if move_number % 2 == 0 else 1.0
+                break
+            nexts = cache.get(state)
+            if nexts is None:
+                nexts = [n for _, n in rules.moves(state)]
+                cache[state] = nexts
+            if not nexts:
+                break
+            state = nexts[int(rng.random() * len(nexts))]
+        scores.append(score)
+    return scores
+
+def _rollouts_numpy(rules:'Rules', states:list[int], seed:int, max_moves:int) -> list[float]:
+    """
+    Play one random rollout from each state, all at the same time.
+    """
+    rng = np.random.default_rng(seed)
+    lost_below = rules.places[rules.hands - 1]
+    state = np.array(states, dtype=np.int64)
+    scores = np.full(state.size, 0.5)
+    game = np.arange(state.size)      # Which rollout each entry is (entries are dropped when they end)
+    for move_number in range(max_moves + 1):
+        over = state < lost_below
+        if over.any():
+            scores[game[over]] = 0.0 if move_number % 2 == 0 else 1.0
+            state, game = state[~over], game[~over]
+        if state.size == 0 or move_number == max_moves:
+            break
+        columns = list(successor_columns(rules, state))
+        valid = np.stack([np.broadcast_to(v, state.shape) for v, _ in columns], axis=1)
+        succ = np.stack([s for _, s in columns], axis=1)
+        count = valid.sum(axis=1)
+        stuck = count == 0                # No moves (only in unusual variants): a draw
+        if stuck.any():
+            state, game, valid, succ, count = state[~stuck], game[~stuck], valid[~stuck], succ[~stuck], count[~stuck]
+        # Pick the r'th valid move: the first column where the running count of valid moves passes r
+        pick = (rng.random(state.size) * count).astype(np.int64)
+        column = np.argmax(np.cumsum(valid, axis=1) > pick[:, None], axis=1)
+        state = succ[np.arange(state.size), column]
+    return scores.tolist()
+
+_worker_rules:'Rules|None' = None
+
+def _set_worker_rules(rules:'Rules') -> None:
+    global _worker_rules
+    _worker_rules = rules
+    return
+
+def _worker_rollouts(task:tuple[list[int],int,int]) -> list[float]:
+    states, seed, max_moves = task
+    return _rollouts_python(_worker_rules, states, seed, max_moves)  # type: ignore (set by the initializer)
+
+class MCTSMaster:
+    """
+    A player that picks its moves with Monte Carlo Tree Search.
+    """
+
+    def __init__(self, rules:'Rules'=STANDARD, time_budget:float|None=0.5, playouts:int|None=None,
+                 backend:str='numpy', workers:int=2, batch_leaves:int=BATCH_LEAVES,
+                 rollouts_per_leaf:int=ROLLOUTS_PER_LEAF, exploration:float=EXPLORATION,
+                 max_moves:int=ROLLOUT_MOVES, seed:int|None=None) -> None:
+        """
+        Parameters:
+            rules: The variant being played.
+            time_budget: Seconds to think about each move (None for no limit).
+            playouts: Rollouts for each move (None for no limit). At least one of
+                'time_budget' and 'playouts' must be given.
+            backend: How the rollouts are played: 'numpy', 'process' or 'python'.
+                'numpy' uses 'python' if NumPy isn't installed.
+            workers: The number of worker processes for 'process'.
+            batch_leaves: Leaves picked for each batch of rollouts.
+            rollouts_per_leaf: Rollouts played from each leaf.
+            exploration: The UCT exploration constant.
+            max_moves: Moves before a rollout is called a draw.
+            seed: The seed for the random numbers (the same seed and a 'playouts'
+                budget gives the same moves).
+        """
+        if time_budget is None and playouts is None:
+            raise ValueError("A time budget or a number of playouts is needed.")
+        if backend not in ('numpy', 'process', 'python'):
+            raise ValueError("Unknown backend '{}'. Use 'numpy', 'process' or 'python'.".format(backend))
+        if backend == 'numpy' and np is None:
+            backend = 'python'
+        self._rules = rules
+        self._time_budget = time_budget
+        self._playouts = playouts
+        self._backend = backend
+        self._workers = workers
+        self._batch_leaves = batch_leaves
+        self._rollouts_per_leaf = rollouts_per_leaf
+        self._exploration = exploration
+        self._max_moves = max_moves
+        self._rng = random.Random(seed)
+        self._executor:'ProcessPoolExecutor|None' = None     # Started the first time it is needed
+        self._moves_cache:dict[int,list[tuple[str,int]]] = {}
+        # The node pool
+        self._state:list[int] = []
+        self._parent:list[int] = []
+        self._label:list[str] = []          # The move into the node
+        self._first_child:list[int] = []    # -1 until the node is expanded
+        self._child_count:list[int] = []
+        self._visits:list[float] = []
+        self._value:list[float] = []        # Total score, for the player that moved into the node
+        self._size = 0                      # The nodes in use (the lists can be longer)
+        # Stats
+        self._moves = 0
+        self._last_playouts = 0
+        self._last_seconds = 0.0
+        self._total_playouts = 0
+        self._total_seconds = 0.0
+        return
+
+    @property
+    def rules(self) -> 'Rules':
+        return self._rules
+
+    @property
+    def moves(self) -> int:
+        """
+        The total number of moves.
+        """
+        return self._moves
+
+    @property
+    def random_moves(self) -> int:
+        """
+        The number of random moves used (always 0, but Game shows it).
+        """
+        return 0
+
+    @property
+    def random_splits(self) -> int:
+        """
+        The number of random splits used (always 0, but Game shows it).
+        """
+        return 0
+
+    @property
+    def last_path(self) -> 'DecisionPath|None':
+        """
+        How the last move was picked (None before the first move).
+        """
+        return DecisionPath.MCTS if self._moves else None
+
+    @property
+    def pool_capacity(self) -> int:
+        """
+        The number of nodes the pool has room for (without growing).
+        """
+        return len(self._state)
+
+    @property
+    def playouts_per_second(self) -> float:
+        """
+        The average rollout speed for all of the moves.
+        """
+        return self._total_playouts / self._total_seconds if self._total_seconds > 0 else 0.0
+
+    def report(self) -> str:
+        """
+        A one line summary of the last move.
+        """
+        return "{:,} playouts in {:.3f}s ({:,.0f} playouts/s), {:,} nodes".format(
+            self._last_playouts, self._last_seconds,
+            self._last_playouts / self._last_seconds if self._last_seconds > 0 else 0.0, self._size)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes (if they were started).
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        return
+
+    def __enter__(self) -> 'MCTSMaster':
+        return self
+
+    def __exit__(self, *exc:object) -> None:
+        self.close()
+        return
+
+    #
+    # The node pool
+    #
+
+    def _new_node(self, state:int, parent:int, label:str) -> int:
+        node = self._size
+        self._size += 1
+        if node < len(self._state):
+            # Reuse a node from an earlier move
+            self._state[node] = state
+            self._parent[node] = parent
+            self._label[node] = label
+            self._first_child[node] = -1
+            self._child_count[node] = 0
+            self._visits[node] = 0.0
+            self._value[node] = 0.0
+        else:
+            self._state.append(state)
+            self._parent.append(parent)
+            self._label.append(label)
+            self._first_child.append(-1)
+            self._child_count.append(0)
+            self._visits.append(0.0)
+            self._value.append(0.0)
+        return node
+
+    def _legal_moves(self, state:int) -> list[tuple[str,int]]:
+        moves = self._moves_cache.get(state)
+        if moves is None:
+            moves = self._rules.moves(state)
+            self._moves_cache[state] = moves
+        return moves
+
+    def _expand(self, node:int) -> None:
+        """
+        Add the children of a node (they are next to each other in the pool).
+        """
+        moves = self._legal_moves(self._state[node])
+        first = self._size
+        for label, nxt in moves:
+            self._new_node(nxt, node, label)
+        self._first_child[node] = first
+        self._child_count[node] = len(moves)
+        return
+
+    def _select(self, root:int) -> list[int]:
+        """
+        Walk down from the root to a leaf (expanding it), adding a virtual loss to each node.
+
+        Return: The nodes on the path.
+        """
+        lost_below = self._rules.places[self._rules.hands - 1]
+        visits = self._visits
+        value = self._value
+        c = self._exploration
+        node = root
+        path = [node]
+        visits[node] += 1
+        while self._state[node] >= lost_below:
+            if self._first_child[node] < 0:
+                self._expand(node)
+                if self._child_count[node] > 0:
+                    # Play out from one of the new children
+                    node = self._first_child[node] + int(self._rng.random() * self._child_count[node])
+                    path.append(node)
+                    visits[node] += 1
+                break
+            first = self._first_child[node]
+            count = self._child_count[node]
+            if count == 0:
+                break
+            log_n = math.log(visits[node])
+            best = first
+            best_uct = -1.0
+            for child in range(first, first + count):
+                n = visits[child]
+                if n == 0:
+                    best = child
+                    break
+                uct = value[child] / n + c * math.sqrt(log_n / n)
+                if uct > best_uct:
+                    best_uct = uct
+                    best = child
+            node = best
+            path.append(node)
+            visits[node] += 1
+        return path
+
+    def _backup(self, path:list[int], score:float, rollouts:int) -> None:
+        """
+        Add the rollout results to the nodes on a path. 'score' is the total
+        for the player moving at the leaf. The virtual loss (one visit) is
+        replaced by the real visits.
+        """
+        visits = self._visits
+        value = self._value
+        for node in reversed(path):
+            # The node's value is for the player that moved into it (the other player)
+            score = rollouts - score
+            visits[node] += rollouts - 1
+            value[node] += score
+        return
+
+    def _rollouts(self, states:list[int]) -> list[float]:
+        seed = self._rng.getrandbits(63)
+        if self._backend == 'numpy':
+            return _rollouts_numpy(self._rules, states, seed, self._max_moves)
+        if self._backend == 'process':
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, initializer=_set_worker_rules,
+                                                     initargs=(self._rules,))
+            size = (len(states) + self._workers - 1) // self._workers
+            tasks = [(states[i:i + size], seed + i, self._max_moves) for i in range(0, len(states), size)]
+            scores:list[float] = []
+            for part in self._executor.map(_worker_rollouts, tasks):
+                scores.extend(part)
+            return scores
+        return _rollouts_python(self._rules, states, seed, self._max_moves)
+
+    def search(self, index:int) -> tuple[str,int]:
+        """
+        Find the best move for a position index (see Rules.index).
+
+        Return: (move command, next position index)
+        """
+        started = perf_counter()
+        deadline = started + self._time_budget if self._time_budget is not None else math.inf
+        limit = self._playouts if self._playouts is not None else math.inf
+        self._size = 0
+        root = self._new_node(index, -1, "")
+        self._expand(root)
+        if self._child_count[root] == 0:
+            raise ValueError("There are no moves from position {}.".format(index))
+        per_leaf = self._rollouts_per_leaf
+        playouts = 0
+        while playouts < limit and perf_counter() < deadline:
+            paths = [self._select(root) for _ in range(self._batch_leaves)]
+            states:list[int] = []
+            for path in paths:
+                states.extend([self._state[path[-1]]] * per_leaf)
+            scores = self._rollouts(states)
+            for i, path in enumerate(paths):
+                self._backup(path, sum(scores[i * per_leaf:(i + 1) * per_leaf]), per_leaf)
+            playouts += len(states)
+        # Play the move that was tried the most
+        first = self._first_child[root]
+        best = max(range(first, first + self._child_count[root]), key=lambda child: self._visits[child])
+        seconds = perf_counter() - started
+        self._moves += 1
+        self._last_playouts = playouts
+        self._last_seconds = seconds
+        self._total_playouts += playouts
+        self._total_seconds += seconds
+        return (self._label[best], self._state[best])
+
+    #
+    # The same methods as MoveMaster
+    #
+
+    def choose(self, position:int) -> int:
+        """
+        Generate a move for a packed position value (see cs_position). Only for the STANDARD rules.
+
+        Returns:
+            Move code (see cs_position.Move)
+        """
+        return MOVE_CODES[self.search(position >> 1)[0]]
+
+    def get_move(self, from_hands:'Hands', to_hands:'Hands') -> str:
+        """
+        Generate a move.
+
+        Parameters:
+            from_hands: The hands the fingers are coming from.
+            to_hands: The hands being tapped.
+        Returns:
+            move (S, LL, LR, RL, RR)
+        """
+        index = self._rules.index((from_hands.left.fingers, from_hands.right.fingers),
+                                  (to_hands.left.fingers, to_hands.right.fingers))
+        return self.search(index)[0]
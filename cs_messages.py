@@ -32,7 +32,8 @@ def help() -> None:  # The `-> None` is a 'type annotation' it lets the IDE know
         + "turn (to tap or split).\n")
     return  # Technically, not needed. But I like to include it to make the end clear.
 
-def options(show_split:bool=False, show_new:bool=False, show_quit:bool=False) -> None:  # `:bool` are also 'type annotations`
+def options(show_split:bool=False, show_new:bool=False, show_quit:bool=False, show_why:bool=False,
+            show_hint:bool=False) -> None:  # `:bool` are also 'type annotations`
     """
     Prints the options available to the user.
     """
@@ -45,6 +46,12 @@ def options(show_split:bool=False, show_new:bool=False, show_quit:bool=False) ->
     if (show_split):
         print("To split, enter 'S'")
         print("")
+    if (show_why):
+        print("To ask how I picked my last move, enter 'W'")
+        print("")
+    if (show_hint):
+        print("To get a hint (your moves, best first), enter 'H'")
+        print("")
     # Next, use conditional assignments into variables...
     ntext = "To start a new game, enter 'N'." if show_new else ""
     qtext = "To quit, enter 'Q'." if show_quit else ""
@@ -65,6 +72,6 @@ def intro() -> None:
     print("The other player is 'tapped out!'")
     print("")
     # Print the options...
-    options(True, show_quit=True, show_new=True)  # Pass 'True' (by order) to show 'split' option, the others by name (not in order)
+    options(True, show_quit=True, show_new=True, show_why=True, show_hint=True)  # Pass 'True' (by order) to show 'split' option, the others by name (not in order)
     return
 
@@ -11,11 +11,22 @@ the game of ChopStix.
 
 It contains some parameters that allow it to be better or randomly average.
 """
+from cs_canonical import CLASS_INDEX, canonical_hands, expand, transform_name
 from cs_hands import Hands
+from cs_instrument import DecisionPath, Instrumentation
 from cs_moves import MOVES  # The best moves to make
+from cs_rules import STANDARD, Rules
+from cs_position import FINGERS, MOVE_CODES, MOVE_NAMES, Move, Position, can_split, state_index
+from cs_solver import Outcome, Tablebase  # Perfect-play results
+from cs_tablebase import get_tablebase
 
 from enum import IntEnum, unique
 import random  # For our randomness in picking moves
+from time import perf_counter_ns  # For timing the moves (when instrumented)
+from typing import Callable
+
+# The form of the moves data (see cs_moves.MOVES): ((to fingers), (((from fingers), move), ...)), ...
+MovesData = tuple[tuple[tuple[int,int],tuple[tuple[tuple[int,int],str],...]],...]
 
 @unique
 class YesNoMaybe(IntEnum):
@@ -23,30 +34,219 @@ class YesNoMaybe(IntEnum):
     YES      = 1
     MAYBE    = -1
 
+#
+# The decisions that only depend on the fingers are made once for every
+# combination of the four hands (when this module is loaded) and kept in
+# tables indexed by `state_index`. That way a move only needs a few lookups.
+#
+# The hand rules (what a tap does) come from a `Rules` object, so the checks
+# are right for a variant too (with 'cutoff', a win is a tap that reaches the
+# modulus, not only one that adds up to it). The tables here are built for
+# STANDARD: MoveMaster (with cs_position's NEXT and the MOVES data) still only
+# plays the standard rules. Other variants are played with cs_rules and cs_solver.
+#
+
+def _taps_out(rules:'Rules', to_fingers:int, from_fingers:int) -> bool:
+    """
+    True if tapping a hand that has fingers with a hand that has fingers leaves it empty.
+    """
+    return to_fingers != 0 and from_fingers != 0 and rules.tap_table[to_fingers][from_fingers] == 0
+
+def _should_split(from_left:int, from_right:int, to_left:int, to_right:int, rules:'Rules'=STANDARD) -> 'YesNoMaybe':
+    """
+    Determine if the 'from hands' should split based on its fingers and the
+    'to hands' fingers.
+    """
+    if rules.can_split((from_left, from_right)):
+        # Well, we can split... should we?
+        from_fingers = from_left + from_right  # One hand is 0, so this gives us the fingers
+        # See if we can win now if we don't split
+        if to_left == 0 or to_right == 0:
+            if _taps_out(rules, to_left + to_right, from_fingers):
+                # We can win. Our 'get_move' logic will figure out how.
+                return YesNoMaybe.NO
+        # See if they can win if we don't split
+        if _taps_out(rules, from_fingers, to_left) or _taps_out(rules, from_fingers, to_right):
+            # If we don't split they can win on their next move!
+            return YesNoMaybe.YES
+        else:
+            # We can split, but we won't lose if we don't and we won't can't win if we don't
+            return YesNoMaybe.MAYBE  # Let the 'move' logic figure out what to do
+    return YesNoMaybe.NO  # We can't split
+
+def _winning_move(from_left:int, from_right:int, to_left:int, to_right:int, rules:'Rules'=STANDARD) -> int|None:
+    """
+    Generate a winning move if possible.
+
+    Returns:
+        Move code - Winning move if possible
+        None - Win isn't currently possible
+    """
+    move = None
+    if to_left == 0 or to_right == 0:
+        # Only one hand has fingers, so see if a win is possible.
+        to_fingers = to_left + to_right
+        if _taps_out(rules, to_fingers, from_left) or _taps_out(rules, to_fingers, from_right):
+            # A win is possible, see what move does it.
+            to_move = 'L' if to_right == 0 else 'R'
+            from_move = 'L' if _taps_out(rules, to_fingers, from_left) else 'R'
+            move = MOVE_CODES[from_move + to_move]
+    return move
+
+def _random_moves(from_left:int, from_right:int, to_left:int, to_right:int) -> tuple[int,int,int,int]:
+    """
+    The four 'random' moves, one for each way of flipping a coin for the
+    'from' hand and a coin for the 'to' hand. Index with: (from_coin - 1) * 2 + (to_coin - 1)
+    """
+    moves:list[int] = []
+    for from_coin in (1, 2):
+        for to_coin in (1, 2):
+            ## Randomly check the from left or right hand first
+            if from_coin == 1:
+                # See if we can use the left hand
+                move = "L" if not from_left == 0 else "R"
+            else:
+                move = "R" if not from_right == 0 else "L"
+            ## Randomly check the to left or right hand first
+            if to_coin == 1:
+                # See if the left hand has fingers
+                move += "L" if not to_left == 0 else "R"
+            else:
+                move += "R" if not to_right == 0 else "L"
+            moves.append(MOVE_CODES[move])
+    return (moves[0], moves[1], moves[2], moves[3])
+
+def _scan_moves(from_fingers:tuple[int,int], to_fingers:tuple[int,int], moves:'MovesData'=MOVES) -> str|None:
+    """
+    Scan the MOVES data for the move to make. This is only used to build the
+    MOVE_TABLE, so it doesn't need to be fast.
+
+    Parameters:
+        from_fingers: The (left,right) fingers of the hands doing the tapping.
+        to_fingers: The (left,right) fingers of the hands being tapped.
+        moves: The moves data (in the same form as cs_moves.MOVES).
+
+    Return:
+        Move string "LL", "LR", "RL" or "RR", or None if the MOVES data doesn't have one.
+    """
+    #
+    #  Note that the MOVES data only contains a single representation of a given
+    #   pair of hands fingers - in other words, it doesn't contain both L=1,R-0 and
+    #   L=0,R=1. So both the hands we are looking for and the hands in the data
+    #   are put in their canonical form (see cs_canonical) to compare them. The
+    #   move in the data is transformed to the canonical form (with the data's
+    #   transform) and then to our hands (with our transform).
+    #
+    canon_from, canon_to, transform = canonical_hands(from_fingers, to_fingers)
+    move_data:tuple[tuple[int,int],tuple[tuple[tuple[int,int],str],...]]  # See: cs_moves.Moves definition
+    for move_data in moves:
+        _, data_to, to_transform = canonical_hands((0, 0), move_data[0])
+        if data_to == canon_to:
+            from_player_move:tuple[tuple[int,int],str]  # See: cs_moves.Moves definition
+            for from_player_move in move_data[1]:
+                data_from, _, from_transform = canonical_hands(from_player_move[0], (0, 0))
+                if data_from == canon_from:
+                    # We found a match
+                    return transform_name(from_player_move[1], to_transform ^ from_transform ^ transform)
+            break   # Only the first entry for the 'to' hands is used
+    return None
+
+def _build_class_moves(moves:'MovesData'=MOVES) -> tuple[int|None,...]:
+    """
+    Build the table of moves for the canonical states (indexed by class number, see
+    cs_canonical) by scanning the MOVES data (or other data in the same form).
+    """
+    table:list[int|None] = []
+    for index in CLASS_INDEX:
+        from_left, from_right, to_left, to_right = FINGERS[index]
+        move = _scan_moves((from_left, from_right), (to_left, to_right), moves)
+        table.append(None if move is None else MOVE_CODES[move])
+    return tuple(table)
+
+def _build_move_table(moves:'MovesData'=MOVES) -> tuple[int|None,...]:
+    """
+    Build the table of moves, indexed by `state_index`, from the moves for the
+    canonical states (the mirrored states get the mirrored moves).
+    """
+    return expand(_build_class_moves(moves), moves=True)
+
+# The Move code (see cs_position.Move) from the MOVES data for each canonical state
+# (see cs_canonical), and for every combination of the four hands. Look up a move with:
+#   `MOVE_TABLE[state_index(from_left, from_right, to_left, to_right)]`
+# (the entry is None if the MOVES data doesn't have a move for the fingers)
+# The full table is made from the class table once, so a move is still only one lookup.
+#
+MOVE_CLASSES:tuple[int|None,...] = _build_class_moves()
+MOVE_TABLE:tuple[int|None,...] = expand(MOVE_CLASSES, moves=True)
+# The split advice and winning move (or None) are worked out for the canonical states and
+# expanded the same way. The four random moves depend on which hand is which (the coins
+# pick the left or right hand), so they are worked out for every combination.
+SPLIT_ADVICE:tuple['YesNoMaybe',...] = expand(tuple(_should_split(*FINGERS[i]) for i in CLASS_INDEX))
+WINNING_MOVES:tuple[int|None,...] = expand(tuple(_winning_move(*FINGERS[i]) for i in CLASS_INDEX), moves=True)
+RANDOM_MOVES:tuple[tuple[int,int,int,int],...] = tuple(_random_moves(*f) for f in FINGERS)
+
 class MoveMaster:
     """
     Contains the parameters that control how aggressively the moves generated
     try to win.
+
+    The moves can be generated from `Hands` (get_move), from a `Position`
+    (get_position_move), or from a packed position value (choose). They all
+    use the same logic, so they all pick moves the same way.
     """
 
-    def __init__(self, favor_split_pcnt:int=20, favor_random_pcnt:int=5):
+    def __init__(self, favor_split_pcnt:int=20, favor_random_pcnt:int=5, use_tablebase:bool=False,
+                 rng:'random.Random|None'=None, instrument:'Instrumentation|None'=None,
+                 moves:'MovesData|None'=None):
         """
         Create an instance of the game playing move strategy.
 
         Parameters:
             favor_split_pcnt: int percentage that we should randomly use Split (when we have a choice)
             favor_random_pcnt: int percentage that we choose a random move (when we have a non-split situation)
+            use_tablebase: Check the moves against the perfect-play results (see cs_solver). When
+                we can win, play the fastest win. Never make a move that turns a draw into a loss.
+            rng: The random number generator to use. Pass a `random.Random(seed)` to get the
+                same moves every time. If not given, the 'random' module is used.
+            instrument: Count and time the ways moves are picked (see cs_instrument).
+            moves: Moves data to use rather than cs_moves.MOVES (in the same form - for
+                example, a table from cs_optimizer).
         """
         # TODO: Add limit checks and raise exception if out of bounds
         self._favor_split:int = 100 - favor_split_pcnt
         self._favor_random:int = 100 - favor_random_pcnt
+        # A random number from 1 to 100 is at least 'favor' when a random
+        # number from 0.0 up to 1.0 is at least (favor - 1) / 100. Working
+        # these out once means a single (fast) `random()` call picks.
+        self._split_threshold:float = (self._favor_split - 1) / 100
+        self._random_threshold:float = (self._favor_random - 1) / 100
+        self._random:'Callable[[], float]' = (rng if rng is not None else random).random
+        self._use_tablebase:bool = use_tablebase
+        self._tablebase:'Tablebase|None' = None   # Loaded the first time it is needed
         # Keep some stats
         self._moves:int = 0
         self._rndmoves:int = 0
         self._rndsplits:int = 0
+        self._last_path:'DecisionPath|None' = None
+        self._instrument:'Instrumentation|None' = instrument
+        self._move_table:tuple[int|None,...] = MOVE_TABLE if moves is None else _build_move_table(moves)
 
         return
 
+    @property
+    def instrument(self) -> 'Instrumentation|None':
+        """
+        The Instrumentation counting the decision paths (if there is one).
+        """
+        return self._instrument
+
+    @property
+    def last_path(self) -> 'DecisionPath|None':
+        """
+        How the last move was picked (None before the first move).
+        """
+        return self._last_path
+
     @property
     def moves(self) -> int:
         """
@@ -72,133 +272,128 @@ class MoveMaster:
     # I use a leading underscore on methods that are intended to only be used internally.
     #
 
-    def _pick_move(self, from_hands:'Hands', to_hands:'Hands') -> str:
+    def _choose(self, index:int) -> int:
+        """
+        Generate a move for a state index (see cs_position.state_index).
+
+        Return: Move code
+        """
+        if self._instrument is None:
+            move = self._strategy_move(index)
+            if self._use_tablebase:
+                move = self._tablebase_move(index, move)
+            return move
+        start = perf_counter_ns()
+        move = self._strategy_move(index)
+        if self._use_tablebase:
+            move = self._tablebase_move(index, move)
+        self._instrument.record(self._last_path, perf_counter_ns() - start)  # type: ignore (the path is set for every move)
+        return move
+
+    def _strategy_move(self, index:int) -> int:
+        """
+        Generate a move for a state index using the strategy (split checks,
+        MOVE_TABLE and randomness).
+
+        Return: Move code
+        """
+        self._moves += 1
+        # First, see if we can/should split...
+        split = SPLIT_ADVICE[index]
+        if split == YesNoMaybe.YES:
+            self._last_path = DecisionPath.FORCED_SPLIT
+            return Move.S
+        if split == YesNoMaybe.MAYBE:
+            # This indicates that we can split if we want to, but we don't have
+            # to, and there isn't a way for us to win in this move.
+            #
+            # Select split or move based on our favor split parameter
+            if self._split_randomly():
+                self._rndsplits += 1
+                self._last_path = DecisionPath.RANDOM_SPLIT
+                return Move.S
+            return self._pick_move(index)
+        # split == YesNoMaybe.NO:
+        # This indicates that we might be able to win. See if we can
+        move = WINNING_MOVES[index]
+        if move is None:
+            # We can't win, so pick our best move.
+            move = self._pick_move(index)
+        else:
+            self._last_path = DecisionPath.WINNING_MOVE
+        return move
+
+    def _pick_move(self, index:int) -> int:
         """
         Pick a non-split move based on the strategy and the value of favoring a random move.
 
         Parameters:
-            from_hands: The hands doing the tapping.
-            to_hands: The hands being tapped.
+            index: The state index of the 'from' and 'to' hands.
 
         Return:
-            Move string "LL", "LR", "RL" or "RR"
+            Move code for "LL", "LR", "RL" or "RR"
         """
         # Should we select a move or do a random move?
-        rnd_int:int = random.randint(1, 100)
-        if self._favor_random <= rnd_int:
-            return self._random_move(from_hands, to_hands)
-        #
-        # Use the MOVES data to select a move...
-        #  Note that the MOVES data only contains a single representation of a given
-        #   pair of hands fingers - in other words, it doesn't contain both L=1,R-0 and
-        #   L=0,R=1. Therefore, it is up to us to switch the hands an check again if a
-        #   move isn't found, and to switch the move (from and/or to) if we switched
-        #   the hands.
+        if self._random() >= self._random_threshold:
+            self._last_path = DecisionPath.RANDOM_MOVE
+            return self._random_move(index)
         #
-        switch_from:bool = False  # Keep track if we switched the 'from' hands
-        from_fingers:tuple[int,int] = (from_hands.left.fingers, from_hands.right.fingers)
+        # Use the MOVE_TABLE (built from the MOVES data when this module is loaded,
+        # or from the 'moves' given to the constructor) to select a move. The mirrored hands are already taken care of in the table.
         #
-        switch_to:bool = False    # Keep track if we switched the 'to' hands
-        to_fingers:tuple[int,int] = (to_hands.left.fingers, to_hands.right.fingers)
-        move:str|None = None               # Move will be set if we find a move
-        found_to:bool = False
-        found_from:bool = False
-        move_data:tuple[tuple[int,int],tuple[tuple[tuple[int,int],str],...]]  # See: cs_moves.Moves definition
-        for move_data in MOVES:
-            to_has_fingers:tuple[int,int] = move_data[0]  # Get the finger data to check against
-            if to_fingers[0] == to_has_fingers[0] and to_fingers[1] == to_has_fingers[1]:
-                found_to = True
-            elif to_fingers[1] == to_has_fingers[0] and to_fingers[0] == to_has_fingers[1]:  # Check reversed fingers
-                found_to = True
-                switch_to = True
-            if found_to:
-                from_player_move:tuple[tuple[int,int],str]  # See: cs_moves.Moves definition
-                for from_player_move in move_data[1]:
-                    from_has_fingers = from_player_move[0]
-                    if from_fingers[0] == from_has_fingers[0] and from_fingers[1] == from_has_fingers[1]:
-                        found_from = True
-                    elif from_fingers[1] == from_has_fingers[0] and from_fingers[0] == from_has_fingers[1]:
-                        found_from = True
-                        switch_from = True
-                    if found_from:
-                        # We found a match
-                        raw_move = from_player_move[1]
-                        if not switch_from:
-                            move = raw_move[0]
-                        else:
-                            move = "R" if raw_move[0] == "L" else "L"
-                        if not switch_to:
-                            move += raw_move[1]
-                        else:
-                            move += "R" if raw_move[1] == "L" else "R"
-                        break
-                break
-            if found_to and found_from:
-                break
+        move:int|None = self._move_table[index]
         if move is None:
-            move = self._random_move(from_hands, to_hands)
-        return move  # type: ignore (We assure that move is not 'None')
+            self._last_path = DecisionPath.TABLE_MISS
+            move = self._random_move(index)
+        else:
+            self._last_path = DecisionPath.TABLE_HIT
+        return move
 
-    def _random_move(self, from_hands:'Hands', to_hands:'Hands', split_allowed:bool=False) -> str:
+    def _random_move(self, index:int, split_allowed:bool=False) -> int:
         """
         Generate a random move. Optionally, include split.
 
         Though it is intended to be random, if the 'from' can win, do it!
 
         Parameters:
-            from_hands: The hands the fingers are coming from.
-            to_hands: The hands being tapped.
+            index: The state index of the 'from' and 'to' hands.
             split_allowed: Flag indicating if a split move is allowed.
 
-        Return: String of "LL", "LR", "RL", or "RR", or "S" if split is allowed
+        Return: Move code for "LL", "LR", "RL", or "RR", or "S" if split is allowed
         """
         self._rndmoves += 1
         # See if 'from' can win...
-        move:str|None = self._winning_move(from_hands, to_hands)
+        move:int|None = WINNING_MOVES[index]
         if not move is None:
+            self._last_path = DecisionPath.WINNING_MOVE
             return move
         # If split is allowed, use our 'favor_split' to pick a split or not
-        if split_allowed and self._split_randomly():
-            if self._split_randomly():
-                move = "S"
-                self._rndsplits += 1
-        else:
-            # Generate a random, non-split, move
-            ## Randomly check the from left or right hand first
-            if random.randint(1,2) == 1:
-                # See if we can use the left hand
-                move = "L" if not from_hands.left.is_fist() else "R"
-            else:
-                move = "R" if not from_hands.right.is_fist() else "L"
-            ## Randomly check the to left or right hand first
-            if random.randint(1,2) == 1:
-                # See if the left hand has fingers
-                move += "L" if not to_hands.left.is_fist() else "R"
-            else:
-                move += "R" if not to_hands.right.is_fist() else "L"
-        return move  # type: ignore (We assure that move is not 'None')
+        if split_allowed and can_split(*FINGERS[index][:2]) and self._split_randomly():
+            self._rndsplits += 1
+            self._last_path = DecisionPath.RANDOM_SPLIT
+            return Move.S
+        # Generate a random, non-split, move by flipping a coin for
+        # the 'from' hand and a coin for the 'to' hand (one random
+        # number from 0 to 3 does both).
+        return RANDOM_MOVES[index][int(self._random() * 4)]
 
-    def _should_split(self, from_hands:'Hands', to_hands:'Hands') -> 'YesNoMaybe':
+    def _tablebase_move(self, index:int, move:int) -> int:
         """
-        Determine if the 'from hands' should split based on its fingers and the
-        'to hands' fingers.
+        Check the strategy's move against the tablebase, and replace it if it
+        isn't good enough. The lookups take the same time for any position.
+
+        Return: Move code
         """
-        if from_hands.can_split():
-            # Well, we can split... should we?
-            from_fingers = from_hands.left.fingers + from_hands.right.fingers  # One hand is 0, so this gives us the fingers
-            # See if we can win now if we don't split
-            if to_hands.left.is_fist() or to_hands.right.is_fist():
-                if from_fingers + to_hands.left.fingers + to_hands.right.fingers == 5:
-                    # We can win. Our 'get_move' logic will figure out how.
-                    return YesNoMaybe.NO
-            # See if they can win if we don't split
-            if from_fingers + to_hands.left.fingers == 5 or from_fingers + to_hands.right.fingers == 5:
-                # If we don't split they can win on their next move!
-                return YesNoMaybe.YES
-            else:
-                # We can split, but we won't lose if we don't and we won't can't win if we don't
-                return YesNoMaybe.MAYBE  # Let the 'move' logic figure out what to do
-        return YesNoMaybe.NO  # We can't split
+        if self._tablebase is None:
+            self._tablebase = get_tablebase()
+        tablebase = self._tablebase
+        outcome = tablebase.outcome(index)
+        if outcome == Outcome.WIN or (outcome == Outcome.DRAW and not tablebase.move_keeps_outcome(index, move)):
+            best = tablebase.best_move(index)
+            if best is not None and best != move:
+                move = best
+                self._last_path = DecisionPath.TABLEBASE
+        return move
 
     def _split_randomly(self) -> bool:
         """
@@ -210,36 +405,25 @@ class MoveMaster:
             True: Split
             False: Don't split
         """
-        rnd_int = random.randint(1, 100)
-        if self._favor_split <= rnd_int:
+        if self._random() >= self._split_threshold:
             return True
         return False
 
-    def _winning_move(self, from_hands:'Hands', to_hands:'Hands') -> str|None:
+    #
+    # Following are the methods intended to be called from outside of the class (no leading underscore)
+    #
+
+    def choose(self, position:int) -> int:
         """
-        Generate a winning move if possible.
+        Generate a move for a packed position value (see cs_position). This is
+        the fastest way to get a move, as nothing is created.
 
         Parameters:
-            from_hands: The hands the fingers are coming from.
-            to_hands: The hands being tapped.
+            position: The packed position, from the point of view of the side moving.
         Returns:
-            str - Winning move if possible
-            None - Win isn't currently possible
+            Move code (see cs_position.Move)
         """
-        move = None
-        if to_hands.left.is_fist() or to_hands.right.is_fist():
-            # Only one hand has fingers, so see if a win is possible.
-            to_fingers = to_hands.left.fingers + to_hands.right.fingers
-            if to_fingers + from_hands.left.fingers == 5 or to_fingers + from_hands.right.fingers == 5:
-                # A win is possible, see what move does it.
-                to_move = 'L' if to_hands.right.is_fist() else 'R'
-                from_move = 'L' if from_hands.left.fingers + to_fingers == 5 else 'R'
-                move = from_move + to_move
-        return move
-
-    #
-    # Following are the methods intended to be called from outside of the class (no leading underscore)
-    #
+        return self._choose(position >> 1)
 
     def get_move(self, from_hands:'Hands', to_hands:'Hands') -> str:
         """
@@ -251,34 +435,15 @@ class MoveMaster:
         Returns:
             move (S, LL, LR, RL, RR)
         """
-        move = None
-        self._moves += 1
-        # First, see if we can/should split...
-        split = self._should_split(from_hands, to_hands)
-        if split == YesNoMaybe.YES:
-            move = "S"
-        elif split == YesNoMaybe.MAYBE:
-            # This indicates that we can split if we want to, but we don't have
-            # to, and there isn't a way for us to win in this move.
-            #
-            # Select split or move based on our favor split parameter
-            if self._split_randomly():
-                move = "S"
-            else:
-                move = self._pick_move(from_hands, to_hands)
-        else:  # split == YesNoMaybe.NO:
-            # This indicates that we might be able to win. See if we can
-            if to_hands.left.is_fist() or to_hands.right.is_fist():
-                to_fingers = to_hands.left.fingers + to_hands.right.fingers
-                if from_hands.left.fingers + to_fingers == 5:
-                    move = "L"  # We will move from the left. Figure out 'to'
-                    move += "L" if to_hands.right.is_fist() else "R"
-                    return move
-                elif from_hands.right.fingers + to_fingers == 5:
-                    move = "R"  # We will move from the right. Figure out 'to'
-                    move += "L" if to_hands.right.is_fist() else "R"
-            if move is None:
-                # We can't win, so pick our best move.
-                move = self._pick_move(from_hands, to_hands)
-        return move
+        index = state_index(from_hands.left.fingers, from_hands.right.fingers,
+                            to_hands.left.fingers, to_hands.right.fingers)
+        return MOVE_NAMES[self._choose(index)]
+
+    def get_position_move(self, position:'Position') -> str:
+        """
+        Generate a move for a Position (from the point of view of the side moving).
 
+        Returns:
+            move (S, LL, LR, RL, RR)
+        """
+        return MOVE_NAMES[self._choose(position.index)]
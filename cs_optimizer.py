@@ -0,0 +1,463 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_optimizer.py
+
+This file contains an optimizer that looks for a better MOVES table (see
+cs_moves) by having the computer play itself.
+
+Most of the MOVES entries are a best guess. The optimizer treats the table
+as a list of choices (a 'genome'): one choice for each position where the
+tap moves don't all lead to the same place. It then 'hill-climbs':
+    1. Make some 'mutants' of the best table so far (each one has a few
+       choices changed at random).
+    2. Score each mutant by playing it against a pool of opponents (see
+       `DEFAULT_POOL`). The score is the part of the games it won (a draw is
+       half a win).
+    3. If the best mutant scored better than the best table so far, it
+       becomes the best table. Repeat.
+
+The games are played with cs_vector_sim, and the mutants are scored at the
+same time in worker processes (one per core). Every table is played with the
+same seed, so the tables are compared on the same random numbers (a small
+difference in score is a real difference, not luck). Because of that, a
+table always gets the same score, so the scores are kept by a hash of the
+table and no table is ever played twice. The scores can be saved to a file
+and loaded to continue a run (with the games, seed, pool and settings they
+were played with - scores for a different configuration aren't used).
+
+Only the positions where there is a real choice are in the genome:
+ - Mirrored hands (left and right swapped) are the same position, so only
+   the hands in MOVES order (larger, smaller) are used, and a choice is the
+   canonical position the move leads to (see cs_position.canonical).
+ - Positions with a winning move aren't included (MoveMaster always takes
+   the win, so the table isn't used).
+ - Positions where every tap move leads to the same canonical position
+   aren't included (there is nothing to choose).
+
+The result is in the same form as cs_moves.MOVES, so it can be given to a
+MoveMaster ('moves') or written out as a module to replace cs_moves.py.
+
+Run it from the command line:
+    python3 cs_optimizer.py --generations 50 --mutants 16 --games 20000 --cache scores.json --write new_moves.py
+"""
+from cs_move_gen import MOVE_TABLE, WINNING_MOVES, MovesData
+from cs_moves import MOVES
+from cs_position import FINGERS, MOVE_CODES, MOVE_NAMES, NEXT, STATE_COUNT, Move, canonical
+from cs_vector_sim import simulate
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Callable, NamedTuple
+
+TAP_MOVES = (Move.LL, Move.LR, Move.RL, Move.RR)
+
+class Opponent(NamedTuple):
+    """
+    A player in the opponent pool.
+
+    name: For the reports.
+    split_pcnt, random_pcnt: The MoveMaster settings.
+    moves: The moves data (None for cs_moves.MOVES).
+    """
+    name: str
+    split_pcnt: int
+    random_pcnt: int
+    moves: 'MovesData|None' = None
+
+# The players a table is scored against: the current MOVES table played the
+# way the game plays it, the same table with a lot of random moves, and a
+# player that only makes random moves.
+DEFAULT_POOL:tuple['Opponent',...] = (
+    Opponent("MOVES", 20, 5),
+    Opponent("MOVES (50% random)", 20, 50),
+    Opponent("Random", 0, 100),
+)
+
+def _choices() -> tuple[tuple[int,...],tuple[tuple[int,...],...]]:
+    """
+    Find the positions in the genome, and the choices for each one.
+
+    Return: (state indexes, the canonical next positions that can be chosen for each)
+    """
+    states:list[int] = []
+    options:list[tuple[int,...]] = []
+    for index in range(STATE_COUNT):
+        fl, fr, tl, tr = FINGERS[index]
+        if fl < fr or tl < tr or fl == 0 or tl == 0 or WINNING_MOVES[index] is not None:
+            continue    # Not in MOVES order, one of the players is out, or there is a win
+        position = index << 1
+        found:list[int] = []
+        for move in TAP_MOVES:
+            nxt = NEXT[position * 5 + move]
+            if nxt >= 0 and canonical(nxt) not in found:
+                found.append(canonical(nxt))
+        if len(found) > 1:
+            states.append(index)
+            options.append(tuple(found))
+    return (tuple(states), tuple(options))
+
+# The genome positions (state indexes) and the choices for each one
+GENOME_STATES, GENOME_OPTIONS = _choices()
+
+def _move_to(index:int, target:int) -> int:
+    """
+    The tap move (Move code) from a state that leads to a canonical position.
+    """
+    position = index << 1
+    for move in TAP_MOVES:
+        nxt = NEXT[position * 5 + move]
+        if nxt >= 0 and canonical(nxt) == target:
+            return move
+    raise ValueError("No move from state {} leads to {}.".format(index, target))
+
+def baseline_genome() -> list[int]:
+    """
+    The genome for the cs_moves.MOVES table. Where MOVES doesn't have a move
+    (MoveMaster makes a random one), the first choice is used.
+    """
+    genome:list[int] = []
+    for index, options in zip(GENOME_STATES, GENOME_OPTIONS):
+        move = MOVE_TABLE[index]
+        choice = 0
+        if move is not None and move != Move.S:
+            target = canonical(NEXT[(index << 1) * 5 + move])
+            if target in options:
+                choice = options.index(target)
+        genome.append(choice)
+    return genome
+
+def expand(genome:list[int]) -> bytes:
+    """
+    The move (Move code) for every state index (including the mirrored hands),
+    or 0 (Move.S) where the table doesn't have a move. This is what a table
+    really does, so it is what is hashed.
+    """
+    targets = {index: options[choice] for index, options, choice in zip(GENOME_STATES, GENOME_OPTIONS, genome)}
+    table = bytearray(STATE_COUNT)
+    for index in range(STATE_COUNT):
+        target = targets.get(canonical(index << 1) >> 1)
+        if target is not None:
+            table[index] = _move_to(index, target)
+    return bytes(table)
+
+def table_hash(genome:list[int]) -> str:
+    """
+    The hash of the table a genome makes (the key for the scores).
+    """
+    return hashlib.blake2b(expand(genome), digest_size=16).hexdigest()
+
+def to_moves(genome:list[int], base:'MovesData'=MOVES) -> 'MovesData':
+    """
+    The genome as moves data, in the same form as cs_moves.MOVES (the hands
+    are in MOVES order, so the mirrored hands are found by `_scan_moves`).
+
+    The genome only has the positions with a choice. The entries for the
+    other positions (where there is only one move that makes sense) are
+    copied from 'base', so the table still has them. Where the 'base' move
+    does the same as the genome's choice (a tap from either of two hands
+    with the same fingers), the 'base' move is kept.
+    """
+    by_to:dict[tuple[int,int],dict[tuple[int,int],str]] = {}
+    for to_fingers, entries in base:
+        for from_fingers, move_name in entries:
+            by_to.setdefault(to_fingers, {})[from_fingers] = move_name
+    for index, options, choice in zip(GENOME_STATES, GENOME_OPTIONS, genome):
+        fl, fr, tl, tr = FINGERS[index]
+        entries = by_to.setdefault((tl, tr), {})
+        was = entries.get((fl, fr))
+        if was is not None and was != 'S' and canonical(NEXT[(index << 1) * 5 + MOVE_CODES[was]]) == options[choice]:
+            continue
+        entries[(fl, fr)] = MOVE_NAMES[_move_to(index, options[choice])]
+    order:Callable[[tuple[int,int]],tuple[int,int]] = lambda hand: (hand[1], -hand[0])  # Same order as cs_moves
+    return tuple((to_fingers, tuple(sorted(by_to[to_fingers].items(), key=lambda entry: order(entry[0]))))
+                 for to_fingers in sorted(by_to, key=order))
+
+def mutate(genome:list[int], rng:'random.Random', changes:int=2) -> list[int]:
+    """
+    A copy of a genome with some of the choices changed (to a different choice).
+    """
+    mutant = list(genome)
+    for gene in rng.sample(range(len(genome)), min(changes, len(genome))):
+        count = len(GENOME_OPTIONS[gene])
+        mutant[gene] = (mutant[gene] + rng.randrange(1, count)) % count
+    return mutant
+
+class _Evaluation(NamedTuple):
+    """
+    The work for a worker: score one table.
+    """
+    genome: list[int]
+    pool: tuple['Opponent',...]
+    split_pcnt: int
+    random_pcnt: int
+    games: int
+    seed: int
+
+def _evaluate(work:'_Evaluation') -> float:
+    """
+    Score a table against the opponent pool (this runs in a worker process).
+    The table plays 'games' games against each opponent (it moves first in half of them).
+
+    Return: The part of the games won, with a draw counted as half a win.
+    """
+    moves = to_moves(work.genome)
+    points = 0.0
+    for number, opponent in enumerate(work.pool):
+        tally = simulate(work.games, work.seed + number, (work.split_pcnt, work.random_pcnt),
+                         (opponent.split_pcnt, opponent.random_pcnt),
+                         a_moves=moves, b_moves=opponent.moves).tally()
+        points += tally.wins[0] + tally.draws / 2
+    return points / (work.games * len(work.pool))
+
+class OptimizeResult(NamedTuple):
+    """
+    The result of `optimize`.
+
+    genome: The best genome found.
+    moves: The best table, in the same form as cs_moves.MOVES.
+    score: Its score (the part of the games won against the pool).
+    baseline_score: The score of the cs_moves.MOVES table (the starting table).
+    generations: The generations run.
+    evaluations: The tables played.
+    cache_hits: The tables that weren't played because their score was known.
+    history: The best score after each generation.
+    seconds: How long it took.
+    """
+    genome: list[int]
+    moves: 'MovesData'
+    score: float
+    baseline_score: float
+    generations: int
+    evaluations: int
+    cache_hits: int
+    history: list[float]
+    seconds: float
+
+class Optimizer:
+    """
+    Hill-climbs from the cs_moves.MOVES table to a table that wins more
+    against the opponent pool (see the top of the file).
+    """
+
+    def __init__(self, games:int=20000, seed:int=0, pool:tuple['Opponent',...]=DEFAULT_POOL,
+                 split_pcnt:int=20, random_pcnt:int=5, workers:int|None=None,
+                 cache:'dict[str,float]|None'=None) -> None:
+        """
+        Parameters:
+            games: The games each table plays against each opponent.
+            seed: The seed for the games (every table is played with it) and the mutations.
+            pool: The opponents.
+            split_pcnt, random_pcnt: The MoveMaster settings the tables are played with.
+            workers: The worker processes (default: one per core). With 1, the games are played in this process.
+            cache: Known scores (by `table_hash`). They must be for the same games, seed, pool and
+                settings (see `config`, and `load_cache`).
+        """
+        self._games = games
+        self._seed = seed
+        self._pool = pool
+        self._split_pcnt = split_pcnt
+        self._random_pcnt = random_pcnt
+        self._workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._cache:dict[str,float] = cache if cache is not None else {}
+        self._rng = random.Random(seed)
+        self._evaluations = 0
+        self._cache_hits = 0
+        return
+
+    @property
+    def config(self) -> dict[str,object]:
+        """
+        What a score depends on (other than the table): saved with the scores, so scores
+        for a different configuration aren't used.
+        """
+        return {
+            'games': self._games,
+            'seed': self._seed,
+            'split_pcnt': self._split_pcnt,
+            'random_pcnt': self._random_pcnt,
+            'pool': [[o.name, o.split_pcnt, o.random_pcnt,
+                      None if o.moves is None else hashlib.blake2b(repr(o.moves).encode('utf-8'), digest_size=16).hexdigest()]
+                     for o in self._pool],
+        }
+
+    @property
+    def cache(self) -> dict[str,float]:
+        """
+        The scores of the tables played (by `table_hash`).
+        """
+        return self._cache
+
+    @property
+    def evaluations(self) -> int:
+        """
+        The tables played (not counting the ones whose score was known).
+        """
+        return self._evaluations
+
+    @property
+    def cache_hits(self) -> int:
+        return self._cache_hits
+
+    def score(self, genomes:list[list[int]], executor:'ProcessPoolExecutor|None'=None) -> list[float]:
+        """
+        Score some genomes. The ones that aren't in the cache are played (at the same time, with an executor).
+        """
+        keys = [table_hash(genome) for genome in genomes]
+        todo:dict[str,list[int]] = {}
+        for key, genome in zip(keys, genomes):
+            if key in self._cache or key in todo:
+                self._cache_hits += 1
+            else:
+                todo[key] = genome
+        work = [_Evaluation(genome, self._pool, self._split_pcnt, self._random_pcnt, self._games, self._seed)
+                for genome in todo.values()]
+        scores = executor.map(_evaluate, work) if executor is not None else map(_evaluate, work)
+        for key, value in zip(todo, scores):
+            self._cache[key] = value
+            self._evaluations += 1
+        return [self._cache[key] for key in keys]
+
+    def optimize(self, generations:int=20, mutants:int=16, changes:int=2,
+                 progress:'Callable[[int,float],None]|None'=None) -> 'OptimizeResult':
+        """
+        Hill-climb from the cs_moves.MOVES table.
+
+        Parameters:
+            generations: The number of generations.
+            mutants: The mutants made (and scored) in each generation.
+            changes: The choices changed in each mutant.
+            progress: Called after each generation with (generation, best score).
+
+        Return: The best table found (see OptimizeResult).
+        """
+        started = time.perf_counter()
+        executor = ProcessPoolExecutor(max_workers=self._workers) if self._workers > 1 else None
+        try:
+            best = baseline_genome()
+            best_score = baseline_score = self.score([best], executor)[0]
+            history:list[float] = []
+            for generation in range(generations):
+                candidates = [mutate(best, self._rng, changes) for _ in range(mutants)]
+                scores = self.score(candidates, executor)
+                top = max(range(len(candidates)), key=lambda i: scores[i])
+                if scores[top] > best_score:
+                    best, best_score = candidates[top], scores[top]
+                history.append(best_score)
+                if progress is not None:
+                    progress(generation + 1, best_score)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return OptimizeResult(best, to_moves(best), best_score, baseline_score, generations,
+                              self._evaluations, self._cache_hits, history, time.perf_counter() - started)
+
+def load_cache(path:str, config:dict[str,object]) -> dict[str,float]:
+    """
+    Load scores saved with `save_cache` (an empty cache if the file doesn't exist).
+
+    Parameters:
+        config: The configuration of the Optimizer that will use the scores (`Optimizer.config`).
+
+    Raises:
+        ValueError if the scores are for a different configuration (other games, seed, pool or settings).
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get('config') != config:
+        raise ValueError("The scores in '{}' are for a different configuration.".format(path))
+    return {str(key): float(value) for key, value in data['scores'].items()}
+
+def save_cache(path:str, cache:dict[str,float], config:dict[str,object]) -> None:
+    """
+    Save scores, with the configuration they are for (`Optimizer.config`).
+    """
+    with open(path, 'w') as f:
+        json.dump({'config': config, 'scores': cache}, f)
+    return
+
+def write_moves_module(path:str, moves:'MovesData') -> None:
+    """
+    Write moves data as a module in the same form as cs_moves.py. Entries
+    that are different from cs_moves.MOVES are marked with a comment.
+    """
+    old:dict[tuple[tuple[int,int],tuple[int,int]],str] = {}
+    for to_fingers, entries in MOVES:
+        for from_fingers, move_name in entries:
+            old[(to_fingers, from_fingers)] = move_name
+    lines = [
+        '"""',
+        'Copyright (c) 2025 AESilky',
+        'SPDX-License-Identifier: MIT License',
+        '"""',
+        '',
+        '"""',
+        'The MOVES data found by cs_optimizer (see cs_moves for the form).',
+        '"""',
+        '',
+        'MOVES:tuple[tuple[tuple[int,int],tuple[tuple[tuple[int,int],str],...]],...] = (  # Tricky/complex annotation.',
+    ]
+    for to_fingers, entries in moves:
+        lines.append('    (')
+        lines.append('        ({},{}),('.format(*to_fingers))
+        for from_fingers, move_name in entries:
+            was = old.get((to_fingers, from_fingers))
+            note = '' if was == move_name else (' # New' if was is None else ' # Was {}'.format(was))
+            lines.append('            (({},{}),"{}"),{}'.format(from_fingers[0], from_fingers[1], move_name, note))
+        lines.append('        )')
+        lines.append('    ),')
+    lines.append(')')
+    with open(path, 'w', newline='') as f:
+        f.write('\r\n'.join(lines) + '\r\n')
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Look for a better MOVES table by self-play.")
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--mutants', type=int, default=16, help="Tables tried in each generation")
+    parser.add_argument('--changes', type=int, default=2, help="Choices changed in each mutant")
+    parser.add_argument('--games', type=int, default=20000, help="Games against each opponent")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', metavar='FILE', help="Load and save the scores")
+    parser.add_argument('--write', metavar='FILE', help="Write the best table as a module (like cs_moves.py)")
+    parser.add_argument('--check-games', type=int, default=0, metavar='N',
+                        help="Play the best table and MOVES N games with a different seed")
+    args = parser.parse_args()
+    optimizer = Optimizer(args.games, args.seed, workers=args.workers)
+    if args.cache:
+        try:
+            optimizer.cache.update(load_cache(args.cache, optimizer.config))
+        except ValueError as ex:
+            print("{} They aren't used (the file will be replaced).".format(ex))
+    print("{} positions with a choice. Playing {:,} games against each of {} opponents.".format(
+        len(GENOME_STATES), args.games, len(DEFAULT_POOL)))
+    result = optimizer.optimize(args.generations, args.mutants, args.changes,
+                                progress=lambda g, s: print("  Generation {}: {:.4f}".format(g, s)))
+    if args.cache:
+        save_cache(args.cache, optimizer.cache, optimizer.config)
+    changed = sum(1 for a, b in zip(result.genome, baseline_genome()) if a != b)
+    print("MOVES: {:.4f}  Best: {:.4f}  ({} choices changed)".format(result.baseline_score, result.score, changed))
+    print("Tables played: {:,}  Scores known: {:,}  Time: {:.1f}s".format(
+        result.evaluations, result.cache_hits, result.seconds))
+    if args.check_games:
+        # A different seed, to see if the new table is really better (not just better with the optimizer's seed)
+        checker = Optimizer(args.check_games, args.seed + 1000003, workers=1)
+        old, new = checker.score([baseline_genome(), result.genome])
+        print("Check ({:,} games, another seed): MOVES {:.4f}  Best {:.4f}".format(args.check_games, old, new))
+    if args.write:
+        write_moves_module(args.write, result.moves)
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_position.py
+
+This file contains a compact way to hold a game position (the fingers on all
+four hands plus whose turn it is) in a single small int, and a `Position`
+class that wraps one.
+
+The `Hand` and `Hands` classes are great for playing a game, but when the
+computer needs to look at thousands (or millions) of positions, creating and
+changing objects for each one is slow. A packed int can be used as an index
+into tables, compared, hashed, and 'moved' without creating anything new.
+
+The packed value is built like this:
+    index = state_index(mover_left, mover_right, other_left, other_right)  (0 to 624)
+    value = (index << 1) | side                                            (0 to 1249)
+
+The 'mover' is the player whose turn it is, so the hands are always stored
+from their point of view. The 'side' (0 or 1) keeps track of which player
+that is.
+"""
+import cs_exceptions as cse
+from cs_hands import Hands
+from cs_rules import STANDARD  # The tables here are for the standard rules
+
+from enum import IntEnum, unique
+
+@unique
+class Move(IntEnum):
+    """
+    The five move commands as small numbers, so they can be used as indexes.
+    """
+    S  = 0
+    LL = 1
+    LR = 2
+    RL = 3
+    RR = 4
+
+# The move command strings (as entered by a player), indexed by the Move code.
+MOVE_NAMES:tuple[str,...] = tuple(m.name for m in Move)
+# The Move code for each move command string.
+MOVE_CODES:dict[str,int] = {m.name: int(m) for m in Move}
+
+HAND_STATES = STANDARD.modulus                # A hand can have 0 to 4 fingers
+STATE_COUNT = HAND_STATES ** 4                # Number of ways the four hands can be
+POSITION_COUNT = STATE_COUNT * 2              # ...times the two players that could be moving
+
+def state_index(from_left:int, from_right:int, to_left:int, to_right:int) -> int:
+    """
+    Pack the fingers of the four hands into a single number from 0 to 624.
+
+    Each hand has 0 to 4 fingers, so the four hands are treated as the digits
+    of a 4 digit, base 5, number (from_left is the 'most significant' digit).
+    """
+    return ((from_left * HAND_STATES + from_right) * HAND_STATES + to_left) * HAND_STATES + to_right
+
+def pack(mover_left:int, mover_right:int, other_left:int, other_right:int, side:int=0) -> int:
+    """
+    Pack the fingers of the four hands, and the side that is moving, into a position value.
+    """
+    return (state_index(mover_left, mover_right, other_left, other_right) << 1) | side
+
+# The (mover_left, mover_right, other_left, other_right) fingers for each state index.
+# Built once, so unpacking a position doesn't need any arithmetic.
+FINGERS:tuple[tuple[int,int,int,int],...] = tuple(
+    sum(STANDARD.unpack(i), ()) for i in range(STATE_COUNT))  # type: ignore (the tuples are 2 + 2 long)
+
+def fingers(position:int) -> tuple[int,int,int,int]:
+    """
+    The (mover_left, mover_right, other_left, other_right) fingers of a position.
+    """
+    return FINGERS[position >> 1]
+
+def side(position:int) -> int:
+    """
+    The side (0 or 1) that is moving.
+    """
+    return position & 1
+
+def can_split(left:int, right:int) -> bool:
+    """
+    Check if a pair of hands can be split (one hand is a fist and the other has 2 or 4 fingers).
+    This is the same check as `Hands.can_split`.
+    """
+    return STANDARD.can_split((left, right))
+
+def apply(position:int, move:int) -> int:
+    """
+    Make a move and return the new position (with the other side moving).
+
+    This follows the same rules as `Game.move` (cs_rules.STANDARD), and raises the same errors.
+
+    Parameters:
+        position: The packed position.
+        move: The Move code.
+
+    Raises:
+        InvalidMoveCmd error if the move isn't one of the Move codes.
+
+        MoveNotAllowed error if the move isn't appropriate for the hands.
+    """
+    ml, mr, ol, orr = FINGERS[position >> 1]
+    if move == Move.S:
+        if not can_split(ml, mr):
+            raise cse.MoveNotAllowed("The fingers, [{},{}] don't allow for a split.".format(ml, mr))
+        ml, mr = STANDARD.split_results((ml, mr))[0]  # An EVEN split has only one result
+    elif move == Move.LL or move == Move.LR:
+        if ml == 0:
+            raise cse.MoveNotAllowed("There are no fingers on the left hand.")
+        if move == Move.LL:
+            ol = STANDARD.tap(ol, ml)
+        else:
+            orr = STANDARD.tap(orr, ml)
+    elif move == Move.RL or move == Move.RR:
+        if mr == 0:
+            raise cse.MoveNotAllowed("There are no fingers on the right hand.")
+        if move == Move.RL:
+            ol = STANDARD.tap(ol, mr)
+        else:
+            orr = STANDARD.tap(orr, mr)
+    else:
+        raise cse.InvalidMoveCmd(str(move))
+    # Now it is the other side's turn, so they become the 'mover'
+    return (state_index(ol, orr, ml, mr) << 1) | ((position & 1) ^ 1)
+
+def _build_next() -> tuple[int,...]:
+    """
+    The position after each move, indexed by: position * 5 + move.
+    A -1 means the move isn't allowed.
+    """
+    table:list[int] = []
+    for position in range(POSITION_COUNT):
+        for move in Move:
+            try:
+                table.append(apply(position, move))
+            except cse.MoveNotAllowed:
+                table.append(-1)
+    return tuple(table)
+
+# The successor table. The position after a move is: NEXT[position * 5 + move]
+# (-1 if the move isn't allowed). Built once, so making a move is a single lookup.
+NEXT:tuple[int,...] = _build_next()
+
+# The legal (move, next position) pairs for each position.
+LEGAL_MOVES:tuple[tuple[tuple[int,int],...],...] = tuple(
+    tuple((m, NEXT[p * 5 + m]) for m in range(len(Move)) if NEXT[p * 5 + m] >= 0)
+    for p in range(POSITION_COUNT))
+
+def legal_moves(position:int) -> tuple[tuple[int,int],...]:
+    """
+    All of the legal moves from a position, as (Move code, next position) pairs.
+
+    The pairs come from a table, so nothing is created and no errors are raised.
+    """
+    return LEGAL_MOVES[position]
+
+def is_legal(position:int, move:int) -> bool:
+    """
+    Check if a move (Move code) is allowed from a position.
+    """
+    return 0 <= move < 5 and NEXT[position * 5 + move] >= 0
+
+def canonical(position:int) -> int:
+    """
+    The mirror-normalized form of a position.
+
+    Swapping a player's left and right hands doesn't change the game, so each
+    pair of hands is put in the order (larger, smaller) - the same order used
+    in the MOVES data.
+    """
+    ml, mr, ol, orr = FINGERS[position >> 1]
+    if ml < mr:
+        ml, mr = mr, ml
+    if ol < orr:
+        ol, orr = orr, ol
+    return (state_index(ml, mr, ol, orr) << 1) | (position & 1)
+
+def is_lost(position:int) -> bool:
+    """
+    True if the side that is moving has no fingers out (they have been tapped out).
+    """
+    return (position >> 1) < (HAND_STATES * HAND_STATES)  # Both mover hands are 0 for the first 25 states
+
+
+class Position:
+    """
+    An immutable game position that wraps a packed position value.
+
+    There is only ever one Position instance for each of the 1250 values, so
+    `apply` and `canonical` don't create new objects - they return the one
+    that already exists. Use `Position.of(value)` rather than creating one.
+    """
+    __slots__ = ('_value',)  # No '__dict__' for each instance, just the one value
+
+    def __init__(self, value:int) -> None:
+        self._value:int = value
+        return
+
+    @staticmethod
+    def of(value:int) -> 'Position':
+        """
+        Get the Position for a packed position value.
+        """
+        return _POSITIONS[value]
+
+    @staticmethod
+    def from_hands(mover:'Hands', other:'Hands', side:int=0) -> 'Position':
+        """
+        Get the Position for a pair of `Hands` objects.
+
+        Parameters:
+            mover: The hands of the player whose turn it is.
+            other: The hands of the other player.
+            side: Which player is moving (0 or 1).
+        """
+        return _POSITIONS[pack(mover.left.fingers, mover.right.fingers, other.left.fingers, other.right.fingers, side)]
+
+    @property
+    def value(self) -> int:
+        """
+        The packed position value.
+        """
+        return self._value
+
+    @property
+    def index(self) -> int:
+        """
+        The state index (the packed fingers without the side).
+        """
+        return self._value >> 1
+
+    @property
+    def side(self) -> int:
+        """
+        The side (0 or 1) that is moving.
+        """
+        return self._value & 1
+
+    @property
+    def fingers(self) -> tuple[int,int,int,int]:
+        """
+        The (mover_left, mover_right, other_left, other_right) fingers.
+        """
+        return FINGERS[self._value >> 1]
+
+    def apply(self, move:'int|str') -> 'Position':
+        """
+        Make a move and return the resulting Position.
+
+        Parameters:
+            move: The Move code or the move command string (S, LL, LR, RL, RR).
+
+        Raises:
+            InvalidMoveCmd or MoveNotAllowed (see `apply`).
+        """
+        if isinstance(move, str):
+            code = MOVE_CODES.get(move)
+            if code is None:
+                raise cse.InvalidMoveCmd(move)
+            move = code
+        if is_legal(self._value, move):
+            return _POSITIONS[NEXT[self._value * 5 + move]]
+        return _POSITIONS[apply(self._value, move)]  # This raises the error
+
+    def legal_moves(self) -> tuple[tuple[int,'Position'],...]:
+        """
+        All of the legal moves, as (Move code, next Position) pairs (from a table).
+        """
+        return _POSITION_MOVES[self._value]
+
+    def move_names(self) -> tuple[str,...]:
+        """
+        The move commands (S, LL, LR, RL, RR) that are allowed.
+        """
+        return _MOVE_NAMES[self._value]
+
+    def canonical(self) -> 'Position':
+        """
+        The mirror-normalized Position (see `canonical`).
+        """
+        return _POSITIONS[canonical(self._value)]
+
+    def is_lost(self) -> bool:
+        """
+        True if the side that is moving has been tapped out.
+        """
+        return is_lost(self._value)
+
+    def __eq__(self, other:object) -> bool:
+        return isinstance(other, Position) and other._value == self._value
+
+    def __hash__(self) -> int:
+        return self._value
+
+    def __repr__(self) -> str:
+        return "Position({}, side={})".format(self.fingers, self.side)
+
+# The one-and-only instance of each Position
+_POSITIONS:tuple[Position,...] = tuple(Position(v) for v in range(POSITION_COUNT))
+# The legal moves of each Position, with the next Position (rather than the value)
+_POSITION_MOVES:tuple[tuple[tuple[int,Position],...],...] = tuple(
+    tuple((m, _POSITIONS[n]) for m, n in moves) for moves in LEGAL_MOVES)
+_MOVE_NAMES:tuple[tuple[str,...],...] = tuple(tuple(MOVE_NAMES[m] for m, _ in moves) for moves in LEGAL_MOVES)
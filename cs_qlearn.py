@@ -0,0 +1,363 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_qlearn.py
+
+This file contains a trainer that learns the value of every move from every
+position, as another way (rather than by hand, or with cs_optimizer) to get
+the moves for the MOVES data.
+
+The values are kept in a 'Q-table': a NumPy array with a row for each state
+index (see cs_position) and a column for each Move code. Q[state, move] is
+how good the move is for the player making it: +1 for a win, -1 for a loss.
+A win sooner is worth more than a win later, so each move 'discounts' the
+value by 'gamma' (a little less than 1):
+
+    Q[s, m] = +1                                if the move taps out the other player
+            = -gamma * max(Q[next, any move])   otherwise (the next player's best, from our side)
+
+A draw (a game that goes on forever) is worth 0.
+
+There are two ways to train it. Both work on whole arrays at once (not a
+Python loop for each position), so they learn a lot per second:
+
+    Value iteration     Every position is updated from the formula above, all
+                        at the same time, until the values stop changing
+                        (`sweep` / `value_iteration`).
+    Q-learning          A batch of games are played at the same time (mostly
+                        the best move so far, sometimes a random one), and the
+                        moves that were made are moved 'alpha' of the way
+                        toward the formula (`play_batch` / `update` / `train`).
+                        This only learns from positions that come up in games.
+
+The table can be saved and loaded (a 'checkpoint'), and the best tap move for
+each position can be exported as MOVES data for a MoveMaster ('moves'), or
+written as a module like cs_moves.py.
+
+NumPy is required for this trainer.
+
+Run it from the command line:
+    python3 cs_qlearn.py --method qlearn --steps 2000 --save q.csql --write q_moves.py --check-games 100000
+"""
+from cs_move_gen import MovesData
+from cs_optimizer import GENOME_OPTIONS, GENOME_STATES, Optimizer, baseline_genome, to_moves, write_moves_module
+from cs_position import FINGERS, HAND_STATES, NEXT, STATE_COUNT, Move, canonical, state_index
+from cs_solver import Tablebase, solve
+from cs_tablebase import rules_hash
+
+import argparse
+import os
+import struct
+import time
+from typing import Callable
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional for the app, but this trainer needs it
+    np = None
+
+FORMAT_VERSION = 1
+MAGIC = b'CSQL'
+HEADER = struct.Struct('<4sHH8sdQQ')    # magic, version, reserved, rules hash, gamma, updates, sweeps
+GAMMA = 0.99
+ILLEGAL = -2.0                          # The Q value kept for a move that isn't allowed (less than any real value)
+LOST_STATES = HAND_STATES * HAND_STATES  # State indexes below this have the player moving tapped out
+START = state_index(1, 1, 1, 1)
+
+class QTrainer:
+    """
+    Keeps a Q-table and trains it (see the top of the file).
+    """
+
+    def __init__(self, gamma:float=GAMMA, seed:int|None=None) -> None:
+        """
+        Parameters:
+            gamma: How much a move discounts the value (less than 1, so a faster win is better).
+            seed: The seed for the self-play games.
+        """
+        if np is None:
+            raise ImportError("cs_qlearn needs NumPy (pip install numpy).")
+        self._gamma = gamma
+        self._rng = np.random.default_rng(seed)
+        nxt = np.array(NEXT, dtype=np.int32).reshape(STATE_COUNT * 2, 5)[0::2]  # Side 0 (the side doesn't matter)
+        self._legal = nxt >= 0
+        self._next = np.where(self._legal, nxt >> 1, 0)         # The next state index (from the other player's side)
+        self._wins = self._legal & (self._next < LOST_STATES)    # Moves that tap out the other player
+        self._has_moves = self._legal.any(axis=1)
+        self._q = np.where(self._legal, 0.0, ILLEGAL).astype(np.float32)
+        self._games:'np.ndarray|None' = None     # The states of the games being played (see `play_batch`)
+        self._game_moves:'np.ndarray|None' = None
+        self._updates = 0
+        self._sweeps = 0
+        self.history:list[tuple[float,float]] = []   # (seconds training, biggest change) after each sweep or update
+        self._seconds = 0.0
+        return
+
+    @property
+    def q(self) -> 'np.ndarray':
+        """
+        The Q-table (STATE_COUNT rows by 5 Move codes). ILLEGAL for moves that aren't allowed.
+        """
+        return self._q
+
+    @property
+    def gamma(self) -> float:
+        return self._gamma
+
+    @property
+    def updates(self) -> int:
+        """
+        The Q-learning moves learned from.
+        """
+        return self._updates
+
+    @property
+    def sweeps(self) -> int:
+        """
+        The value iteration sweeps.
+        """
+        return self._sweeps
+
+    def values(self) -> 'np.ndarray':
+        """
+        The value of each state for the player moving (the value of its best move, 0 if there isn't a move).
+        """
+        return np.where(self._has_moves, self._q.max(axis=1), 0.0)
+
+    def targets(self, states:'np.ndarray', moves:'np.ndarray') -> 'np.ndarray':
+        """
+        What the values of some moves should be, from the values of the positions they lead to.
+        """
+        nxt = self._next[states, moves]
+        return np.where(self._wins[states, moves], 1.0, -self._gamma * self.values()[nxt]).astype(np.float32)
+
+    #
+    # Value iteration
+    #
+
+    def sweep(self) -> float:
+        """
+        Update every move of every position at the same time.
+
+        Return: The biggest change.
+        """
+        started = time.perf_counter()
+        new = np.where(self._wins, 1.0, -self._gamma * self.values()[self._next])
+        new = np.where(self._legal, new, ILLEGAL).astype(np.float32)
+        change = float(np.abs(new - self._q).max())
+        self._q = new
+        self._sweeps += 1
+        self._seconds += time.perf_counter() - started
+        self.history.append((self._seconds, change))
+        return change
+
+    def value_iteration(self, tolerance:float=1e-6, max_sweeps:int=10000) -> int:
+        """
+        Sweep until the biggest change is less than 'tolerance'.
+
+        Return: The sweeps made.
+        """
+        for count in range(1, max_sweeps + 1):
+            if self.sweep() < tolerance:
+                return count
+        return max_sweeps
+
+    #
+    # Q-learning
+    #
+
+    def greedy(self, states:'np.ndarray', epsilon:float=0.0) -> 'np.ndarray':
+        """
+        The best move (by the Q-table) for each state, or (with a chance of 'epsilon') a random allowed move.
+        """
+        best = self._q[states].argmax(axis=1)
+        if epsilon > 0:
+            # A random allowed move: the allowed move with the biggest random number
+            noise = np.where(self._legal[states], self._rng.random((len(states), 5)), -1.0)
+            best = np.where(self._rng.random(len(states)) < epsilon, noise.argmax(axis=1), best)
+        return best
+
+    def play_batch(self, games:int=4096, epsilon:float=0.2, max_moves:int=200) -> tuple['np.ndarray','np.ndarray']:
+        """
+        Make one move in each of a batch of games that are played at the same time.
+        A game that is over (or has gone on too long) starts again.
+
+        Return: (states, moves) - the moves made.
+        """
+        if self._games is None or len(self._games) != games:
+            self._games = np.full(games, START, dtype=np.int32)
+            self._game_moves = np.zeros(games, dtype=np.int32)
+        states = self._games
+        moves = self.greedy(states, epsilon)
+        nxt = self._next[states, moves]
+        self._game_moves += 1  # type: ignore (set with the games)
+        over = self._wins[states, moves] | (self._game_moves >= max_moves)
+        self._games = np.where(over, START, nxt).astype(np.int32)
+        self._game_moves = np.where(over, 0, self._game_moves)
+        return (states, moves)
+
+    def update(self, states:'np.ndarray', moves:'np.ndarray', alpha:float=0.5) -> float:
+        """
+        Move the values of some moves 'alpha' of the way toward their targets.
+        When the same move is in the batch more than once, its changes are averaged.
+
+        Return: The biggest change.
+        """
+        started = time.perf_counter()
+        slots = states * 5 + moves
+        delta = self.targets(states, moves) - self._q.reshape(-1)[slots]
+        counts = np.bincount(slots, minlength=STATE_COUNT * 5)
+        sums = np.bincount(slots, weights=delta, minlength=STATE_COUNT * 5)
+        used = counts > 0
+        flat = self._q.reshape(-1)
+        flat[used] += (alpha * sums[used] / counts[used]).astype(np.float32)
+        self._updates += len(slots)
+        change = float(np.abs(delta).max() * alpha) if len(slots) else 0.0
+        self._seconds += time.perf_counter() - started
+        self.history.append((self._seconds, change))
+        return change
+
+    def train(self, steps:int, games:int=4096, epsilon:float=0.2, alpha:float=0.5,
+              progress:'Callable[[int],None]|None'=None) -> None:
+        """
+        Q-learning: play a move in a batch of games and learn from it, 'steps' times.
+
+        Parameters:
+            steps: The moves played in each game of the batch.
+            games: The games played at the same time.
+            epsilon: The chance of a random move (so the positions that aren't 'best' are also tried).
+            alpha: How far to move a value toward its target.
+            progress: Called every 100 steps with the steps done.
+        """
+        for step in range(steps):
+            started = time.perf_counter()
+            states, moves = self.play_batch(games, epsilon)
+            self._seconds += time.perf_counter() - started
+            self.update(states, moves, alpha)
+            if progress is not None and (step + 1) % 100 == 0:
+                progress(step + 1)
+        return
+
+    #
+    # Results
+    #
+
+    def greedy_moves(self) -> tuple[int|None,...]:
+        """
+        The best move (Move code) for each state index, or None if there isn't a move
+        (in the same form as cs_move_gen.MOVE_TABLE).
+        """
+        best = self._q.argmax(axis=1)
+        return tuple(int(m) if has else None for m, has in zip(best, self._has_moves))
+
+    def to_moves(self) -> 'MovesData':
+        """
+        The best tap move for each position where there is a choice, as MOVES data
+        (see cs_moves), for a MoveMaster ('moves'). Splits aren't in the MOVES data
+        (MoveMaster decides those), so only the tap moves are compared.
+        """
+        return to_moves(self.genome())
+
+    def genome(self) -> list[int]:
+        """
+        The best tap moves as a cs_optimizer genome.
+        """
+        genome:list[int] = []
+        for index, options in zip(GENOME_STATES, GENOME_OPTIONS):
+            row = self._q[index]
+            tap = max((Move.LL, Move.LR, Move.RL, Move.RR), key=lambda m: row[m])
+            genome.append(options.index(canonical(NEXT[(index << 1) * 5 + tap])))
+        return genome
+
+    def agreement(self, tablebase:'Tablebase') -> float:
+        """
+        The part of the positions (where both players have fingers out) where the best
+        move by the Q-table doesn't make the perfect-play outcome worse (see
+        Tablebase.move_keeps_outcome). 1.0 is perfect play.
+        """
+        best = self._q.argmax(axis=1)
+        good = 0
+        total = 0
+        for index in range(LOST_STATES, STATE_COUNT):
+            if not self._has_moves[index] or FINGERS[index][2] + FINGERS[index][3] == 0:
+                continue
+            total += 1
+            if tablebase.move_keeps_outcome(index, int(best[index])):
+                good += 1
+        return good / total if total else 1.0
+
+    #
+    # Checkpoints
+    #
+
+    def save(self, path:str) -> None:
+        """
+        Save the Q-table (a 'checkpoint'). It is written to a temporary file
+        that is then renamed, so a reader never sees a partly written file.
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, rules_hash(), self._gamma, self._updates, self._sweeps))
+            f.write(self._q.astype('<f4').tobytes())
+        os.replace(tmp_path, path)
+        return
+
+    @staticmethod
+    def load(path:str, seed:int|None=None) -> 'QTrainer':
+        """
+        Load a Q-table saved with `save`, to use it or to go on training it.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) != HEADER.size + STATE_COUNT * 5 * 4:
+            raise ValueError("The file isn't a Q-table checkpoint (it is the wrong size).")
+        magic, version, _, rules, gamma, updates, sweeps = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or rules != rules_hash():
+            raise ValueError("The file isn't a version {} Q-table checkpoint for these rules.".format(FORMAT_VERSION))
+        trainer = QTrainer(gamma, seed)
+        trainer._q = np.frombuffer(data, dtype='<f4', offset=HEADER.size).reshape(STATE_COUNT, 5).astype(np.float32)
+        trainer._updates = updates
+        trainer._sweeps = sweeps
+        return trainer
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Learn the values of the ChopStix moves.")
+    parser.add_argument('--method', choices=('iterate', 'qlearn'), default='iterate')
+    parser.add_argument('--gamma', type=float, default=GAMMA)
+    parser.add_argument('--steps', type=int, default=2000, help="Q-learning steps")
+    parser.add_argument('--games', type=int, default=4096, help="Q-learning games played at the same time")
+    parser.add_argument('--epsilon', type=float, default=0.2)
+    parser.add_argument('--alpha', type=float, default=0.5)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--load', metavar='FILE', help="Start from a checkpoint")
+    parser.add_argument('--save', metavar='FILE', help="Save a checkpoint")
+    parser.add_argument('--write', metavar='FILE', help="Write the best tap moves as a module (like cs_moves.py)")
+    parser.add_argument('--check-games', type=int, default=0, metavar='N',
+                        help="Play the learned moves and MOVES N games against the cs_optimizer pool")
+    args = parser.parse_args()
+    trainer = QTrainer.load(args.load, args.seed) if args.load else QTrainer(args.gamma, args.seed)
+    tablebase = Tablebase(solve())
+    if args.method == 'iterate':
+        sweeps = trainer.value_iteration()
+        print("Value iteration: {} sweeps".format(sweeps))
+    else:
+        trainer.train(args.steps, args.games, args.epsilon, args.alpha,
+                      progress=lambda step: print("  Step {}: agreement {:.4f}".format(
+                          step, trainer.agreement(tablebase))) if step % 500 == 0 else None)
+        print("Q-learning: {:,} updates".format(trainer.updates))
+    seconds = trainer.history[-1][0] if trainer.history else 0.0
+    print("Training time: {:.3f}s  Agreement with perfect play: {:.4f}".format(seconds, trainer.agreement(tablebase)))
+    if args.save:
+        trainer.save(args.save)
+    if args.write:
+        write_moves_module(args.write, trainer.to_moves())
+    if args.check_games:
+        old, new = Optimizer(args.check_games, workers=1).score([baseline_genome(), trainer.genome()])
+        print("Against the cs_optimizer pool: MOVES {:.4f}  Learned {:.4f}".format(old, new))
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_records.py
+
+This file contains a compact binary format for keeping the games that are
+played (by people, or by the computer playing itself), with a buffered
+writer and a 'streaming' reader.
+
+The file is only ever added to ('append-only'):
+    File header (8 bytes, little-endian):
+        magic       4 bytes   b'CSGR'
+        version     2 bytes   FORMAT_VERSION
+        reserved    2 bytes   0
+    Blocks, one after another. Each block is:
+        magic       4 bytes   b'CSBK'
+        length      4 bytes   The number of bytes of games in the block
+        games       4 bytes   The number of games in the block
+        checksum    4 bytes   CRC-32 of the games
+        The games (see below)
+
+A game is:
+    seed        8 bytes   The 'session' seed: the seed the players' random numbers were
+                          made from at the start of the session (0 if not known)
+    params      4 bytes   The (a split, a random, b split, b random) MoveMaster percentages
+    first       1 byte    The player that moved first (0 = 'a', 1 = 'b')
+    winner      1 byte    0 = 'a', 1 = 'b', 255 = no winner (a draw, or they quit)
+    moves       2 bytes   The number of moves
+    One byte for each move:
+        bits 0-2    The Move code (see cs_position.Move)
+        bits 3-7    The DecisionPath + 1 (see cs_instrument), or 0 if not known
+    END (0xFF)  A byte that can't be a move, to mark the end of the game
+
+The seed is the same for every game of a session (the players' random numbers
+carry on from one game to the next), so a game can't be played again from its
+seed alone - play the session again (the same seed and percentages) up to that
+game. The moves of the game are all in the record.
+
+A game is 17 bytes plus one byte for each move. Because each block has its
+length, a reader can skip from block to block without reading the games
+(see `block_offsets`), and a reader can start at any block. A block that was
+only partly written (if the program stopped while writing it) is at the end
+of the file and is ignored. When a RecordWriter opens the file again, it cuts
+the partly written block off before adding to the file, so it stays at the end.
+"""
+import cs_exceptions as cse
+
+import os
+import struct
+from typing import BinaryIO, Iterator, NamedTuple
+import zlib
+
+FORMAT_VERSION = 1
+MAGIC = b'CSGR'
+BLOCK_MAGIC = b'CSBK'
+FILE_HEADER = struct.Struct('<4sHH')
+BLOCK_HEADER = struct.Struct('<4sIII')
+GAME_HEADER = struct.Struct('<Q4BBBH')
+END = 0xFF
+NO_WINNER = 0xFF
+NO_PATH = 0
+BLOCK_SIZE = 1 << 16            # The writer starts a new block when this many bytes are waiting
+NO_PARAMS = (0, 0, 0, 0)
+
+class GameRecord(NamedTuple):
+    """
+    One game, as read from a file.
+
+    seed: The session seed (see the top of the file), 0 if not known.
+    params: The (a split, a random, b split, b random) MoveMaster percentages.
+    first: The player that moved first (0 = 'a', 1 = 'b').
+    winner: The player that won (0 or 1), or None.
+    moves: The move bytes (see `move_code` and `move_path`).
+    """
+    seed: int
+    params: tuple[int,int,int,int]
+    first: int
+    winner: int|None
+    moves: bytes
+
+def move_byte(move:int, path:'int|None'=None) -> int:
+    """
+    The byte for a move (Move code), and how it was picked (DecisionPath, if known).
+    """
+    return move | ((NO_PATH if path is None else path + 1) << 3)
+
+def move_code(value:int) -> int:
+    """
+    The Move code from a move byte.
+    """
+    return value & 7
+
+def move_path(value:int) -> int|None:
+    """
+    The DecisionPath from a move byte (None if it isn't known).
+    """
+    path = value >> 3
+    return None if path == NO_PATH else path - 1
+
+def encode_game(moves:'bytes|bytearray', winner:int|None, first:int=0, seed:int=0,
+                params:tuple[int,int,int,int]=NO_PARAMS) -> bytes:
+    """
+    The bytes for one game.
+    """
+    return (GAME_HEADER.pack(seed & 0xFFFFFFFFFFFFFFFF, *params, first, NO_WINNER if winner is None else winner, len(moves))
+            + bytes(moves) + b'\xff')
+
+class RecordWriter:
+    """
+    Adds games to a record file. The games are kept in memory until there is
+    a block's worth, then the block is written with one write. Use it in a
+    `with` statement (or call `close`), so the last block is written.
+    """
+
+    def __init__(self, path:str, block_size:int=BLOCK_SIZE) -> None:
+        """
+        Parameters:
+            path: The file. If it exists, the games are added to the end of it (after
+                cutting off a block that was only partly written).
+            block_size: The size of the blocks (bytes).
+
+        Raises:
+            RecordError if the file exists and isn't a game record file.
+        """
+        self._block_size = block_size
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file:BinaryIO = open(path, 'r+b')
+            try:
+                _read_file_header(self._file)
+                end = self._file.tell()
+                for offset, _, length in _scan_blocks(self._file, os.path.getsize(path)):
+                    end = offset + BLOCK_HEADER.size + length
+            except cse.RecordError:
+                self._file.close()
+                raise
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+        self._buffer = bytearray()
+        self._games = 0         # Games in the buffer
+        self._total = 0         # Games written
+        return
+
+    @property
+    def games(self) -> int:
+        """
+        The number of games added (by this writer).
+        """
+        return self._total + self._games
+
+    def add(self, moves:'bytes|bytearray', winner:int|None, first:int=0, seed:int=0,
+            params:tuple[int,int,int,int]=NO_PARAMS) -> None:
+        """
+        Add a game.
+
+        Parameters:
+            moves: The move bytes (see `move_byte`).
+            winner: The player that won (0 = 'a', 1 = 'b'), or None.
+            first: The player that moved first.
+            seed: The session seed (see the top of the file).
+            params: The (a split, a random, b split, b random) MoveMaster percentages.
+        """
+        self._buffer += encode_game(moves, winner, first, seed, params)
+        self._games += 1
+        if len(self._buffer) >= self._block_size:
+            self.flush()
+        return
+
+    def flush(self) -> None:
+        """
+        Write the games that are waiting as a block.
+        """
+        if self._games:
+            payload = bytes(self._buffer)
+            self._file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload), self._games, zlib.crc32(payload)) + payload)
+            self._file.flush()
+            self._total += self._games
+            self._buffer.clear()
+            self._games = 0
+        return
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+        return
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc:object) -> None:
+        self.close()
+        return
+
+class GameRecorder:
+    """
+    Collects the moves of a game as it is played, and adds the game to a
+    RecordWriter when it is over. A Game uses one of these (see Game 'recorder').
+    """
+
+    def __init__(self, writer:'RecordWriter', seed:int=0, params:tuple[int,int,int,int]=NO_PARAMS) -> None:
+        self._writer = writer
+        self._seed = seed
+        self._params = params
+        self._moves = bytearray()
+        self._first = 0
+        return
+
+    @property
+    def moves(self) -> int:
+        """
+        The moves in the game so far.
+        """
+        return len(self._moves)
+
+    def start(self, first:int) -> None:
+        """
+        Start a new game. 'first' is the player that moves first.
+        """
+        self._moves.clear()
+        self._first = first
+        return
+
+    def move(self, move:int, path:'int|None'=None) -> None:
+        """
+        Add a move (Move code), and how it was picked (DecisionPath, if known).
+        """
+        self._moves.append(move_byte(move, path))
+        return
+
+    def finish(self, winner:int|None) -> None:
+        """
+        The game is over. Add it to the writer.
+        """
+        self._writer.add(self._moves, winner, self._first, self._seed, self._params)
+        self._moves.clear()
+        return
+
+def _read_file_header(f:BinaryIO) -> None:
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise cse.RecordError("The file is too short to be a game record file.")
+    magic, version, _ = FILE_HEADER.unpack(header)
+    if magic != MAGIC:
+        raise cse.RecordError("The file isn't a game record file.")
+    if version != FORMAT_VERSION:
+        raise cse.RecordError("The file is version {}. Version {} is supported.".format(version, FORMAT_VERSION))
+    return
+
+def _scan_blocks(f:BinaryIO, size:int) -> Iterator[tuple[int,int,int]]:
+    """
+    Skip from one block header to the next, from the current position of the file
+    (just after the file header). 'size' is the size of the file.
+
+    Produces: (offset, games, length) for each complete block.
+    """
+    offset = f.tell()
+    while offset + BLOCK_HEADER.size <= size:
+        magic, length, games, _ = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+        if magic != BLOCK_MAGIC:
+            raise cse.RecordError("There isn't a block at offset {}.".format(offset))
+        if offset + BLOCK_HEADER.size + length > size:
+            break   # Only partly written
+        yield (offset, games, length)
+        offset += BLOCK_HEADER.size + length
+        f.seek(offset)
+    return
+
+def block_offsets(path:str) -> Iterator[tuple[int,int]]:
+    """
+    Find the blocks in a file without reading the games (it skips from one
+    block header to the next). This can be used to split a file between readers.
+
+    Produces: (offset, games) for each complete block.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        _read_file_header(f)
+        for offset, games, _ in _scan_blocks(f, size):
+            yield (offset, games)
+    return
+
+def read_blocks(path:str, start:int|None=None, blocks:int|None=None) -> Iterator[bytes]:
+    """
+    Read the blocks of a file, one at a time (only one block is in memory).
+
+    Parameters:
+        start: The offset of the first block to read (from `block_offsets`). The first block if not given.
+        blocks: The most blocks to read. All of them if not given.
+
+    Produces: The games bytes of each block.
+    """
+    with open(path, 'rb') as f:
+        _read_file_header(f)
+        if start is not None:
+            f.seek(start)
+        count = 0
+        while blocks is None or count < blocks:
+            offset = f.tell()
+            header = f.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                break
+            magic, length, _, checksum = BLOCK_HEADER.unpack(header)
+            if magic != BLOCK_MAGIC:
+                raise cse.RecordError("There isn't a block at offset {}.".format(offset))
+            payload = f.read(length)
+            if len(payload) < length:
+                break   # Only partly written
+            if zlib.crc32(payload) != checksum:
+                raise cse.RecordError("The block at offset {} is damaged (bad checksum).".format(offset))
+            yield payload
+            count += 1
+    return
+
+def read_games(path:str, start:int|None=None, blocks:int|None=None) -> Iterator['GameRecord']:
+    """
+    Read the games of a file, one at a time. Only one block is in memory, so
+    this can read files of any size.
+
+    Parameters:
+        start, blocks: See `read_blocks`.
+    """
+    size = GAME_HEADER.size
+    unpack_from = GAME_HEADER.unpack_from
+    for payload in read_blocks(path, start, blocks):
+        pos = 0
+        end = len(payload)
+        while pos < end:
+            seed, p0, p1, p2, p3, first, winner, count = unpack_from(payload, pos)
+            pos += size
+            moves = payload[pos:pos + count]
+            pos += count
+            if payload[pos] != END:
+                raise cse.RecordError("A game in a block doesn't have the right number of moves.")
+            pos += 1
+            yield GameRecord(seed, (p0, p1, p2, p3), first, None if winner == NO_WINNER else winner, moves)
+    return
@@ -0,0 +1,272 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_rules.py
+
+This file contains a `Rules` class that describes a version (a 'variant') of
+ChopStix, and the code to number (index) and move between the positions of
+any variant.
+
+The classic game (STANDARD) is:
+    modulus=5       A hand holds 0 to 4 fingers, and adding is 'modulo 5'
+    hands=2         Each player has two hands
+    cutoff=False    When a tap adds up to 5 or more, the extra 'rolls over' (6 -> 1)
+    split=EVEN      A split needs one hand with an even number of fingers and
+                    the other hand empty, and the fingers are shared equally
+    tap_empty=True  An empty hand can be tapped (it comes back into play)
+
+Other variants change these. For example, `cutoff=True` makes a hand that
+reaches the modulus empty (out), `split=FLEXIBLE` allows any re-arrangement of
+a player's fingers, and `hands=3` plays with three hands each.
+
+A position is numbered with a 'mixed-radix' index: each hand is a digit whose
+radix (base) is the number of values it can hold, with the moving player's
+hands first (most significant). For STANDARD this is the same numbering as
+`cs_position.state_index`, so the tables built for the classic game can be
+used with it directly.
+"""
+from enum import IntEnum, unique
+from itertools import product
+
+@unique
+class SplitRule(IntEnum):
+    """
+    What splits are allowed.
+    """
+    EVEN     = 0    # One hand has fingers (that can be shared equally), the rest are empty
+    FLEXIBLE = 1    # Any re-arrangement of the fingers (that isn't just swapping hands)
+
+_HAND_LETTERS = {2: "LR", 3: "LMR"}
+
+class Rules:
+    """
+    The rules of a ChopStix variant, and the position numbering for it.
+
+    A Rules object doesn't change once it is created, so it can be shared.
+    """
+
+    def __init__(self, modulus:int=5, hands:int=2, cutoff:bool=False,
+                 split:'SplitRule'=SplitRule.EVEN, tap_empty:bool=True) -> None:
+        """
+        Parameters:
+            modulus: A hand holds 0 to modulus-1 fingers.
+            hands: The number of hands each player has.
+            cutoff: True for a hand that reaches the modulus to become empty, False to roll over.
+            split: The split rule.
+            tap_empty: True if an empty hand can be tapped.
+        """
+        if modulus < 2:
+            raise ValueError("The modulus must be at least 2, not {}.".format(modulus))
+        if hands < 1:
+            raise ValueError("Each player needs at least one hand, not {}.".format(hands))
+        self._modulus = modulus
+        self._hands = hands
+        self._cutoff = cutoff
+        self._split = SplitRule(split)
+        self._tap_empty = tap_empty
+        # The mixed-radix numbering. Mover hands first, then the other player's hands.
+        self._radices:tuple[int,...] = (modulus,) * (hands * 2)
+        places:list[int] = []
+        place = 1
+        for radix in reversed(self._radices):
+            places.append(place)
+            place *= radix
+        self._places:tuple[int,...] = tuple(reversed(places))
+        self._state_count = place
+        self._letters = _HAND_LETTERS.get(hands, "123456789"[:hands])
+        # Lookup tables for the hand rules, so code that uses them a lot doesn't need to call a method
+        self._tap_table:tuple[tuple[int,...],...] = tuple(
+            tuple(self.tap(to_fingers, from_fingers) for from_fingers in range(modulus)) for to_fingers in range(modulus))
+        self._share_table:tuple[bool,...] = tuple(self.can_share(fingers) for fingers in range(modulus))
+        return
+
+    @property
+    def modulus(self) -> int:
+        return self._modulus
+
+    @property
+    def hands(self) -> int:
+        return self._hands
+
+    @property
+    def cutoff(self) -> bool:
+        return self._cutoff
+
+    @property
+    def split(self) -> 'SplitRule':
+        return self._split
+
+    @property
+    def tap_empty(self) -> bool:
+        return self._tap_empty
+
+    @property
+    def tap_table(self) -> tuple[tuple[int,...],...]:
+        """
+        The result of every tap: tap_table[to_fingers][from_fingers]
+        """
+        return self._tap_table
+
+    @property
+    def share_table(self) -> tuple[bool,...]:
+        """
+        For every number of fingers, if it can be shared equally (see `can_share`).
+        """
+        return self._share_table
+
+    @property
+    def radices(self) -> tuple[int,...]:
+        """
+        The radix of each digit (hand) of the position index, most significant first.
+        """
+        return self._radices
+
+    @property
+    def places(self) -> tuple[int,...]:
+        """
+        The place value of each digit (hand) of the position index, most significant first.
+        """
+        return self._places
+
+    @property
+    def state_count(self) -> int:
+        """
+        The number of positions (from the moving player's point of view).
+        """
+        return self._state_count
+
+    def signature(self) -> str:
+        """
+        A string that is different for different rules (used to tag saved data).
+        """
+        return "modulus={};hands={};cutoff={};split={};tap_empty={}".format(
+            self._modulus, self._hands, "yes" if self._cutoff else "no",
+            self._split.name.lower(), "yes" if self._tap_empty else "no")
+
+    def __eq__(self, other:object) -> bool:
+        return isinstance(other, Rules) and other.signature() == self.signature()
+
+    def __hash__(self) -> int:
+        return hash(self.signature())
+
+    def __repr__(self) -> str:
+        return "Rules({})".format(self.signature().replace(';', ', '))
+
+    #
+    # The rules for a hand
+    #
+
+    def tap(self, to_fingers:int, from_fingers:int) -> int:
+        """
+        The fingers on a hand after it is tapped.
+        """
+        total = to_fingers + from_fingers
+        if total < self._modulus:
+            return total
+        return 0 if self._cutoff else total % self._modulus
+
+    def can_share(self, fingers:int) -> bool:
+        """
+        Check if a hand's fingers can be shared equally between all of the hands (for an EVEN split).
+        """
+        return self._hands > 1 and fingers > 0 and fingers % self._hands == 0
+
+    def split_results(self, hands:tuple[int,...]) -> tuple[tuple[int,...],...]:
+        """
+        The ways a player's hands can be after a split (empty if they can't split).
+        """
+        total = sum(hands)
+        if self._split == SplitRule.EVEN:
+            nonempty = [f for f in hands if f != 0]
+            if len(nonempty) == 1 and self.can_share(nonempty[0]):
+                return ((nonempty[0] // self._hands,) * self._hands,)
+            return ()
+        # FLEXIBLE: any arrangement with the same total, other than the current one (or a swap of it)
+        current = sorted(hands)
+        results:list[tuple[int,...]] = []
+        for arrangement in product(range(self._modulus), repeat=self._hands):
+            if sum(arrangement) == total and sorted(arrangement) != current:
+                results.append(arrangement)
+        return tuple(results)
+
+    def can_split(self, hands:tuple[int,...]) -> bool:
+        """
+        Check if a player's hands can split.
+        """
+        return len(self.split_results(hands)) > 0
+
+    #
+    # The position numbering
+    #
+
+    def index(self, mover:tuple[int,...], other:tuple[int,...]) -> int:
+        """
+        The mixed-radix index of a position (from the moving player's point of view).
+        """
+        value = 0
+        for digit, radix in zip(mover + other, self._radices):
+            value = value * radix + digit
+        return value
+
+    def unpack(self, index:int) -> tuple[tuple[int,...],tuple[int,...]]:
+        """
+        The (mover, other) hands of a position index.
+        """
+        digits = [(index // place) % radix for place, radix in zip(self._places, self._radices)]
+        return (tuple(digits[:self._hands]), tuple(digits[self._hands:]))
+
+    def is_lost(self, index:int) -> bool:
+        """
+        True if the player moving has been tapped out (all of their hands are empty).
+        """
+        return index < self._places[self._hands - 1]  # All of the mover digits are 0
+
+    def is_won(self, index:int) -> bool:
+        """
+        True if the other player has been tapped out.
+        """
+        return index % self._places[self._hands - 1] == 0
+
+    def split_label(self, result:tuple[int,...]) -> str:
+        """
+        The move command for a split. With an EVEN split there is only one, so it is just 'S'.
+        """
+        if self._split == SplitRule.EVEN:
+            return "S"
+        return "S" + "".join(str(f) for f in result)
+
+    def moves(self, index:int) -> list[tuple[str,int]]:
+        """
+        All of the legal moves from a position, as (move command, next position index).
+        The next position is from the other player's point of view.
+
+        The moves are in the same order as cs_position.Move (splits, then taps).
+        """
+        mover, other = self.unpack(index)
+        result:list[tuple[str,int]] = []
+        for after in self.split_results(mover):
+            result.append((self.split_label(after), self.index(other, after)))
+        letters = self._letters
+        for f, from_fingers in enumerate(mover):
+            if from_fingers == 0:
+                continue
+            for t, to_fingers in enumerate(other):
+                if to_fingers == 0 and not self._tap_empty:
+                    continue
+                tapped = other[:t] + (self.tap(to_fingers, from_fingers),) + other[t + 1:]
+                result.append((letters[f] + letters[t], self.index(tapped, mover)))
+        return result
+
+    def canonical(self, index:int) -> int:
+        """
+        The symmetry-normalized index: each player's hands sorted largest first.
+        (Which hand is which doesn't change the game.)
+        """
+        mover, other = self.unpack(index)
+        return self.index(tuple(sorted(mover, reverse=True)), tuple(sorted(other, reverse=True)))
+
+# The classic game
+STANDARD = Rules()
@@ -34,10 +34,8 @@ class Score:
 
     def start_game(self) -> None:
         """
-        Increment the number of games and clear the scores.
+        Increment the number of games. The wins are kept from game to game.
         """
-        self._team_a = 0
-        self._team_b = 0
         self._games += 1
         return
 
@@ -0,0 +1,349 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_search.py
+
+This file contains a 'search' player. Rather than looking a move up in the
+MOVES data, it looks ahead: it tries each move, then each reply, and so on,
+and picks the move that does best when both players play their best. This is
+'negamax' (a score for one player is the negative of the score for the
+other) with 'alpha-beta' pruning (stop looking at a move as soon as it is
+known to be worse than one already found).
+
+To make that fast enough to play:
+ - Transposition table: A position can be reached by different orders of
+   moves. The result for a position is kept (in a fixed size table) so it
+   isn't searched again. It is keyed on the canonical (mirror-normalized)
+   position, so the mirrored positions share their results.
+ - Move ordering: The best move from the table is tried first, then moves
+   that win right now, then the rest by how they look. Alpha-beta prunes
+   the most when the best move is tried first.
+ - Iterative deepening: Search 1 move ahead, then 2, then 3... until the time
+   for the move is used up. The move from the deepest finished search is
+   played (and each search fills the table, which makes the next one faster).
+
+ChopStix positions repeat (the fingers go around and around). A move back to
+a position already on the line being searched is scored as a draw. A result
+that came from a repeat depends on the moves that led to it, so it isn't
+saved in the table (only its best move is).
+
+`SearchMaster` can be used in place of `MoveMaster` (see Game, and the
+`choose` method for cs_selfplay).
+"""
+from cs_instrument import DecisionPath
+from cs_position import FINGERS, MOVE_NAMES, canonical, state_index
+from cs_solver import SUCCESSORS
+
+from time import perf_counter
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from cs_hands import Hands
+    from cs_position import Position
+
+WIN_SCORE = 10000       # The score for a win right now. A win 'n' moves away is WIN_SCORE - n.
+MATE_LIMIT = WIN_SCORE - 1000   # Scores past this are a known win (or loss)
+HAND_OUT_SCORE = 10     # The guess at how good it is for the other player to have a hand out
+MAX_DEPTH = 64
+TT_SIZE = 1 << 12       # Entries in the transposition table (there are 625 states)
+CHECK_NODES = 1024      # How often (in nodes) to check the time
+
+# Transposition table entry types (what the score is known to be)
+EXACT = 0
+LOWER = 1               # The score is at least this (the search stopped at a 'beta cut')
+UPPER = 2               # The score is at most this (no move got above 'alpha')
+
+class _OutOfTime(Exception):
+    """
+    Raised inside the search when the time for a move is used up.
+    """
+    pass
+
+def _evaluate(index:int) -> int:
+    """
+    A guess at the score of a state for the player moving, when there isn't
+    time to search any deeper. Having more hands out is better.
+    """
+    ml, mr, ol, orr = FINGERS[index]
+    return HAND_OUT_SCORE * ((ol == 0) + (orr == 0) - (ml == 0) - (mr == 0))
+
+class SearchMaster:
+    """
+    A player that picks its moves by searching ahead.
+    """
+
+    def __init__(self, time_budget:float=0.2, max_depth:int=MAX_DEPTH, tt_size:int=TT_SIZE) -> None:
+        """
+        Parameters:
+            time_budget: Seconds to search for each move. The search also
+                stops early when it finds a win (or loss) it can't improve on.
+            max_depth: The deepest search (in moves).
+            tt_size: Entries in the transposition table.
+        """
+        self._time_budget = time_budget
+        self._max_depth = max_depth
+        # The transposition table is kept in lists (one for each field), indexed by: key % size
+        self._tt_size = tt_size
+        self._tt_key:list[int] = [-1] * tt_size
+        self._tt_depth:list[int] = [0] * tt_size
+        self._tt_score:list[int] = [0] * tt_size
+        self._tt_type:list[int] = [EXACT] * tt_size
+        self._tt_move:list[int] = [-1] * tt_size    # The best move, as the canonical state it goes to
+        self._path:set[int] = set()     # The positions (state index and side) on the line being searched (for repeats)
+        self._repeats = 0               # Counts repeats found, to know if a result used one
+        self._nodes = 0
+        self._deadline = 0.0
+        # Stats
+        self._moves = 0
+        self._last_nodes = 0
+        self._last_seconds = 0.0
+        self._last_depth = 0
+        self._last_score = 0
+        self._total_nodes = 0
+        self._total_seconds = 0.0
+        return
+
+    @property
+    def moves(self) -> int:
+        """
+        The total number of moves.
+        """
+        return self._moves
+
+    @property
+    def random_moves(self) -> int:
+        """
+        The number of random moves used (always 0, but Game shows it).
+        """
+        return 0
+
+    @property
+    def random_splits(self) -> int:
+        """
+        The number of random splits used (always 0, but Game shows it).
+        """
+        return 0
+
+    @property
+    def last_path(self) -> 'DecisionPath|None':
+        """
+        How the last move was picked (None before the first move).
+        """
+        return DecisionPath.SEARCH if self._moves else None
+
+    @property
+    def last_depth(self) -> int:
+        """
+        How many moves ahead the last search finished looking.
+        """
+        return self._last_depth
+
+    @property
+    def last_score(self) -> int:
+        """
+        The score of the last move (see `describe_score`).
+        """
+        return self._last_score
+
+    @property
+    def last_nodes(self) -> int:
+        """
+        The positions looked at for the last move.
+        """
+        return self._last_nodes
+
+    @property
+    def nodes_per_second(self) -> float:
+        """
+        The average search speed for all of the moves.
+        """
+        return self._total_nodes / self._total_seconds if self._total_seconds > 0 else 0.0
+
+    def describe_score(self, score:int|None=None) -> str:
+        """
+        A readable form of a score (the last one if not given).
+        """
+        if score is None:
+            score = self._last_score
+        if score > MATE_LIMIT:
+            return "win in {}".format(WIN_SCORE - score)
+        if score < -MATE_LIMIT:
+            return "loss in {}".format(WIN_SCORE + score)
+        return "{:+d}".format(score)
+
+    def report(self) -> str:
+        """
+        A one line summary of the last search.
+        """
+        return "depth {}, score {}, {:,} nodes in {:.3f}s ({:,.0f} nodes/s)".format(
+            self._last_depth, self.describe_score(), self._last_nodes, self._last_seconds,
+            self._last_nodes / self._last_seconds if self._last_seconds > 0 else 0.0)
+
+    #
+    # The search
+    #
+
+    def _ordered(self, index:int, tt_move:int) -> list[tuple[int,int]]:
+        """
+        The legal (move, next state) pairs, best looking first.
+        """
+        def rank(pair:tuple[int,int]) -> int:
+            nxt = pair[1]
+            if tt_move >= 0 and canonical(nxt << 1) >> 1 == tt_move:
+                return -2 * WIN_SCORE    # The best move from the table
+            if nxt < 25:
+                return -WIN_SCORE        # Wins right now
+            return _evaluate(nxt)        # Lower is worse for them, so better for us
+        return sorted(SUCCESSORS[index], key=rank)
+
+    def _negamax(self, index:int, depth:int, ply:int, alpha:int, beta:int) -> int:
+        """
+        The score of a state for the player moving, searching 'depth' moves ahead.
+        """
+        self._nodes += 1
+        if self._nodes % CHECK_NODES == 0 and perf_counter() >= self._deadline:
+            raise _OutOfTime()
+        if index < 25:      # The player moving has been tapped out
+            return -(WIN_SCORE - ply)
+        if depth == 0:
+            return _evaluate(index)
+        key = canonical(index << 1) >> 1
+        slot = key % self._tt_size
+        tt_move = -1
+        if self._tt_key[slot] == key:
+            tt_move = self._tt_move[slot]
+            if self._tt_depth[slot] >= depth:
+                score = self._tt_score[slot]
+                # Win/loss scores are saved as the distance from this state, so adjust them for the ply
+                if score > MATE_LIMIT:
+                    score -= ply
+                elif score < -MATE_LIMIT:
+                    score += ply
+                kind = self._tt_type[slot]
+                if kind == EXACT or (kind == LOWER and score >= beta) or (kind == UPPER and score <= alpha):
+                    return score
+        original_alpha = alpha
+        repeats = self._repeats
+        best = -2 * WIN_SCORE
+        best_next = -1
+        # The path is keyed on the position value (see cs_position.pack), with the side taken from
+        # the ply, so the same hands with the other player moving are not a repeat.
+        side = ply & 1
+        self._path.add((index << 1) | side)
+        try:
+            for _, nxt in self._ordered(index, tt_move):
+                if ((nxt << 1) | (side ^ 1)) in self._path:
+                    self._repeats += 1
+                    score = 0               # Back to a position on this line: a draw
+                else:
+                    score = -self._negamax(nxt, depth - 1, ply + 1, -beta, -alpha)
+                if score > best:
+                    best = score
+                    best_next = nxt
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            break
+        finally:
+            self._path.discard((index << 1) | side)
+        # Save the result (if it doesn't depend on a repeat) and the best move
+        if self._tt_key[slot] != key or self._tt_depth[slot] <= depth:
+            self._tt_key[slot] = key
+            self._tt_move[slot] = canonical(best_next << 1) >> 1
+            if self._repeats == repeats:
+                saved = best
+                if saved > MATE_LIMIT:
+                    saved += ply
+                elif saved < -MATE_LIMIT:
+                    saved -= ply
+                self._tt_depth[slot] = depth
+                self._tt_score[slot] = saved
+                self._tt_type[slot] = UPPER if best <= original_alpha else LOWER if best >= beta else EXACT
+            else:
+                self._tt_depth[slot] = 0    # Only the move is useful
+        return best
+
+    def search(self, index:int, time_budget:float|None=None) -> int:
+        """
+        Find the best move for a state index (see cs_position.state_index).
+
+        Return: Move code
+        """
+        started = perf_counter()
+        self._deadline = started + (self._time_budget if time_budget is None else time_budget)
+        self._nodes = 0
+        moves = SUCCESSORS[index]
+        best_move = moves[0][0]
+        best_score = 0
+        depth_done = 0
+        for depth in range(1, self._max_depth + 1):
+            try:
+                alpha = -2 * WIN_SCORE
+                depth_best = best_move
+                self._path.add(index << 1)     # The root is side 0 (see _negamax)
+                try:
+                    # Search the root moves here, so the move (not just the score) is known
+                    key = canonical(index << 1) >> 1
+                    tt_move = self._tt_move[key % self._tt_size] if self._tt_key[key % self._tt_size] == key else -1
+                    for move, nxt in self._ordered(index, tt_move):
+                        if ((nxt << 1) | 1) in self._path:
+                            score = 0
+                        else:
+                            score = -self._negamax(nxt, depth - 1, 1, -2 * WIN_SCORE, -alpha)
+                        if score > alpha:
+                            alpha = score
+                            depth_best = move
+                finally:
+                    self._path.discard(index << 1)
+            except _OutOfTime:
+                break
+            best_move, best_score, depth_done = depth_best, alpha, depth
+            if abs(best_score) > MATE_LIMIT and WIN_SCORE - abs(best_score) < depth:
+                break       # A win (or loss) that a deeper search can't change
+        seconds = perf_counter() - started
+        self._moves += 1
+        self._last_nodes = self._nodes
+        self._last_seconds = seconds
+        self._last_depth = depth_done
+        self._last_score = best_score
+        self._total_nodes += self._nodes
+        self._total_seconds += seconds
+        return best_move
+
+    #
+    # The same methods as MoveMaster
+    #
+
+    def choose(self, position:int) -> int:
+        """
+        Generate a move for a packed position value (see cs_position).
+
+        Returns:
+            Move code (see cs_position.Move)
+        """
+        return self.search(position >> 1)
+
+    def get_move(self, from_hands:'Hands', to_hands:'Hands') -> str:
+        """
+        Generate a move.
+
+        Parameters:
+            from_hands: The hands the fingers are coming from.
+            to_hands: The hands being tapped.
+        Returns:
+            move (S, LL, LR, RL, RR)
+        """
+        index = state_index(from_hands.left.fingers, from_hands.right.fingers,
+                            to_hands.left.fingers, to_hands.right.fingers)
+        return MOVE_NAMES[self.search(index)]
+
+    def get_position_move(self, position:'Position') -> str:
+        """
+        Generate a move for a Position (from the point of view of the side moving).
+
+        Returns:
+            move (S, LL, LR, RL, RR)
+        """
+        return MOVE_NAMES[self.search(position.index)]
@@ -0,0 +1,272 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_selfplay.py
+
+This file contains a 'headless' game engine that lets the computer play
+itself. There is no printing, no input and no pauses, so it can play a very
+large number of games to see how well different strategies do.
+
+A player (a 'policy') is any object with a `choose(position:int) -> int`
+method that takes a packed position (see cs_position) and returns a Move
+code. `MoveMaster` is one, and `RandomPolicy` below is another.
+
+Example:
+    a, b = master_pair(seed=1, b_random_pcnt=50)
+    tally = SelfPlay(a, b).tally(100000)
+"""
+from cs_instrument import Instrumentation
+from cs_move_gen import MoveMaster, MovesData
+from cs_position import LEGAL_MOVES, MOVE_NAMES, NEXT, pack
+from cs_records import NO_PARAMS, RecordWriter, move_byte
+import cs_exceptions as cse
+
+import random
+from typing import TYPE_CHECKING, Iterator, NamedTuple, Protocol
+if TYPE_CHECKING:
+    from cs_store import StatsStore
+
+MAX_MOVES = 200                 # Moves (by both players) before a game is called a draw
+START = pack(1, 1, 1, 1)        # Everyone starts with one finger out on each hand
+
+class Policy(Protocol):
+    """
+    What the engine needs from a player.
+    """
+    def choose(self, position:int) -> int: ...
+
+class GameResult(NamedTuple):
+    """
+    The result of one game.
+
+    winner: 0 if player 'a' won, 1 if player 'b' won, or None for a draw (too many moves).
+    moves: The number of moves made (by both players).
+    random_moves: The (a, b) random moves used (see MoveMaster.random_moves).
+    random_splits: The (a, b) random splits used (see MoveMaster.random_splits).
+    """
+    winner: int|None
+    moves: int
+    random_moves: tuple[int,int]
+    random_splits: tuple[int,int]
+
+class Tally:
+    """
+    Totals for a number of games (so a result doesn't need to be kept for each game).
+    """
+
+    def __init__(self) -> None:
+        self.games:int = 0
+        self.wins:list[int] = [0, 0]            # Wins for player 'a' and 'b'
+        self.draws:int = 0
+        self.moves:int = 0
+        self.random_moves:list[int] = [0, 0]
+        self.random_splits:list[int] = [0, 0]
+        return
+
+    def add(self, other:'Tally') -> 'Tally':
+        """
+        Add the totals from another Tally to this one.
+        """
+        self.games += other.games
+        self.draws += other.draws
+        self.moves += other.moves
+        for i in (0, 1):
+            self.wins[i] += other.wins[i]
+            self.random_moves[i] += other.random_moves[i]
+            self.random_splits[i] += other.random_splits[i]
+        return self
+
+    def __repr__(self) -> str:
+        return "Tally(games={}, wins={}, draws={}, moves={}, random_moves={}, random_splits={})".format(
+            self.games, self.wins, self.draws, self.moves, self.random_moves, self.random_splits)
+
+class RandomPolicy:
+    """
+    A player that picks any legal move, at random.
+    """
+
+    def __init__(self, rng:'random.Random|None'=None) -> None:
+        self._rng = rng if rng is not None else random.Random()
+        return
+
+    def choose(self, position:int) -> int:
+        legal = LEGAL_MOVES[position]
+        return legal[int(self._rng.random() * len(legal))][0]
+
+def master_pair(seed:int, a_split_pcnt:int=20, a_random_pcnt:int=5,
+                b_split_pcnt:int=20, b_random_pcnt:int=5,
+                instruments:'tuple[Instrumentation,Instrumentation]|None'=None,
+                a_moves:'MovesData|None'=None, b_moves:'MovesData|None'=None) -> tuple['MoveMaster','MoveMaster']:
+    """
+    Create two MoveMasters with their own random number generators, both
+    from the seed. The same seed always gives the same games.
+
+    If 'instruments' is given, they are used for the (a, b) MoveMasters (see cs_instrument).
+    If 'a_moves' or 'b_moves' is given, it is used rather than cs_moves.MOVES.
+    """
+    inst_a, inst_b = instruments if instruments is not None else (None, None)
+    a = MoveMaster(a_split_pcnt, a_random_pcnt, rng=random.Random(seed * 2), instrument=inst_a, moves=a_moves)
+    b = MoveMaster(b_split_pcnt, b_random_pcnt, rng=random.Random(seed * 2 + 1), instrument=inst_b, moves=b_moves)
+    return (a, b)
+
+def _counter(player:object, name:str) -> int:
+    """
+    Read one of the MoveMaster counters, or 0 for a player that doesn't keep it.
+    """
+    return getattr(player, name, 0)
+
+class SelfPlay:
+    """
+    Plays games between two players, with no I/O.
+    """
+
+    def __init__(self, player_a:'Policy', player_b:'Policy', max_moves:int=MAX_MOVES,
+                 alternate_first:bool=True, writer:'RecordWriter|None'=None, seed:int=0,
+                 params:tuple[int,int,int,int]=NO_PARAMS, store:'StatsStore|None'=None,
+                 names:tuple[str,str]=('a', 'b')) -> None:
+        """
+        Parameters:
+            player_a: The first player.
+            player_b: The second player. It must be a different object from 'player_a' (the
+                random move counters of each are kept for its side).
+            max_moves: Moves before a game is called a draw.
+            alternate_first: Take turns moving first (game 0 'a' goes first, game 1 'b' does, ...)
+                If False, 'a' always goes first.
+            writer: Keep every game played (see cs_records). This makes the games slower.
+            seed, params: The seed and (a split, a random, b split, b random) percentages
+                of the players, for the game records. The seed is the session seed (the one
+                given to master_pair) - it is the same for every game (see cs_records).
+            store: Add the result of every game to a statistics store (see cs_store).
+            names: The players' names (for the store).
+        """
+        if player_a is player_b:
+            raise ValueError("A player can't play itself. Use two players (see master_pair).")
+        self._players:tuple[Policy,Policy] = (player_a, player_b)
+        self._max_moves = max_moves
+        self._alternate = alternate_first
+        self._games_played = 0
+        self._writer = writer
+        self._seed = seed
+        self._params = params
+        self._store = store
+        self._names = names
+        # Recording needs its own loop (so the loop without it stays as fast as it can be)
+        self._game = self._run if writer is None else self._run_recorded
+        self._play = self._game if store is None else self._run_stored
+        return
+
+    def _run(self, first:int) -> tuple[int|None,int]:
+        """
+        Play one game. This is the 'hot' loop, so everything used is in a local variable.
+
+        Return: (winner, moves)
+        """
+        nxt = NEXT
+        choose = (self._players[first].choose, self._players[first ^ 1].choose)  # Indexed by the side moving
+        position = START
+        for moves in range(1, self._max_moves + 1):
+            side = position & 1
+            move = choose[side](position)
+            position = nxt[position * 5 + move]
+            if position < 50:      # The side now moving has no fingers (state index < 25)
+                if position < 0:
+                    raise cse.MoveNotAllowed("Player {} made an illegal move ({}).".format(
+                        "ab"[side ^ first], MOVE_NAMES[move]))
+                return (side ^ first, moves)
+        return (None, self._max_moves)
+
+    def _run_recorded(self, first:int) -> tuple[int|None,int]:
+        """
+        Play one game, the same as `_run`, and add it to the writer.
+
+        Return: (winner, moves)
+        """
+        nxt = NEXT
+        players = (self._players[first], self._players[first ^ 1])
+        moves = bytearray()
+        position = START
+        winner:int|None = None
+        for count in range(1, self._max_moves + 1):
+            side = position & 1
+            player = players[side]
+            move = player.choose(position)
+            moves.append(move_byte(move, getattr(player, 'last_path', None)))
+            position = nxt[position * 5 + move]
+            if position < 50:
+                if position < 0:
+                    raise cse.MoveNotAllowed("Player {} made an illegal move ({}).".format(
+                        "ab"[side ^ first], MOVE_NAMES[move]))
+                winner = side ^ first
+                break
+        self._writer.add(moves, winner, first, self._seed, self._params)  # type: ignore (only used with a writer)
+        return (winner, len(moves))
+
+    def _run_stored(self, first:int) -> tuple[int|None,int]:
+        """
+        Play one game (with `_run` or `_run_recorded`) and add its result to the store.
+
+        Return: (winner, moves)
+        """
+        a, b = self._players
+        before = (_counter(a, 'random_moves'), _counter(a, 'random_splits'),
+                  _counter(b, 'random_moves'), _counter(b, 'random_splits'))
+        winner, moves = self._game(first)
+        a_moves = (moves + 1 - first) // 2     # The player that goes first makes the extra move
+        self._store.record_game(self._names[0], self._names[1], winner, a_moves, moves - a_moves,  # type: ignore (only used with a store)
+                                (_counter(a, 'random_moves') - before[0], _counter(a, 'random_splits') - before[1]),
+                                (_counter(b, 'random_moves') - before[2], _counter(b, 'random_splits') - before[3]))
+        return (winner, moves)
+
+    def _next_first(self) -> int:
+        first = (self._games_played & 1) if self._alternate else 0
+        self._games_played += 1
+        return first
+
+    def play_game(self) -> 'GameResult':
+        """
+        Play a game and return its result.
+        """
+        a, b = self._players
+        before = (_counter(a, 'random_moves'), _counter(b, 'random_moves'),
+                  _counter(a, 'random_splits'), _counter(b, 'random_splits'))
+        winner, moves = self._play(self._next_first())
+        return GameResult(winner, moves,
+                          (_counter(a, 'random_moves') - before[0], _counter(b, 'random_moves') - before[1]),
+                          (_counter(a, 'random_splits') - before[2], _counter(b, 'random_splits') - before[3]))
+
+    def play_games(self, count:int) -> Iterator['GameResult']:
+        """
+        Play a number of games, producing the result of each.
+        """
+        for _ in range(count):
+            yield self.play_game()
+        return
+
+    def tally(self, count:int) -> 'Tally':
+        """
+        Play a number of games and return the totals. This is faster than
+        `play_games` because a result isn't created for each game.
+        """
+        tally = Tally()
+        a, b = self._players
+        tally.random_moves = [-_counter(a, 'random_moves'), -_counter(b, 'random_moves')]
+        tally.random_splits = [-_counter(a, 'random_splits'), -_counter(b, 'random_splits')]
+        run = self._play
+        next_first = self._next_first
+        wins = tally.wins
+        for _ in range(count):
+            winner, moves = run(next_first())
+            tally.moves += moves
+            if winner is None:
+                tally.draws += 1
+            else:
+                wins[winner] += 1
+        tally.games = count
+        tally.random_moves[0] += _counter(a, 'random_moves')
+        tally.random_moves[1] += _counter(b, 'random_moves')
+        tally.random_splits[0] += _counter(a, 'random_splits')
+        tally.random_splits[1] += _counter(b, 'random_splits')
+        return tally
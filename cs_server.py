@@ -0,0 +1,299 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_server.py
+
+This file contains a ChopStix game server. `Game.play` waits for `input()`
+and pauses with `time.sleep`, so a process can only play one person at a
+time. The server uses 'asyncio' instead: each connection is a 'coroutine'
+that gives up the processor while it waits (for a line from the player, or
+while the computer is 'thinking'), so one process can play thousands of
+games at once.
+
+The protocol is lines of text. The player sends the same commands as the
+keyboard game:
+    S, LL, LR, RL, RR   A move
+    W                   Why - how the computer picked its last move
+    H                   Hint - the player's moves, best first
+    N                   Start a new game
+    Q                   Quit
+    NAME <name>         The player's name, for the statistics store (up to 32 characters).
+                        Until it is sent, the player is 'Player@<their address>'.
+The server sends:
+    HELLO ChopStix <version>
+    HANDS <my left> <my right> <your left> <your right>     (at the start of each turn)
+    TURN <the valid moves, separated by commas>     It is the player's move
+    MOVE <move>                                     The computer's move
+    WHY <text>
+    HINT <rank> <move> <text>                       One line for each move, best first
+    ERROR <text>                                    The command wasn't valid/allowed (send another one)
+    OVER <WON|LOST> <moves>                         The game is over (the player WON or LOST)
+    SCORE <player wins> <computer wins> <games>
+    BYE
+After OVER (and SCORE) the next game starts. The player moves first.
+
+Each session is a `Game` (see cs_game), with a sink that turns the game's
+output into protocol lines and no pacing - the computer's 'thinking' pause
+is an `asyncio.sleep`, so the other sessions keep going. Every session
+shares the same MoveMaster, so the strategy tables (see cs_move_gen) are
+only in memory once.
+
+With a statistics store (see cs_store), the sessions share it, and the games
+are written in batches. A timer writes the waiting games every 'max_delay'
+seconds, so they aren't kept in memory while the server is quiet.
+
+Run it from the command line:
+    python3 cs_server.py --port 7878
+and try it with 'telnet localhost 7878' (or 'nc'), or load it with cs_loadgen.
+"""
+from cs_game import Game, GameState, SHORT_PAUSE, __version__
+from cs_io import NoPacing
+from cs_move_gen import MoveMaster
+from cs_store import StatsStore
+
+import argparse
+import asyncio
+import random
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from cs_hands import Hands
+    from cs_hints import Suggestion
+
+DEFAULT_PORT = 7878
+LINE_LIMIT = 256            # The longest line accepted (keeps the read buffers small)
+NAME_LIMIT = 32             # The longest player name
+NO_PACING = NoPacing()
+
+class ProtocolSink:
+    """
+    Writes a Game's output as protocol lines (see cs_io.OutputSink), and
+    keeps the session's score. Kept small, as there can be thousands of them.
+    """
+    __slots__ = ('_writer', 'wins', 'losses', 'games')
+
+    def __init__(self, writer:'asyncio.StreamWriter') -> None:
+        self._writer = writer
+        self.wins:int = 0       # Games the player won
+        self.losses:int = 0     # Games the player lost
+        self.games:int = 0
+        return
+
+    def hands(self, us:'Hands', them:'Hands') -> None:
+        self._writer.write("HANDS {} {} {} {}\n".format(
+            us.left.fingers, us.right.fingers, them.left.fingers, them.right.fingers).encode())
+        return
+
+    def our_move(self, move:str) -> None:
+        self._writer.write("MOVE {}\n".format(move).encode())
+        return
+
+    def invalid_command(self, command:str) -> None:
+        self._writer.write("ERROR The move '{}' is not valid.\n".format(command.strip()).encode())
+        return
+
+    def not_allowed(self, reason:str) -> None:
+        self._writer.write("ERROR That move isn't allowed. {}\n".format(reason).encode())
+        return
+
+    def why(self, text:str) -> None:
+        self._writer.write("WHY {}\n".format(text).encode())
+        return
+
+    def hint(self, suggestions:list['Suggestion']) -> None:
+        self._writer.write("".join("HINT {} {} {}\n".format(s.rank, s.move, s.explanation)
+                                   for s in suggestions).encode())
+        return
+
+    def game_over(self, they_won:bool, moves:int) -> None:
+        if they_won:
+            self.wins += 1
+        else:
+            self.losses += 1
+        self.games += 1
+        self._writer.write("OVER {} {}\nSCORE {} {} {}\n".format(
+            "WON" if they_won else "LOST", moves, self.wins, self.losses, self.games).encode())
+        return
+
+    def stats(self, lines:list[str]) -> None:
+        return
+
+class ChopStixServer:
+    """
+    Plays ChopStix with many players at once.
+    """
+
+    def __init__(self, host:str='127.0.0.1', port:int=DEFAULT_PORT, think_time:float=SHORT_PAUSE,
+                 favor_split_pcnt:int=20, favor_random_pcnt:int=5, seed:int|None=None,
+                 store:'StatsStore|None'=None) -> None:
+        """
+        Parameters:
+            host: The address to listen on.
+            port: The port to listen on (0 to pick a free one, see `port`).
+            think_time: Seconds the computer 'thinks' before it moves (it doesn't block other sessions).
+            favor_split_pcnt, favor_random_pcnt: The MoveMaster settings.
+            seed: The seed for the computer's random moves.
+            store: Keeps the result of every game (see cs_store). The sessions share
+                it, so the games are written in batches.
+        """
+        self._host = host
+        self._port = port
+        self._think_time = think_time
+        self._strategy = MoveMaster(favor_split_pcnt, favor_random_pcnt, rng=random.Random(seed))
+        self._server:'asyncio.base_events.Server|None' = None
+        self._store = store
+        self._flusher:'asyncio.Task|None' = None     # Writes the store's waiting games on a timer
+        # Stats
+        self._active = 0
+        self._peak = 0
+        self._sessions = 0
+        self._games = 0
+        return
+
+    @property
+    def port(self) -> int:
+        """
+        The port being listened on (once started).
+        """
+        if self._server is not None and self._server.sockets:
+            return self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    @property
+    def active_sessions(self) -> int:
+        return self._active
+
+    @property
+    def peak_sessions(self) -> int:
+        return self._peak
+
+    @property
+    def total_sessions(self) -> int:
+        return self._sessions
+
+    @property
+    def games(self) -> int:
+        """
+        The games finished (by all of the sessions).
+        """
+        return self._games
+
+    async def start(self, backlog:int=4096) -> None:
+        """
+        Start listening.
+        """
+        self._server = await asyncio.start_server(self._handle, self._host, self._port,
+                                                  limit=LINE_LIMIT, backlog=backlog)
+        if self._store is not None and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_store(self._store))
+        return
+
+    async def _flush_store(self, store:'StatsStore') -> None:
+        """
+        Write the store's waiting games when they have waited long enough (runs until the server is closed).
+        """
+        interval = max(0.1, store.max_delay / 2)
+        while True:
+            await asyncio.sleep(interval)
+            store.flush_if_due()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:  # type: ignore (started above)
+            await self._server.serve_forever()  # type: ignore
+        return
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._store is not None:
+            self._store.flush()
+        return
+
+    #
+    # A session
+    #
+
+    async def _handle(self, reader:'asyncio.StreamReader', writer:'asyncio.StreamWriter') -> None:
+        self._active += 1
+        self._sessions += 1
+        self._peak = max(self._peak, self._active)
+        peer = writer.get_extra_info('peername')
+        player = "Player@{}".format(peer[0] if isinstance(peer, tuple) else (peer or 'unknown'))
+        game = Game(sink=ProtocolSink(writer), pacing=NO_PACING, strategy=self._strategy, store=self._store,
+                    names=('ChopStix', player))
+        try:
+            writer.write("HELLO ChopStix {}\n".format(__version__).encode())
+            game.start_game()
+            while True:
+                game.begin_turn()
+                writer.write("TURN {}\n".format(",".join(game.valid_moves())).encode())
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break   # They disconnected
+                command = line.decode(errors='replace').strip()
+                if command[:5].upper() == 'NAME ':
+                    name = command[5:].strip()
+                    if name and len(name) <= NAME_LIMIT:
+                        game.set_their_name(name)
+                    else:
+                        writer.write("ERROR A name is 1 to {} characters.\n".format(NAME_LIMIT).encode())
+                    continue
+                state = game.submit(command)
+                if state == GameState.OUR_TURN:
+                    if self._think_time > 0:
+                        await asyncio.sleep(self._think_time)   # Other sessions run while we 'think'
+                    state = game.our_move()
+                if state == GameState.QUIT:
+                    break
+                if state == GameState.OVER:
+                    self._games += 1
+                    game.start_game()
+            writer.write(b"BYE\n")
+            await writer.drain()
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError):
+            pass    # They went away, or sent a line that was too long
+        finally:
+            self._active -= 1
+            writer.close()
+        return
+
+async def _main(args:'argparse.Namespace') -> None:
+    store = StatsStore(args.store) if args.store else None
+    server = ChopStixServer(args.host, args.port, args.think, args.split, args.random, args.seed, store)
+    await server.start(args.backlog)
+    print("ChopStix server listening on {}:{}".format(args.host, server.port))
+    try:
+        await server.serve_forever()
+    finally:
+        if store is not None:
+            store.close()
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve ChopStix games over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--think', type=float, default=SHORT_PAUSE, help="Seconds the computer 'thinks' for each move")
+    parser.add_argument('--split', type=int, default=20, help="favor_split_pcnt")
+    parser.add_argument('--random', type=int, default=5, help="favor_random_pcnt")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--backlog', type=int, default=4096)
+    parser.add_argument('--store', metavar='FILE', help="Keep the results in a statistics database (see cs_store)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_solver.py
+
+This file contains a 'solver' that works out the perfect-play result of every
+ChopStix position, and a `Tablebase` class to look up the results.
+
+The solver uses 'retrograde analysis' (working backwards). It starts with the
+positions where the game is over, and works back from them:
+ - A position is a WIN if there is a move to a position that is a LOSS (for the other player).
+ - A position is a LOSS if every move goes to a position that is a WIN (for the other player).
+ - Anything that is never labeled a WIN or a LOSS is a DRAW. Perfect play
+   from there goes around in circles forever.
+
+Working backwards this way handles the circles (cycles) that ChopStix
+positions form - something that a simple 'look ahead' search can get stuck in.
+
+The moves for the standard rules come from the cs_position tables, so the
+rules are the same as `Game.move`. Other variants (see cs_rules) use
+`Rules.moves`. For very large variants, see cs_big_solver.
+"""
+from cs_canonical import CLASS_COUNT, CLASS_OF, shrink
+from cs_position import LEGAL_MOVES, STATE_COUNT
+from cs_rules import STANDARD, Rules
+from typing import Callable, Sequence
+
+from collections import deque
+from enum import IntEnum, unique
+
+@unique
+class Outcome(IntEnum):
+    """
+    The result of a position, for the player that is moving, with perfect play.
+    """
+    DRAW = 0
+    WIN  = 1
+    LOSS = 2
+
+MAX_DISTANCE = 127  # The most moves to the end of the game that can be kept in a byte
+
+def encode(outcome:'Outcome', distance:int) -> int:
+    """
+    Encode an outcome and a distance-to-mate into a single byte value.
+
+        0: DRAW
+        Otherwise: 1 + (distance * 2) + (1 if WIN else 0)
+    """
+    if outcome == Outcome.DRAW:
+        return 0
+    if distance > MAX_DISTANCE:
+        raise ValueError("Distance {} is too large to encode.".format(distance))
+    return 1 + (distance << 1) + (1 if outcome == Outcome.WIN else 0)
+
+# The legal (move, next state index) pairs for each state index (the side doesn't matter here)
+SUCCESSORS:tuple[tuple[tuple[int,int],...],...] = tuple(
+    tuple((m, n >> 1) for m, n in LEGAL_MOVES[i << 1]) for i in range(STATE_COUNT))
+
+def successors(index:int) -> tuple[tuple[int,int],...]:
+    """
+    All of the legal (move, next state index) pairs for a state index.
+    """
+    return SUCCESSORS[index]
+
+def _is_over(index:int, rules:'Rules'=STANDARD) -> 'Outcome|None':
+    """
+    If the game is over in this state, the outcome for the player to move.
+    """
+    if rules.is_lost(index):
+        return Outcome.LOSS   # We have been tapped out
+    if rules.is_won(index):
+        return Outcome.WIN    # They have been tapped out (the game would have ended already)
+    return None
+
+def solve(rules:'Rules'=STANDARD) -> bytes:
+    """
+    Solve every position (state index) and return one encoded byte for each (see `encode`).
+
+    Parameters:
+        rules: The variant to solve. The position indexes are `rules.index`.
+    """
+    count = rules.state_count
+    moves_of:Callable[[int], Sequence[tuple[object,int]]] = successors if rules == STANDARD else rules.moves
+    # The moves into each state (backwards)
+    preds:list[list[int]] = [[] for _ in range(count)]
+    outcomes:list[Outcome|None] = [None] * count
+    distances:list[int] = [0] * count
+    remaining:list[int] = [0] * count   # Number of moves not known to go to a WIN (for the other player)
+    queue:deque[int] = deque()
+    for index in range(count):
+        over = _is_over(index, rules)
+        if over is not None:
+            outcomes[index] = over
+            queue.append(index)
+            continue
+        moves = moves_of(index)
+        remaining[index] = len(moves)
+        for _, nxt in moves:
+            preds[nxt].append(index)  # One entry per move, so 'remaining' counts down correctly
+    #
+    # Work back from the finished games. The queue is in order of distance, so the
+    # first time a position is labeled a WIN it is with the fastest win, and a
+    # LOSS is only labeled once the slowest loss is known.
+    #
+    while queue:
+        index = queue.popleft()
+        outcome = outcomes[index]
+        for prev in preds[index]:
+            if outcomes[prev] is not None:
+                continue
+            if outcome == Outcome.LOSS:
+                # The player moving in 'prev' can move here and win
+                outcomes[prev] = Outcome.WIN
+                distances[prev] = distances[index] + 1
+                queue.append(prev)
+            else:
+                remaining[prev] -= 1
+                if remaining[prev] == 0:
+                    # Every move from 'prev' lets the other player win
+                    outcomes[prev] = Outcome.LOSS
+                    distances[prev] = distances[index] + 1
+                    queue.append(prev)
+    data = bytearray(count)
+    for index in range(count):
+        outcome = outcomes[index]
+        data[index] = encode(Outcome.DRAW if outcome is None else outcome, distances[index])
+    return bytes(data)
+
+
+class Tablebase:
+    """
+    Look up the perfect-play results of the positions.
+
+    The results are held as one byte per canonical state (see `encode` and
+    cs_canonical) - mirrored hands have the same result, so there is no need to
+    keep them more than once. Any bytes-like object can be used, so the data can
+    come from a file, or from `solve` (one byte per state index, which is shrunk).
+    """
+
+    def __init__(self, data:'bytes|bytearray|memoryview') -> None:
+        if len(data) == STATE_COUNT:
+            data = bytes(shrink(data))
+        if len(data) != CLASS_COUNT:
+            raise ValueError("Tablebase data must have {} (or {}) entries, not {}.".format(
+                CLASS_COUNT, STATE_COUNT, len(data)))
+        self._data = data
+        self._class_of = CLASS_OF
+        self._moves = SUCCESSORS   # The legal moves for each state, so finding the best move doesn't need to try moves
+        return
+
+    @property
+    def data(self) -> 'bytes|bytearray|memoryview':
+        """
+        The encoded data (one byte per canonical state, indexed by class number - see cs_canonical).
+        """
+        return self._data
+
+    def outcome(self, index:int) -> 'Outcome':
+        """
+        The outcome (for the player moving) of a state index.
+        """
+        value = self._data[self._class_of[index]]
+        if value == 0:
+            return Outcome.DRAW
+        return Outcome.WIN if (value - 1) & 1 else Outcome.LOSS
+
+    def distance(self, index:int) -> int:
+        """
+        The number of moves (by both players) until the game ends, with perfect play.
+        A DRAW has a distance of 0.
+        """
+        value = self._data[self._class_of[index]]
+        return 0 if value == 0 else (value - 1) >> 1
+
+    def best_move(self, index:int) -> int|None:
+        """
+        The best move (Move code) for a state index, or None if the game is over.
+
+        For a WIN, the fastest win. For a LOSS, the slowest loss (to give the other
+        player the most chances to go wrong). For a DRAW, a move that keeps the draw.
+        """
+        best:int|None = None
+        best_rank = 0
+        for move, nxt in self._moves[index]:
+            rank = self._rank(nxt)
+            if best is None or rank > best_rank:
+                best = move
+                best_rank = rank
+        return best
+
+    def move_keeps_outcome(self, index:int, move:int) -> bool:
+        """
+        Check that a move doesn't make the outcome worse for the player moving.
+        (a WIN stays a WIN, and a DRAW doesn't become a LOSS).
+        """
+        outcome = self.outcome(index)
+        for mv, nxt in self._moves[index]:
+            if mv == move:
+                after = self.outcome(nxt)  # This is for the other player
+                if outcome == Outcome.WIN:
+                    return after == Outcome.LOSS
+                if outcome == Outcome.DRAW:
+                    return after != Outcome.WIN
+                return True
+        return False
+
+    def _rank(self, nxt:int) -> int:
+        """
+        How good moving to 'nxt' is for the player moving (bigger is better).
+        """
+        outcome = self.outcome(nxt)   # This is for the other player
+        distance = self.distance(nxt)
+        if outcome == Outcome.LOSS:
+            return 1000 - distance    # They lose - the sooner the better
+        if outcome == Outcome.DRAW:
+            return 500
+        return distance               # They win - the later the better
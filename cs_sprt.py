@@ -0,0 +1,281 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_sprt.py
+
+This file contains an 'A/B test' for MoveMaster configurations: is a new
+MOVES table (or new favor_split_pcnt/favor_random_pcnt values) better than
+the old one?
+
+Playing a fixed (large) number of games and looking at the win rate works,
+but most of the games are wasted - a big improvement (or a clear step back)
+shows after a few thousand games. So the games are played in batches, and
+after each batch a 'Sequential Probability Ratio Test' (SPRT) decides if
+there is enough to stop:
+
+    H0: 'a' wins p0 of the games against 'b' (0.5 - no better)
+    H1: 'a' wins p1 of the games against 'b' (a bit better, 0.52 by default)
+
+For each game that has a winner the 'log likelihood ratio' (LLR) goes up by
+ln(p1/p0) if 'a' won, and down by ln((1-p1)/(1-p0)) if 'b' won. (Draws don't
+say which is better, so they are left out.) When the LLR gets to the upper
+bound, ln((1-beta)/alpha), H1 is accepted - 'a' is better. When it gets to the
+lower bound, ln(beta/(1-alpha)), H0 is accepted. 'alpha' is the chance of
+saying 'a' is better when it isn't, and 'beta' the chance of missing it when
+it is.
+
+The report shows the games the test took, the decisive games (games with a
+winner) it is expected to take (Wald's formula, if H0 or H1 is true), and the
+decisive games a test with a fixed number of games would need for the same
+alpha and beta. Draws come on top of these.
+
+The games come from cs_vector_sim, with a seed for each batch (from the seed
+of the test - see cs_tournament.shard_seed), so a test with the same seed
+plays the same games and gets the same result.
+
+Run it from the command line:
+    python3 cs_sprt.py --a 20/5:new_moves.py --b 20/5 --p1 0.52 --seed 1
+(The entrants are given as in cs_ladder: 'split/random' or 'split/random:moves_module.py')
+"""
+from cs_ladder import Entrant, load_moves
+from cs_tournament import shard_seed
+from cs_vector_sim import simulate
+
+import argparse
+from enum import Enum
+import math
+from statistics import NormalDist
+from typing import Callable, NamedTuple
+
+BATCH = 1000            # Games in each batch (even, so each player moves first in half of them)
+MAX_GAMES = 1000000     # Stop (with no decision) after this many games
+
+class Decision(Enum):
+    H0 = 'H0'               # 'a' is not better
+    H1 = 'H1'               # 'a' is better
+    UNDECIDED = 'undecided' # MAX_GAMES were played first
+
+class SprtResult(NamedTuple):
+    """
+    The result of a test.
+
+    decision: The hypothesis accepted.
+    llr: The log likelihood ratio when the test stopped.
+    lower, upper: The bounds of the LLR.
+    games: The games played.
+    a_wins, b_wins, draws: The results.
+    batches: The batches played.
+    expected_h0, expected_h1: The decisive games (with a winner) the test is expected to take if H0 (or H1) is true.
+    fixed_games: The decisive games a fixed-size test would need for the same alpha and beta.
+    """
+    decision: 'Decision'
+    llr: float
+    lower: float
+    upper: float
+    games: int
+    a_wins: int
+    b_wins: int
+    draws: int
+    batches: int
+    expected_h0: float
+    expected_h1: float
+    fixed_games: int
+
+    @property
+    def score(self) -> float:
+        """
+        The part of the games 'a' won (a draw is half a win).
+        """
+        return (self.a_wins + self.draws / 2) / self.games if self.games else 0.0
+
+class Sprt:
+    """
+    The state of a sequential test. Add results with `add` (in any batch sizes), and
+    check `decision` after each one.
+    """
+
+    def __init__(self, p0:float=0.5, p1:float=0.52, alpha:float=0.05, beta:float=0.05) -> None:
+        """
+        Parameters:
+            p0: The part of the games 'a' wins if it is no better (H0).
+            p1: The part of the games 'a' wins if it is better (H1). It must be more than p0.
+            alpha: The chance of accepting H1 when H0 is true.
+            beta: The chance of accepting H0 when H1 is true.
+        """
+        if not 0 < p0 < p1 < 1:
+            raise ValueError("p0 and p1 must be between 0 and 1, with p0 < p1.")
+        if not (0 < alpha < 1 and 0 < beta < 1):
+            raise ValueError("alpha and beta must be between 0 and 1.")
+        self._p0 = p0
+        self._p1 = p1
+        self._alpha = alpha
+        self._beta = beta
+        self._win_step = math.log(p1 / p0)
+        self._loss_step = math.log((1 - p1) / (1 - p0))
+        self._lower = math.log(beta / (1 - alpha))
+        self._upper = math.log((1 - beta) / alpha)
+        self._wins = 0
+        self._losses = 0
+        self._draws = 0
+        return
+
+    @property
+    def lower(self) -> float:
+        return self._lower
+
+    @property
+    def upper(self) -> float:
+        return self._upper
+
+    @property
+    def llr(self) -> float:
+        """
+        The log likelihood ratio of the results so far.
+        """
+        return self._wins * self._win_step + self._losses * self._loss_step
+
+    @property
+    def decision(self) -> 'Decision':
+        """
+        The hypothesis accepted so far (UNDECIDED if the LLR is still between the bounds).
+        """
+        llr = self.llr
+        if llr >= self._upper:
+            return Decision.H1
+        if llr <= self._lower:
+            return Decision.H0
+        return Decision.UNDECIDED
+
+    def add(self, a_wins:int, b_wins:int, draws:int=0) -> 'Decision':
+        """
+        Add results, and get the decision.
+        """
+        self._wins += a_wins
+        self._losses += b_wins
+        self._draws += draws
+        return self.decision
+
+    def expected_games(self, p:float) -> float:
+        """
+        The games (with a winner) the test is expected to take if 'a' wins p of them
+        (Wald's formula - for p0 or p1, or any p not too close to where the LLR doesn't move).
+        """
+        drift = p * self._win_step + (1 - p) * self._loss_step     # How much the LLR moves for each game
+        if abs(drift) < 1e-9:
+            return -self._lower * self._upper / (p * self._win_step ** 2 + (1 - p) * self._loss_step ** 2)
+        # The chance of accepting H1 if 'a' wins p of the games
+        h = _wald_exponent(p, self._p0, self._p1, drift)
+        a, b = math.exp(self._upper * h), math.exp(self._lower * h)
+        accept_h1 = (1 - b) / (a - b)
+        return (accept_h1 * self._upper + (1 - accept_h1) * self._lower) / drift
+
+    def fixed_games(self) -> int:
+        """
+        The games (with a winner) a test of a fixed number of games needs for the same alpha and beta.
+        """
+        z_alpha = NormalDist().inv_cdf(1 - self._alpha)
+        z_beta = NormalDist().inv_cdf(1 - self._beta)
+        p0, p1 = self._p0, self._p1
+        n = ((z_alpha * math.sqrt(p0 * (1 - p0)) + z_beta * math.sqrt(p1 * (1 - p1))) / (p1 - p0)) ** 2
+        return math.ceil(n)
+
+def _wald_exponent(p:float, p0:float, p1:float, drift:float) -> float:
+    """
+    The 'h' (not 0) that makes p * (p1/p0)**h + (1-p) * ((1-p1)/(1-p0))**h == 1. It is 1 for p0
+    and -1 for p1, and is found by bisection for anything else.
+    """
+    if p == p0:
+        return 1.0
+    if p == p1:
+        return -1.0
+    def f(h:float) -> float:
+        return p * (p1 / p0) ** h + (1 - p) * ((1 - p1) / (1 - p0)) ** h - 1
+    # f is convex with f(0) == 0 and a slope of 'drift' there, so the other root is on the other side.
+    # f is below 0 just past 0 on that side, and above 0 far enough out.
+    inside, outside = (1e-12, 1.0) if drift < 0 else (-1e-12, -1.0)
+    while f(outside) < 0:
+        outside *= 2
+    low, high = inside, outside
+    for _ in range(100):
+        middle = (low + high) / 2
+        if f(middle) < 0:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def ab_test(a:'Entrant', b:'Entrant', seed:int=0, p0:float=0.5, p1:float=0.52, alpha:float=0.05,
+            beta:float=0.05, batch:int=BATCH, max_games:int=MAX_GAMES,
+            progress:'Callable[[int,float],None]|None'=None) -> 'SprtResult':
+    """
+    Play batches of games between two entrants until the SPRT decides (see the top of the file).
+
+    Parameters:
+        a: The new configuration.
+        b: The one it is tested against.
+        seed: The seed for the games (the same seed gives the same result).
+        p0, p1, alpha, beta: See Sprt.
+        batch: The games in each batch.
+        max_games: Stop with no decision after this many games.
+        progress: Called after each batch with (games, LLR).
+    """
+    test = Sprt(p0, p1, alpha, beta)
+    a_moves = load_moves(a.table) if a.table else None
+    b_moves = load_moves(b.table) if b.table else None
+    games, a_wins, b_wins, draws, batches = 0, 0, 0, 0, 0
+    decision = Decision.UNDECIDED
+    while games < max_games:
+        tally = simulate(min(batch, max_games - games), shard_seed(seed, 0, 1, batches),
+                         (a.split_pcnt, a.random_pcnt), (b.split_pcnt, b.random_pcnt),
+                         a_moves=a_moves, b_moves=b_moves).tally()
+        batches += 1
+        games += tally.games
+        a_wins += tally.wins[0]
+        b_wins += tally.wins[1]
+        draws += tally.draws
+        decision = test.add(tally.wins[0], tally.wins[1], tally.draws)
+        if progress is not None:
+            progress(games, test.llr)
+        if decision != Decision.UNDECIDED:
+            break
+    return SprtResult(decision, test.llr, test.lower, test.upper, games, a_wins, b_wins, draws, batches,
+                      test.expected_games(p0), test.expected_games(p1), test.fixed_games())
+
+def report(result:'SprtResult') -> str:
+    """
+    The result of a test as text.
+    """
+    verdict = {Decision.H1: "'a' is better (H1)", Decision.H0: "'a' is not better (H0)",
+               Decision.UNDECIDED: "no decision"}[result.decision]
+    return "\n".join((
+        "Result: {}   LLR {:.2f} (bounds {:.2f}, {:.2f})".format(verdict, result.llr, result.lower, result.upper),
+        "Games: {:,} in {} batches   'a' won {:,}, 'b' won {:,}, draws {:,} (score {:.2%})".format(
+            result.games, result.batches, result.a_wins, result.b_wins, result.draws, result.score),
+        "Expected decisive games: {:,.0f} if H0, {:,.0f} if H1   A fixed-size test needs {:,} decisive games".format(
+            result.expected_h0, result.expected_h1, result.fixed_games),
+    ))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="A/B test two MoveMaster configurations with an SPRT.")
+    parser.add_argument('--a', required=True, metavar='SPEC', help="The new configuration ('split/random[:moves_module.py]')")
+    parser.add_argument('--b', default='20/5', metavar='SPEC', help="The configuration to test against")
+    parser.add_argument('--p0', type=float, default=0.5, help="Win rate of 'a' if it is no better")
+    parser.add_argument('--p1', type=float, default=0.52, help="Win rate of 'a' if it is better")
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--batch', type=int, default=BATCH, help="Games in each batch")
+    parser.add_argument('--max-games', type=int, default=MAX_GAMES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="Show the LLR after each batch")
+    args = parser.parse_args()
+    progress = (lambda games, llr: print("  {:>10,} games  LLR {:+.3f}".format(games, llr))) if args.verbose else None
+    result = ab_test(Entrant.parse(args.a), Entrant.parse(args.b), args.seed, args.p0, args.p1,
+                     args.alpha, args.beta, args.batch, args.max_games, progress)
+    print(report(result))
+    return
+
+if __name__ == "__main__":
+    main()
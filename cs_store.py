@@ -0,0 +1,343 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_store.py
+
+This file contains a statistics store that keeps the results of games in a
+SQLite database file, so they last after the program stops (a `Score` is
+only kept in memory).
+
+For each player (by name) it keeps the games, wins, losses and draws, the
+moves they made, and the MoveMaster random moves and random splits. Every
+game is also kept (the 'games' table is only ever added to), so other
+questions can be asked later.
+
+Writing to a database file is slow if each game is its own 'transaction'
+(the database makes sure each one is safely on the disk). So the games are
+kept in memory and written in batches - one transaction for many games
+(`batch_size`, or when the oldest waiting game is 'max_delay' seconds old).
+The player totals are added up in memory for the batch, so each batch only
+updates each player once. With this, the store keeps up with the computer
+playing itself (see cs_selfplay).
+
+The tables:
+    players     id, name, and the totals (games, wins, losses, draws, moves,
+                random_moves, random_splits)
+    games       id, finished (time), player_a, player_b, winner (0 = 'a',
+                1 = 'b', NULL = a draw), and the moves, random moves and random
+                splits of each player
+
+The questions that are asked a lot (a player's totals, the top players, two
+players against each other) use indexes, so they don't read every game.
+
+Run it from the command line to see the stats:
+    python3 cs_store.py stats.db --top 10 --player ChopStix
+or to fill it with games the computer plays against itself:
+    python3 cs_store.py stats.db --selfplay 100000
+"""
+import argparse
+import sqlite3
+import time
+from typing import NamedTuple
+
+SCHEMA_VERSION = 1
+BATCH_SIZE = 1000       # Games written in one transaction
+MAX_DELAY = 5.0         # The most seconds a game waits to be written (checked when a game is recorded)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS players (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        games INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        draws INTEGER NOT NULL DEFAULT 0,
+        moves INTEGER NOT NULL DEFAULT 0,
+        random_moves INTEGER NOT NULL DEFAULT 0,
+        random_splits INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS games (
+        id INTEGER PRIMARY KEY,
+        finished REAL NOT NULL,
+        player_a INTEGER NOT NULL REFERENCES players (id),
+        player_b INTEGER NOT NULL REFERENCES players (id),
+        winner INTEGER,
+        a_moves INTEGER NOT NULL,
+        b_moves INTEGER NOT NULL,
+        a_random_moves INTEGER NOT NULL,
+        a_random_splits INTEGER NOT NULL,
+        b_random_moves INTEGER NOT NULL,
+        b_random_splits INTEGER NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS players_wins ON players (wins DESC)",
+    "CREATE INDEX IF NOT EXISTS games_pair ON games (player_a, player_b, winner)",
+    "CREATE INDEX IF NOT EXISTS games_b ON games (player_b, winner)",
+    "CREATE INDEX IF NOT EXISTS games_finished ON games (finished)",
+)
+
+class PlayerStats(NamedTuple):
+    """
+    The totals for a player.
+    """
+    name: str
+    games: int
+    wins: int
+    losses: int
+    draws: int
+    moves: int
+    random_moves: int
+    random_splits: int
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+class HeadToHead(NamedTuple):
+    """
+    The results of the games between two players.
+    """
+    games: int
+    a_wins: int
+    b_wins: int
+    draws: int
+
+class StatsStore:
+    """
+    Keeps game results in a SQLite database (see the top of the file). Use it
+    in a `with` statement (or call `close`) so the last batch is written.
+    """
+
+    def __init__(self, path:str=':memory:', batch_size:int=BATCH_SIZE, max_delay:float=MAX_DELAY) -> None:
+        """
+        Parameters:
+            path: The database file (it is created if it doesn't exist). ':memory:' for one that isn't kept.
+            batch_size: The games written in one transaction.
+            max_delay: The most seconds a game waits to be written. A batch is written when
+                a game is recorded and the oldest game waiting is this old.
+        """
+        self._batch_size = batch_size
+        self._max_delay = max_delay
+        self._db = sqlite3.connect(path)
+        # 'Write-ahead logging' lets readers keep reading while a batch is written,
+        # and 'NORMAL' only waits for the disk at checkpoints (it is still safe if the program stops).
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError("The database is version {}. Version {} is supported.".format(version, SCHEMA_VERSION))
+        with self._db:
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+            self._db.execute("PRAGMA user_version={}".format(SCHEMA_VERSION))
+        self._ids:dict[str,int] = {}            # Player name -> id (so a name is only looked up once)
+        self._pending:list[tuple] = []          # Games waiting to be written
+        self._totals:dict[str,list[int]] = {}   # Player name -> totals for the waiting games
+        self._oldest = 0.0                      # When the oldest waiting game was recorded
+        self._written = 0
+        self._batches = 0
+        return
+
+    @property
+    def pending(self) -> int:
+        """
+        The games waiting to be written.
+        """
+        return len(self._pending)
+
+    @property
+    def written(self) -> int:
+        """
+        The games written (by this store).
+        """
+        return self._written
+
+    @property
+    def batches(self) -> int:
+        """
+        The transactions used to write them.
+        """
+        return self._batches
+
+    def record_game(self, player_a:str, player_b:str, winner:int|None, a_moves:int, b_moves:int,
+                    a_random:tuple[int,int]=(0, 0), b_random:tuple[int,int]=(0, 0)) -> None:
+        """
+        Record a game. It is written with the next batch.
+
+        Parameters:
+            player_a, player_b: The players' names.
+            winner: 0 if 'a' won, 1 if 'b' won, None for a draw.
+            a_moves, b_moves: The moves each player made.
+            a_random, b_random: The (random moves, random splits) of each player.
+        """
+        now = time.time()
+        if not self._pending:
+            self._oldest = now
+        self._pending.append((now, player_a, player_b, winner, a_moves, b_moves,
+                              a_random[0], a_random[1], b_random[0], b_random[1]))
+        for side, name, moves, rnd in ((0, player_a, a_moves, a_random), (1, player_b, b_moves, b_random)):
+            totals = self._totals.get(name)
+            if totals is None:
+                totals = self._totals[name] = [0, 0, 0, 0, 0, 0, 0]
+            totals[0] += 1
+            if winner is None:
+                totals[3] += 1
+            elif winner == side:
+                totals[1] += 1
+            else:
+                totals[2] += 1
+            totals[4] += moves
+            totals[5] += rnd[0]
+            totals[6] += rnd[1]
+        if len(self._pending) >= self._batch_size or now - self._oldest >= self._max_delay:
+            self.flush()
+        return
+
+    def _player_ids(self, names:'set[str]') -> None:
+        """
+        Make sure the players are in the database, and their ids are known.
+        """
+        new = [name for name in names if name not in self._ids]
+        if new:
+            self._db.executemany("INSERT OR IGNORE INTO players (name) VALUES (?)", [(name,) for name in new])
+            for name in new:
+                self._ids[name] = self._db.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()[0]
+        return
+
+    @property
+    def max_delay(self) -> float:
+        return self._max_delay
+
+    def flush_if_due(self) -> bool:
+        """
+        Write the waiting games if the oldest has waited 'max_delay' seconds. `record_game`
+        only checks this when a game is recorded, so a program that can go a while without
+        a game (a server) should call this now and then.
+
+        Return: True if a batch was written.
+        """
+        if self._pending and time.time() - self._oldest >= self._max_delay:
+            self.flush()
+            return True
+        return False
+
+    def flush(self) -> None:
+        """
+        Write the waiting games (one transaction).
+        """
+        if not self._pending:
+            return
+        ids = self._ids
+        with self._db:     # A transaction: it is all written, or none of it is
+            self._player_ids(set(self._totals))
+            self._db.executemany(
+                "INSERT INTO games (finished, player_a, player_b, winner, a_moves, b_moves,"
+                " a_random_moves, a_random_splits, b_random_moves, b_random_splits)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(g[0], ids[g[1]], ids[g[2]]) + g[3:] for g in self._pending])
+            self._db.executemany(
+                "UPDATE players SET games = games + ?, wins = wins + ?, losses = losses + ?, draws = draws + ?,"
+                " moves = moves + ?, random_moves = random_moves + ?, random_splits = random_splits + ?"
+                " WHERE id = ?",
+                [tuple(totals) + (ids[name],) for name, totals in self._totals.items()])
+        self._written += len(self._pending)
+        self._batches += 1
+        self._pending.clear()
+        self._totals.clear()
+        return
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+        return
+
+    def __enter__(self) -> 'StatsStore':
+        return self
+
+    def __exit__(self, *exc:object) -> None:
+        self.close()
+        return
+
+    #
+    # Questions (the waiting games are written first, so they are included)
+    #
+
+    def player_stats(self, name:str) -> 'PlayerStats|None':
+        """
+        The totals for a player (None if they haven't played).
+        """
+        self.flush()
+        row = self._db.execute(
+            "SELECT name, games, wins, losses, draws, moves, random_moves, random_splits"
+            " FROM players WHERE name = ?", (name,)).fetchone()
+        return None if row is None else PlayerStats(*row)
+
+    def leaderboard(self, limit:int=10) -> list['PlayerStats']:
+        """
+        The players with the most wins.
+        """
+        self.flush()
+        rows = self._db.execute(
+            "SELECT name, games, wins, losses, draws, moves, random_moves, random_splits"
+            " FROM players ORDER BY wins DESC LIMIT ?", (limit,)).fetchall()
+        return [PlayerStats(*row) for row in rows]
+
+    def head_to_head(self, player_a:str, player_b:str) -> 'HeadToHead':
+        """
+        The results of the games between two players (in either order).
+        """
+        self.flush()
+        a = self._ids.get(player_a) or self._lookup(player_a)
+        b = self._ids.get(player_b) or self._lookup(player_b)
+        if a is None or b is None:
+            return HeadToHead(0, 0, 0, 0)
+        games, a_wins, b_wins, draws = 0, 0, 0, 0
+        for first, second in ((a, b), (b, a)):
+            for winner, count in self._db.execute(
+                    "SELECT winner, COUNT(*) FROM games WHERE player_a = ? AND player_b = ? GROUP BY winner",
+                    (first, second)):
+                games += count
+                if winner is None:
+                    draws += count
+                elif (winner == 0) == (first == a):
+                    a_wins += count
+                else:
+                    b_wins += count
+        return HeadToHead(games, a_wins, b_wins, draws)
+
+    def game_count(self) -> int:
+        self.flush()
+        return self._db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def _lookup(self, name:str) -> int|None:
+        row = self._db.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show (or fill) a ChopStix statistics store.")
+    parser.add_argument('path', help="The database file")
+    parser.add_argument('--top', type=int, default=10, metavar='N', help="Show the N players with the most wins")
+    parser.add_argument('--player', action='append', default=[], metavar='NAME', help="Show a player's totals")
+    parser.add_argument('--selfplay', type=int, default=0, metavar='N', help="Add N games of MoveMaster against itself")
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="Games written in one transaction")
+    args = parser.parse_args()
+    with StatsStore(args.path, args.batch) as store:
+        if args.selfplay:
+            from cs_selfplay import SelfPlay, master_pair   # Only needed to fill the store
+            a, b = master_pair(int(time.time()), 20, 5, 20, 50)
+            started = time.perf_counter()
+            SelfPlay(a, b, store=store, names=("MoveMaster(20,5)", "MoveMaster(20,50)")).tally(args.selfplay)
+            store.flush()
+            seconds = time.perf_counter() - started
+            print("Added {:,} games in {:.2f}s ({:,.0f} games/s, {:,} transactions)".format(
+                args.selfplay, seconds, args.selfplay / seconds, store.batches))
+        print("Games: {:,}".format(store.game_count()))
+        for stats in store.leaderboard(args.top):
+            print("  {:<24} games {:>10,}  wins {:>10,} ({:.1%})  moves {:>12,}".format(
+                stats.name, stats.games, stats.wins, stats.win_rate, stats.moves))
+        for name in args.player:
+            print(store.player_stats(name))
+    return
+
+if __name__ == "__main__":
+    main()
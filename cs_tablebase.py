@@ -0,0 +1,123 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_tablebase.py
+
+This file contains the code to save the solved positions (see cs_solver) to a
+file, and to load them back using 'mmap' (memory mapping). With a memory mapped
+file, the operating system reads the data as it is used, so there is nothing
+to compute or parse when the app starts.
+
+The file is:
+    Header (24 bytes, little-endian):
+        magic      4 bytes   b'CSTB'
+        version    2 bytes   FORMAT_VERSION
+        reserved   2 bytes   0
+        rules      8 bytes   The first 8 bytes of the SHA-256 of RULES_ID
+        count      4 bytes   The number of canonical states
+        checksum   4 bytes   CRC-32 of the data
+    Data:
+        One byte per canonical state, in class number order (see cs_solver.encode
+        and cs_canonical). Version 1 files had a byte for every state index.
+
+If the file is missing, damaged, from a different version, or for different
+rules, it is rebuilt (solved again and saved).
+"""
+from cs_canonical import CLASS_COUNT
+from cs_rules import STANDARD
+from cs_solver import Tablebase, solve
+
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+
+FORMAT_VERSION = 2
+MAGIC = b'CSTB'
+HEADER = struct.Struct('<4sHH8sII')
+# Describes the rules that the data was solved for. If the rules change, this must change.
+RULES_ID = STANDARD.signature()
+# The default file is kept with the app.
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chopstix.cstb')
+
+def rules_hash(rules_id:str=RULES_ID) -> bytes:
+    """
+    The 8 byte hash of a rules description, as kept in the file header.
+    """
+    return hashlib.sha256(rules_id.encode('utf-8')).digest()[:8]
+
+def write_tablebase(path:str, data:bytes, rules_id:str=RULES_ID) -> None:
+    """
+    Write the tablebase data (one byte per canonical state, see Tablebase.data) to a file.
+
+    The data is written to a temporary file that is then renamed, so a reader
+    never sees a partly written file.
+    """
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, rules_hash(rules_id), len(data), zlib.crc32(data))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(data)
+    os.replace(tmp_path, path)
+    return
+
+def read_tablebase(path:str, rules_id:str=RULES_ID, count:int=CLASS_COUNT) -> 'memoryview|None':
+    """
+    Memory map a tablebase file and check it.
+
+    Return:
+        A memoryview of the data (one byte per canonical state), or None if the file
+        is missing or isn't valid for this version and these rules.
+    """
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # The map stays valid after the file is closed
+    except (OSError, ValueError):
+        return None  # Missing (or empty) file
+    if len(mapped) != HEADER.size + count:
+        mapped.close()
+        return None
+    magic, version, _, rules, size, checksum = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or version != FORMAT_VERSION or rules != rules_hash(rules_id) or size != count:
+        mapped.close()
+        return None
+    data = memoryview(mapped)[HEADER.size:]
+    if zlib.crc32(data) != checksum:
+        data.release()
+        mapped.close()
+        return None
+    return data
+
+def load_tablebase(path:str=DEFAULT_PATH) -> 'Tablebase':
+    """
+    Load the Tablebase from a file, solving and saving it if needed.
+
+    If the file can't be written (for example, the directory is read-only) the
+    solved data is just used from memory.
+    """
+    data = read_tablebase(path)
+    if data is None:
+        solved = Tablebase(solve()).data    # Shrunk to the canonical states
+        try:
+            write_tablebase(path, solved)  # type: ignore (the shrunk data is bytes)
+            data = read_tablebase(path)
+        except OSError:
+            data = None
+        if data is None:
+            return Tablebase(solved)
+    return Tablebase(data)
+
+_tablebase:'Tablebase|None' = None
+
+def get_tablebase() -> 'Tablebase':
+    """
+    Get the Tablebase, loading it the first time it is needed.
+    """
+    global _tablebase
+    if _tablebase is None:
+        _tablebase = load_tablebase()
+    return _tablebase
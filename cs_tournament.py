@@ -0,0 +1,150 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_tournament.py
+
+This file contains a tournament runner that plays MoveMaster configurations
+(different favor_split_pcnt and favor_random_pcnt values) against each other
+using all of the computer's cores.
+
+The games for each pair of configurations are cut into 'shards' of a fixed
+size. Each shard gets its own seed, worked out from the tournament seed and
+the shard's place in the tournament, so it plays the same games no matter
+which worker process runs it. Workers only send back the totals for a shard
+(a Tally), and the totals are added up, so the results are the same for any
+number of workers.
+
+Run it from the command line to sweep some values:
+    python3 cs_tournament.py --split 0 20 50 --random 0 5 25 --games 20000
+"""
+from cs_instrument import Instrumentation
+from cs_selfplay import SelfPlay, Tally, master_pair
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+from typing import NamedTuple
+
+SHARD_GAMES = 5000  # Games in each shard (the unit of work given to a worker)
+
+class Config(NamedTuple):
+    """
+    A MoveMaster configuration.
+    """
+    split_pcnt: int
+    random_pcnt: int
+
+class _Shard(NamedTuple):
+    """
+    The work for a worker: play 'games' games of config 'a' against config 'b'.
+    """
+    row: int
+    col: int
+    a: Config
+    b: Config
+    games: int
+    seed: int
+    instrument: bool
+
+def shard_seed(seed:int, row:int, col:int, shard:int) -> int:
+    """
+    The seed for one shard. Hashing keeps the shards' random numbers independent.
+    """
+    key = "{}:{}:{}:{}".format(seed, row, col, shard).encode('ascii')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+def _play_shard(shard:'_Shard') -> tuple[int,int,'Tally','tuple[Instrumentation,Instrumentation]|None']:
+    """
+    Play the games of a shard (this runs in a worker process).
+
+    Return: (row, col, totals, (a, b) instrumentation or None)
+    """
+    instruments = (Instrumentation(), Instrumentation()) if shard.instrument else None
+    a, b = master_pair(shard.seed, shard.a.split_pcnt, shard.a.random_pcnt,
+                       shard.b.split_pcnt, shard.b.random_pcnt, instruments)
+    return (shard.row, shard.col, SelfPlay(a, b).tally(shard.games), instruments)
+
+def _shards(configs:list['Config'], games:int, seed:int, shard_games:int, instrument:bool) -> list['_Shard']:
+    shards:list[_Shard] = []
+    for row, a in enumerate(configs):
+        for col, b in enumerate(configs):
+            remaining = games
+            number = 0
+            while remaining > 0:
+                count = min(shard_games, remaining)
+                shards.append(_Shard(row, col, a, b, count, shard_seed(seed, row, col, number), instrument))
+                remaining -= count
+                number += 1
+    return shards
+
+def run_tournament(configs:list['Config'], games:int, seed:int=0, workers:int|None=None,
+                   shard_games:int=SHARD_GAMES,
+                   instruments:'list[Instrumentation]|None'=None) -> list[list['Tally']]:
+    """
+    Play every configuration against every configuration (including itself).
+
+    Parameters:
+        configs: The MoveMaster configurations.
+        games: The games to play for each pair.
+        seed: The tournament seed. The same seed gives the same results.
+        workers: The number of worker processes (default: one per core). With 1,
+            the games are played in this process.
+        shard_games: The games in each shard (this must be the same to get the same results).
+        instruments: If given (one Instrumentation for each configuration), the decision
+            paths of every game are counted and added to the configuration's Instrumentation.
+
+    Return:
+        A matrix of totals. result[row][col] is configs[row] (player 'a') against configs[col].
+    """
+    shards = _shards(configs, games, seed, shard_games, instruments is not None)
+    result = [[Tally() for _ in configs] for _ in configs]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if executor is None:
+            done = map(_play_shard, shards)
+        else:
+            done = executor.map(_play_shard, shards, chunksize=max(1, len(shards) // (workers * 4)))
+        for row, col, tally, shard_instruments in done:
+            result[row][col].add(tally)
+            if instruments is not None and shard_instruments is not None:
+                instruments[row].merge(shard_instruments[0])
+                instruments[col].merge(shard_instruments[1])
+    finally:
+        # Always stop the workers (even if a shard failed, or the caller stopped us)
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play MoveMaster configurations against each other.")
+    parser.add_argument('--split', type=int, nargs='+', default=[20], help="favor_split_pcnt values")
+    parser.add_argument('--random', type=int, nargs='+', default=[5], help="favor_random_pcnt values")
+    parser.add_argument('--games', type=int, default=10000, help="Games for each pair of configurations")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--paths', action='store_true', help="Count and time the MoveMaster decision paths")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    configs = [Config(s, r) for s in args.split for r in args.random]
+    instruments = [Instrumentation() for _ in configs] if args.paths else None
+    result = run_tournament(configs, args.games, args.seed, args.workers, instruments=instruments)
+    # Print the win percentage of each row's configuration against each column's
+    print("{:>10} ".format("a \\ b") + " ".join("{:>9}".format("{}/{}".format(*c)) for c in configs))
+    for row, a in enumerate(configs):
+        cells = ["{:>8.2f}%".format(100 * t.wins[0] / t.games) for t in result[row]]
+        print("{:>10} ".format("{}/{}".format(*a)) + " ".join(cells))
+    if instruments is not None:
+        for config, inst in zip(configs, instruments):
+            print("\nDecision paths for {}/{}:".format(*config))
+            print(inst.report())
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+cs_vector_sim.py
+
+This file contains a 'vectorized' game simulator. Rather than playing one game
+at a time, it holds the hands of N games in NumPy arrays and moves all of them
+at once with array operations. Python only loops once per move (not once per
+move per game), so it plays many more games per second than cs_selfplay.
+
+The rules are the same as `Game.move` (tap and split), and the players use the
+same logic as `MoveMaster` (split advice, MOVE_TABLE, winning moves and random
+moves), from the tables in cs_move_gen. The random numbers come from NumPy, so
+the games aren't the same ones that cs_selfplay would play with the same seed,
+but the odds of each choice are the same.
+
+NumPy is optional. If it isn't installed, `simulate` plays the games with
+cs_selfplay instead (much slower, but the same kind of results).
+"""
+from cs_move_gen import MOVE_TABLE, RANDOM_MOVES, SPLIT_ADVICE, WINNING_MOVES, MovesData, YesNoMaybe, _build_move_table
+from cs_position import Move
+from cs_rules import STANDARD
+from cs_selfplay import MAX_MOVES, SelfPlay, Tally, master_pair
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+class BatchResult:
+    """
+    The results of a batch of games (one entry for each game).
+
+    winners: 0 if player 'a' won, 1 if player 'b' won, -1 for a draw.
+    moves: The moves made in each game.
+    random_moves: The (a, b) random moves for each game.
+    random_splits: The (a, b) random splits for each game.
+
+    With NumPy these are arrays, otherwise lists.
+    """
+
+    def __init__(self, winners:'object', moves:'object', random_moves:'object', random_splits:'object') -> None:
+        self.winners = winners
+        self.moves = moves
+        self.random_moves = random_moves
+        self.random_splits = random_splits
+        return
+
+    def tally(self) -> 'Tally':
+        """
+        The totals for the batch.
+        """
+        tally = Tally()
+        tally.games = len(self.winners)  # type: ignore
+        for winner, moves, rnd, rnd_split in zip(self.winners, self.moves, self.random_moves, self.random_splits):  # type: ignore
+            if winner < 0:
+                tally.draws += 1
+            else:
+                tally.wins[int(winner)] += 1
+            tally.moves += int(moves)
+            for i in (0, 1):
+                tally.random_moves[i] += int(rnd[i])
+                tally.random_splits[i] += int(rnd_split[i])
+        return tally
+
+def _tables(a_moves:'MovesData|None'=None, b_moves:'MovesData|None'=None) -> 'dict[str, object]':
+    """
+    The MoveMaster tables as NumPy arrays (indexed by state index). A missing move is -1.
+    The 'table' has a row for player a and a row for player b.
+    """
+    def move_table(moves:'MovesData|None') -> list[int]:
+        return [-1 if m is None else m for m in (MOVE_TABLE if moves is None else _build_move_table(moves))]
+    return {
+        'advice': np.array([int(a) for a in SPLIT_ADVICE], dtype=np.int8),
+        'win': np.array([-1 if m is None else m for m in WINNING_MOVES], dtype=np.int8),
+        'table': np.array([move_table(a_moves), move_table(b_moves)], dtype=np.int8),
+        'random': np.array(RANDOM_MOVES, dtype=np.int8),
+        'tap': np.array(STANDARD.tap_table, dtype=np.int8),    # tap[to fingers, from fingers] (cs_rules)
+    }
+
+def _simulate_numpy(games:int, seed:int, a:tuple[int,int], b:tuple[int,int], max_moves:int,
+                    a_moves:'MovesData|None'=None, b_moves:'MovesData|None'=None) -> 'BatchResult':
+    t = _tables(a_moves, b_moves)
+    advice, win, tables, random_moves, tap = t['advice'], t['win'], t['table'], t['random'], t['tap']
+    rng = np.random.default_rng(seed)
+    # Thresholds for the 'random() >= threshold' choices (see MoveMaster.__init__), for player a and b
+    split_thr = np.array([(100 - a[0] - 1) / 100, (100 - b[0] - 1) / 100])
+    random_thr = np.array([(100 - a[1] - 1) / 100, (100 - b[1] - 1) / 100])
+    # The hands of the games still being played, from the point of view of the side moving
+    ml = np.ones(games, dtype=np.int8)
+    mr = np.ones(games, dtype=np.int8)
+    ol = np.ones(games, dtype=np.int8)
+    orr = np.ones(games, dtype=np.int8)
+    game_id = np.arange(games)                  # Which game each entry is
+    player = (game_id & 1).astype(np.int8)      # Who is moving (0=a, 1=b). 'a' goes first in the even games
+    winners = np.full(games, -1, dtype=np.int8)
+    moves = np.full(games, max_moves, dtype=np.int32)
+    rnd_counts = np.zeros((games, 2), dtype=np.int32)
+    split_counts = np.zeros((games, 2), dtype=np.int32)
+    for move_number in range(1, max_moves + 1):
+        if game_id.size == 0:
+            break
+        n = game_id.size
+        index = ((ml.astype(np.int16) * 5 + mr) * 5 + ol) * 5 + orr
+        u = rng.random((3, n))
+        # The MoveMaster logic, for every game at once
+        winning = win[index]
+        table = tables[player, index]   # The MOVES move for each game (from the moving player's table)
+        use_random = (u[1] >= random_thr[player]) | (table < 0)
+        random_move = np.where(winning >= 0, winning, random_moves[index, (u[2] * 4).astype(np.intp)])
+        picked = np.where(use_random, random_move, table)
+        adv = advice[index]
+        move = np.where(adv == YesNoMaybe.NO, np.where(winning >= 0, winning, picked), picked)
+        do_split = (adv == YesNoMaybe.YES) | ((adv == YesNoMaybe.MAYBE) & (u[0] >= split_thr[player]))
+        move = np.where(do_split, Move.S, move).astype(np.int8)
+        # Count the random moves (the table/random pick was used and it was random)
+        counted = use_random & ~do_split & ~((adv == YesNoMaybe.NO) & (winning >= 0))
+        np.add.at(rnd_counts, (game_id[counted], player[counted]), 1)
+        random_split = do_split & (adv == YesNoMaybe.MAYBE)
+        np.add.at(split_counts, (game_id[random_split], player[random_split]), 1)
+        # Make the moves (the same rules as Game.move)
+        half = (ml + mr) // 2     # An EVEN split (cs_rules): one hand is empty, the other is shared
+        is_split = move == Move.S
+        from_fingers = np.where((move == Move.LL) | (move == Move.LR), ml, mr)
+        to_left = (move == Move.LL) | (move == Move.RL)
+        new_ol = np.where(~is_split & to_left, tap[ol, from_fingers], ol).astype(np.int8)
+        new_or = np.where(~is_split & ~to_left, tap[orr, from_fingers], orr).astype(np.int8)
+        new_ml = np.where(is_split, half, ml).astype(np.int8)
+        new_mr = np.where(is_split, half, mr).astype(np.int8)
+        # The other side becomes the side moving
+        ml, mr, ol, orr = new_ol, new_or, new_ml, new_mr
+        # Games where the side now moving has been tapped out are over. Drop them.
+        over = (ml == 0) & (mr == 0)
+        if over.any():
+            done = game_id[over]
+            winners[done] = player[over]
+            moves[done] = move_number
+            keep = ~over
+            ml, mr, ol, orr = ml[keep], mr[keep], ol[keep], orr[keep]
+            game_id, player = game_id[keep], player[keep]
+        player = player ^ 1
+    return BatchResult(winners, moves, rnd_counts, split_counts)
+
+def _simulate_python(games:int, seed:int, a:tuple[int,int], b:tuple[int,int], max_moves:int,
+                     a_moves:'MovesData|None'=None, b_moves:'MovesData|None'=None) -> 'BatchResult':
+    player_a, player_b = master_pair(seed, a[0], a[1], b[0], b[1], a_moves=a_moves, b_moves=b_moves)
+    winners:list[int] = []
+    moves:list[int] = []
+    rnd:list[tuple[int,int]] = []
+    rnd_splits:list[tuple[int,int]] = []
+    for result in SelfPlay(player_a, player_b, max_moves).play_games(games):
+        winners.append(-1 if result.winner is None else result.winner)
+        moves.append(result.moves)
+        rnd.append(result.random_moves)
+        rnd_splits.append(result.random_splits)
+    return BatchResult(winners, moves, rnd, rnd_splits)
+
+def simulate(games:int, seed:int=0, a:tuple[int,int]=(20, 5), b:tuple[int,int]=(20, 5),
+             max_moves:int=MAX_MOVES, use_numpy:bool=True,
+             a_moves:'MovesData|None'=None, b_moves:'MovesData|None'=None) -> 'BatchResult':
+    """
+    Play a batch of MoveMaster games. Player 'a' moves first in the even games and 'b' in the odd ones.
+
+    Parameters:
+        games: The number of games.
+        seed: The seed for the random numbers.
+        a: (favor_split_pcnt, favor_random_pcnt) for player 'a'.
+        b: (favor_split_pcnt, favor_random_pcnt) for player 'b'.
+        max_moves: Moves before a game is called a draw.
+        use_numpy: Use NumPy (if it is installed).
+        a_moves, b_moves: The moves data for player 'a' and 'b' (cs_moves.MOVES if not given).
+    """
+    if use_numpy and np is not None:
+        return _simulate_numpy(games, seed, a, b, max_moves, a_moves, b_moves)
+    return _simulate_python(games, seed, a, b, max_moves, a_moves, b_moves)
@@ -0,0 +1,15 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+conftest.py
+
+The app's modules are in the directory above this one (they aren't a package),
+so it is put on the path for the tests.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+test_mcts.py
+
+Tests for the Monte Carlo Tree Search player (cs_mcts).
+"""
+from cs_mcts import MCTSMaster
+from cs_rules import STANDARD
+
+import pytest
+
+def test_with_stops_the_workers() -> None:
+    index = STANDARD.index((1, 1), (1, 1))
+    with MCTSMaster(backend='process', workers=2, time_budget=None, playouts=256, seed=1) as master:
+        move, _ = master.search(index)
+        executor = master._executor
+        assert executor is not None     # Started by the search
+    assert move in ('S', 'LL', 'LR', 'RL', 'RR')
+    assert master._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(int)            # Shut down by close
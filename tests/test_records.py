@@ -0,0 +1,93 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+test_records.py
+
+Tests for the game record file format (cs_records).
+"""
+import cs_exceptions as cse
+from cs_instrument import DecisionPath
+from cs_position import Move
+from cs_records import (BLOCK_HEADER, FILE_HEADER, RecordWriter, block_offsets, move_byte,
+                        move_code, move_path, read_games)
+
+import os
+import pytest
+
+GAMES = [
+    # (moves, winner, first, seed, params)
+    (bytes([move_byte(Move.LL, DecisionPath.TABLE_HIT), move_byte(Move.RR)]), 0, 0, 1, (20, 5, 20, 50)),
+    (bytes(), None, 1, 2, (0, 0, 0, 0)),
+    (bytes([move_byte(Move.S, DecisionPath.FORCED_SPLIT)] * 7), 1, 1, 2**64 - 1, (100, 100, 0, 0)),
+    (bytes([move_byte(Move.RL)] * 300), None, 0, 3, (1, 2, 3, 4)),
+]
+
+def _write(path:str, games:list, block_size:int=64) -> None:
+    with RecordWriter(path, block_size) as writer:
+        for moves, winner, first, seed, params in games:
+            writer.add(moves, winner, first, seed, params)
+    return
+
+def test_round_trip(tmp_path) -> None:
+    path = str(tmp_path / 'games.csgr')
+    _write(path, GAMES * 5)
+    read = list(read_games(path))
+    assert len(read) == len(GAMES) * 5
+    for record, (moves, winner, first, seed, params) in zip(read, GAMES * 5):
+        assert (record.moves, record.winner, record.first, record.seed, record.params) == (moves, winner, first, seed, params)
+    # The moves and how they were picked are kept
+    first_game = read[0].moves
+    assert [move_code(m) for m in first_game] == [Move.LL, Move.RR]
+    assert [move_path(m) for m in first_game] == [DecisionPath.TABLE_HIT, None]
+    # The games are in more than one block, and the blocks can be read from any of them
+    offsets = list(block_offsets(path))
+    assert len(offsets) > 1
+    assert sum(games for _, games in offsets) == len(GAMES) * 5
+    start, games = offsets[1]
+    assert len(list(read_games(path, start, 1))) == games
+
+def test_bad_checksum(tmp_path) -> None:
+    path = str(tmp_path / 'games.csgr')
+    _write(path, GAMES)
+    with open(path, 'r+b') as f:
+        f.seek(FILE_HEADER.size + BLOCK_HEADER.size)    # The first byte of the first block's games
+        value = f.read(1)[0]
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([value ^ 0xFF]))
+    with pytest.raises(cse.RecordError, match="checksum"):
+        list(read_games(path))
+
+def test_reopen_after_torn_block(tmp_path) -> None:
+    path = str(tmp_path / 'games.csgr')
+    _write(path, GAMES, block_size=1 << 16)         # One block
+    good = os.path.getsize(path)
+    _write(path, GAMES)                             # More blocks, then tear the last one
+    os.truncate(path, os.path.getsize(path) - 5)
+    torn = len(list(read_games(path)))              # The torn block is ignored
+    assert len(GAMES) <= torn < len(GAMES) * 2
+    _write(path, GAMES[:2])                         # The writer cuts the torn block off first
+    read = list(read_games(path))
+    assert len(read) == torn + 2
+    assert [r.seed for r in read[-2:]] == [GAMES[0][3], GAMES[1][3]]
+    assert sum(games for _, games in block_offsets(path)) == len(read)
+    assert os.path.getsize(path) > good
+
+def test_reopen_after_torn_header(tmp_path) -> None:
+    path = str(tmp_path / 'games.csgr')
+    _write(path, GAMES)
+    with open(path, 'ab') as f:
+        f.write(b'CSBK\x01')                        # Only part of a block header
+    _write(path, GAMES[:1])
+    assert len(list(read_games(path))) == len(GAMES) + 1
+
+def test_not_a_record_file(tmp_path) -> None:
+    path = str(tmp_path / 'games.csgr')
+    with open(path, 'wb') as f:
+        f.write(b'not a record file')
+    with pytest.raises(cse.RecordError):
+        RecordWriter(path)
+    with pytest.raises(cse.RecordError):
+        list(read_games(path))
@@ -0,0 +1,26 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+test_selfplay.py
+
+Tests for the headless game engine (cs_selfplay).
+"""
+from cs_selfplay import SelfPlay, master_pair
+
+import pytest
+
+def test_tally_counts() -> None:
+    a, b = master_pair(1)
+    tally = SelfPlay(a, b).tally(200)
+    assert tally.games == 200
+    assert tally.wins[0] + tally.wins[1] + tally.draws == 200
+    assert tally.random_moves == [a.random_moves, b.random_moves]
+    assert tally.random_splits == [a.random_splits, b.random_splits]
+
+def test_player_cant_play_itself() -> None:
+    a, _ = master_pair(1)
+    with pytest.raises(ValueError):
+        SelfPlay(a, a)
@@ -0,0 +1,86 @@
+"""
+Copyright (c) 2025 AESilky
+SPDX-License-Identifier: MIT License
+"""
+
+"""
+test_solver.py
+
+Tests for the perfect-play solvers (cs_solver, cs_big_solver) and the
+tablebase file (cs_tablebase).
+"""
+from cs_canonical import CLASS_COUNT
+from cs_position import STATE_COUNT
+from cs_rules import STANDARD, Rules, SplitRule
+from cs_solver import Outcome, Tablebase, solve
+from cs_tablebase import FORMAT_VERSION, HEADER, read_tablebase, rules_hash, write_tablebase
+
+import struct
+import pytest
+
+# Variants small enough to solve quickly with both solvers
+VARIANTS = [
+    STANDARD,
+    Rules(cutoff=True),
+    Rules(split=SplitRule.FLEXIBLE),
+    Rules(tap_empty=False),
+    Rules(modulus=4),
+    Rules(modulus=6, cutoff=True),
+    Rules(hands=3),
+]
+
+def test_standard_totals() -> None:
+    data = solve()
+    assert len(data) == STATE_COUNT
+    tablebase = Tablebase(data)
+    outcomes = [tablebase.outcome(index) for index in range(STATE_COUNT)]
+    assert outcomes.count(Outcome.WIN) == 126
+    assert outcomes.count(Outcome.LOSS) == 38
+    assert outcomes.count(Outcome.DRAW) == 461
+
+@pytest.mark.parametrize('rules', VARIANTS, ids=lambda rules: rules.signature())
+def test_big_solver_matches(rules:'Rules') -> None:
+    pytest.importorskip('numpy')
+    from cs_big_solver import solve as big_solve
+    assert big_solve(rules).to_bytes() == solve(rules)
+
+@pytest.fixture
+def tablebase_file(tmp_path) -> str:
+    path = str(tmp_path / 'test.cstb')
+    write_tablebase(path, bytes(Tablebase(solve()).data))
+    return path
+
+def _patch_header(path:str, **fields:object) -> None:
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    magic, version, reserved, rules, size, checksum = HEADER.unpack_from(data, 0)
+    values = dict(magic=magic, version=version, reserved=reserved, rules=rules, size=size, checksum=checksum)
+    values.update(fields)
+    struct.pack_into(HEADER.format, data, 0, *values.values())
+    with open(path, 'wb') as f:
+        f.write(data)
+    return
+
+def test_tablebase_file(tablebase_file:str) -> None:
+    data = read_tablebase(tablebase_file)
+    assert data is not None
+    assert len(data) == CLASS_COUNT
+    assert bytes(data) == bytes(Tablebase(solve()).data)
+
+def test_tablebase_bad_checksum(tablebase_file:str) -> None:
+    with open(tablebase_file, 'r+b') as f:
+        f.seek(HEADER.size + 10)
+        value = f.read(1)[0]
+        f.seek(HEADER.size + 10)
+        f.write(bytes([value ^ 0x01]))
+    assert read_tablebase(tablebase_file) is None
+
+def test_tablebase_bad_version(tablebase_file:str) -> None:
+    _patch_header(tablebase_file, version=FORMAT_VERSION + 1)
+    assert read_tablebase(tablebase_file) is None
+
+def test_tablebase_other_rules(tablebase_file:str) -> None:
+    _patch_header(tablebase_file, rules=rules_hash(Rules(cutoff=True).signature()))
+    assert read_tablebase(tablebase_file) is None
+    # The same file is accepted when read for the rules it says it is for
+    assert read_tablebase(tablebase_file, Rules(cutoff=True).signature()) is not None